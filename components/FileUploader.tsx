@@ -1,18 +1,23 @@
 'use client';
 
-import React, { useCallback, useState } from 'react';
+import React, { memo, useCallback } from 'react';
 import { useDropzone } from 'react-dropzone';
-import { Upload, X, FileImage, FileVideo } from 'lucide-react';
+import { Upload, X, FileImage, FileVideo, RotateCcw } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Progress } from '@/components/ui/progress';
 import { Card } from '@/components/ui/card';
-import { useUpload } from '@/hooks/useUpload';
+import { useUpload, useUploadProgress, UploadItem, UploadStatus } from '@/hooks/useUpload';
+import { ProgressStore } from '@/lib/progress-store';
+import { CompressionOptions } from '@/lib/image-compression';
+import { VirtualList } from './VirtualList';
 import { formatFileSize } from '@/lib/utils';
 
 interface FileUploaderProps {
   onUploadComplete?: (files: UploadedFile[]) => void;
   maxFiles?: number;
   acceptedTypes?: string[];
+  // Shrink images for the target platform in the browser before uploading
+  compress?: boolean | CompressionOptions;
 }
 
 interface UploadedFile {
@@ -22,67 +27,119 @@ interface UploadedFile {
   type: string;
   url: string;
   progress: number;
-  status: 'uploading' | 'completed' | 'error';
+  status: UploadStatus;
 }
 
+const getUploadKey = (file: UploadItem) => file.id;
+
+const getFileIcon = (type: string) => {
+  if (type.startsWith('image/')) return <FileImage className="h-8 w-8" />;
+  if (type.startsWith('video/')) return <FileVideo className="h-8 w-8" />;
+  return <Upload className="h-8 w-8" />;
+};
+
+// Subscribes on its own, so byte progress re-renders just the bar
+function UploadProgressBar({ progressStore, id, className }: {
+  progressStore: ProgressStore;
+  id?: string;
+  className: string;
+}) {
+  const progress = useUploadProgress(progressStore, id);
+
+  return (
+    <div className={className}>
+      <Progress value={progress} className="h-2" />
+    </div>
+  );
+}
+
+interface UploadRowProps {
+  file: UploadItem;
+  progressStore: ProgressStore;
+  onCancel: (id: string) => void;
+  onRetry: (id: string) => void;
+  onRemove: (id: string) => void;
+}
+
+// Memoized: the item object only changes on a status transition for this
+// file, so rows for other files are skipped when the list re-renders
+const UploadRow = memo(function UploadRow({ file, progressStore, onCancel, onRetry, onRemove }: UploadRowProps) {
+  const settled = file.status === 'completed' || file.status === 'error' || file.status === 'cancelled';
+
+  return (
+    <Card className="p-4">
+      <div className="flex items-center justify-between">
+        <div className="flex items-center space-x-3">
+          {getFileIcon(file.type)}
+          <div>
+            <p className="font-medium text-sm">{file.name}</p>
+            <p className="text-xs text-gray-500">
+              {formatFileSize(file.size)}
+            </p>
+          </div>
+        </div>
+
+        <div className="flex items-center space-x-2">
+          {file.status === 'uploading' && (
+            <UploadProgressBar progressStore={progressStore} id={file.id} className="w-24" />
+          )}
+
+          {(file.status === 'error' || file.status === 'cancelled') && (
+            <Button
+              variant="ghost"
+              size="sm"
+              onClick={() => onRetry(file.id)}
+            >
+              <RotateCcw className="h-4 w-4" />
+            </Button>
+          )}
+
+          <div className={`text-xs px-2 py-1 rounded-full ${
+            file.status === 'completed' 
+              ? 'bg-green-100 text-green-700'
+              : file.status === 'error'
+              ? 'bg-red-100 text-red-700'
+              : file.status === 'cancelled'
+              ? 'bg-gray-100 text-gray-700'
+              : 'bg-blue-100 text-blue-700'
+          }`}>
+            {file.status}
+          </div>
+
+          {/* Stops an upload in progress; removes a finished one */}
+          <Button
+            variant="ghost"
+            size="sm"
+            onClick={() => (settled ? onRemove(file.id) : onCancel(file.id))}
+          >
+            <X className="h-4 w-4" />
+          </Button>
+        </div>
+      </div>
+    </Card>
+  );
+});
+
 export function FileUploader({ 
   onUploadComplete, 
   maxFiles = 10,
-  acceptedTypes = ['image/*', 'video/*']
+  acceptedTypes = ['image/*', 'video/*'],
+  compress = false
 }: FileUploaderProps) {
-  const [files, setFiles] = useState<UploadedFile[]>([]);
-  const { uploadFile } = useUpload();
+  const { uploads, uploadMultiple, cancel, retry, remove, progressStore, isUploading } = useUpload({ concurrency: 3, compress });
 
   const onDrop = useCallback(async (acceptedFiles: File[]) => {
-    const newFiles: UploadedFile[] = acceptedFiles.map(file => ({
-      id: Math.random().toString(36).substr(2, 9),
-      name: file.name,
-      size: file.size,
-      type: file.type,
-      url: '',
-      progress: 0,
-      status: 'uploading' as const,
-    }));
-
-    setFiles(prev => [...prev, ...newFiles]);
-
-    // Upload files one by one
-    for (let i = 0; i < acceptedFiles.length; i++) {
-      const file = acceptedFiles[i];
-      const fileId = newFiles[i].id;
-
-      try {
-        const uploadedUrl = await uploadFile(file, (progress) => {
-          setFiles(prev => 
-            prev.map(f => 
-              f.id === fileId 
-                ? { ...f, progress }
-                : f
-            )
-          );
-        });
-
-        setFiles(prev => 
-          prev.map(f => 
-            f.id === fileId 
-              ? { ...f, url: uploadedUrl, status: 'completed', progress: 100 }
-              : f
-          )
-        );
-      } catch (error) {
-        setFiles(prev => 
-          prev.map(f => 
-            f.id === fileId 
-              ? { ...f, status: 'error' }
-              : f
-          )
-        );
-      }
-    }
-
-    const completedFiles = files.filter(f => f.status === 'completed');
+    // Files upload concurrently; each one settles independently
+    const results = await uploadMultiple(acceptedFiles);
+
+    const completedFiles = acceptedFiles.flatMap((file, i) => {
+      const { id, url } = results[i];
+      return url
+        ? [{ id, name: file.name, size: file.size, type: file.type, url, progress: 100, status: 'completed' as const }]
+        : [];
+    });
     onUploadComplete?.(completedFiles);
-  }, [files, uploadFile, onUploadComplete]);
+  }, [uploadMultiple, onUploadComplete]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
@@ -90,16 +147,6 @@ export function FileUploader({
     maxFiles,
   });
 
-  const removeFile = (fileId: string) => {
-    setFiles(prev => prev.filter(f => f.id !== fileId));
-  };
-
-  const getFileIcon = (type: string) => {
-    if (type.startsWith('image/')) return <FileImage className="h-8 w-8" />;
-    if (type.startsWith('video/')) return <FileVideo className="h-8 w-8" />;
-    return <Upload className="h-8 w-8" />;
-  };
-
   return (
     <div className="w-full space-y-4">
       {/* Dropzone */}
@@ -125,50 +172,31 @@ export function FileUploader({
       </Card>
 
       {/* File List */}
-      {files.length > 0 && (
+      {uploads.length > 0 && (
         <div className="space-y-2">
-          <h3 className="font-medium text-gray-700">Uploaded Files</h3>
-          {files.map((file) => (
-            <Card key={file.id} className="p-4">
-              <div className="flex items-center justify-between">
-                <div className="flex items-center space-x-3">
-                  {getFileIcon(file.type)}
-                  <div>
-                    <p className="font-medium text-sm">{file.name}</p>
-                    <p className="text-xs text-gray-500">
-                      {formatFileSize(file.size)}
-                    </p>
-                  </div>
-                </div>
-
-                <div className="flex items-center space-x-2">
-                  {file.status === 'uploading' && (
-                    <div className="w-24">
-                      <Progress value={file.progress} className="h-2" />
-                    </div>
-                  )}
-
-                  <div className={`text-xs px-2 py-1 rounded-full ${
-                    file.status === 'completed' 
-                      ? 'bg-green-100 text-green-700'
-                      : file.status === 'error'
-                      ? 'bg-red-100 text-red-700'
-                      : 'bg-blue-100 text-blue-700'
-                  }`}>
-                    {file.status}
-                  </div>
-
-                  <Button
-                    variant="ghost"
-                    size="sm"
-                    onClick={() => removeFile(file.id)}
-                  >
-                    <X className="h-4 w-4" />
-                  </Button>
-                </div>
-              </div>
-            </Card>
-          ))}
+          <div className="flex items-center justify-between">
+            <h3 className="font-medium text-gray-700">Uploaded Files</h3>
+            {isUploading && (
+              <UploadProgressBar progressStore={progressStore} className="w-40" />
+            )}
+          </div>
+          {/* Only the rows in view are mounted, so large batches stay cheap */}
+          <VirtualList
+            items={uploads}
+            getKey={getUploadKey}
+            estimateHeight={74}
+            height={480}
+            gap={8}
+            renderItem={(file) => (
+              <UploadRow
+                file={file}
+                progressStore={progressStore}
+                onCancel={cancel}
+                onRetry={retry}
+                onRemove={remove}
+              />
+            )}
+          />
         </div>
       )}
     </div>
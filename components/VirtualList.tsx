@@ -0,0 +1,189 @@
+'use client';
+
+import React, { useCallback, useEffect, useMemo, useRef, useState } from 'react';
+
+interface VirtualListProps<T> {
+  items: T[];
+  getKey: (item: T, index: number) => string;
+  renderItem: (item: T, index: number) => React.ReactNode;
+  // Row height in px used until a row has been rendered and measured
+  estimateHeight: number;
+  // Maximum viewport height in px; shorter content shrinks the viewport
+  height: number;
+  // More than one column lays items out as a grid, one row per `columns` items
+  columns?: number;
+  gap?: number;
+  // Rows rendered beyond each edge of the viewport to hide blank flashes
+  overscan?: number;
+  className?: string;
+}
+
+// Index of the row containing offset y: the last row starting at or before it
+const findRow = (offsets: Float64Array, rowCount: number, y: number): number => {
+  let low = 0;
+  let high = rowCount - 1;
+  while (low < high) {
+    const mid = (low + high + 1) >> 1;
+    if (offsets[mid] <= y) low = mid;
+    else high = mid - 1;
+  }
+  return low;
+};
+
+function VirtualRow({ rowKey, offset, observer, children, style }: {
+  rowKey: string;
+  offset: number;
+  observer: ResizeObserver | null;
+  children: React.ReactNode;
+  style: React.CSSProperties;
+}) {
+  const ref = useRef<HTMLDivElement>(null);
+
+  useEffect(() => {
+    const element = ref.current;
+    if (!element || !observer) return;
+    observer.observe(element);
+    return () => observer.unobserve(element);
+  }, [observer]);
+
+  return (
+    <div
+      ref={ref}
+      data-row-key={rowKey}
+      data-row-offset={offset}
+      style={{ ...style, position: 'absolute', top: 0, left: 0, right: 0, transform: `translateY(${offset}px)` }}
+    >
+      {children}
+    </div>
+  );
+}
+
+// Windowed list or grid: only the rows in (or near) the viewport are in the
+// DOM, so rendering cost stays flat however many items there are. Row
+// heights are measured as rows render and replace the estimate; rows are
+// keyed by their first item so measurements survive reordering.
+export function VirtualList<T>({
+  items,
+  getKey,
+  renderItem,
+  estimateHeight,
+  height,
+  columns = 1,
+  gap = 0,
+  overscan = 4,
+  className,
+}: VirtualListProps<T>) {
+  const containerRef = useRef<HTMLDivElement>(null);
+  const sizes = useRef(new Map<string, number>());
+  const [scrollTop, setScrollTop] = useState(0);
+  const [measureVersion, setMeasureVersion] = useState(0);
+  const frame = useRef<number | null>(null);
+
+  const rowCount = Math.ceil(items.length / columns);
+  const rowKey = useCallback(
+    (row: number) => getKey(items[row * columns], row * columns),
+    [items, columns, getKey]
+  );
+
+  // offsets[i] is the top of row i; offsets[rowCount] is the total height
+  const offsets = useMemo(() => {
+    const result = new Float64Array(rowCount + 1);
+    for (let row = 0; row < rowCount; row++) {
+      result[row + 1] = result[row] + (sizes.current.get(rowKey(row)) ?? estimateHeight) + gap;
+    }
+    return result;
+    // measureVersion changes whenever a measured height does
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [rowCount, rowKey, estimateHeight, gap, measureVersion]);
+
+  const observer = useMemo(() => {
+    if (typeof ResizeObserver === 'undefined') return null;
+
+    return new ResizeObserver(entries => {
+      const container = containerRef.current;
+      let changed = false;
+      let scrollAdjustment = 0;
+
+      entries.forEach(entry => {
+        const element = entry.target as HTMLElement;
+        const key = element.dataset.rowKey!;
+        const size = element.getBoundingClientRect().height;
+        const previous = sizes.current.get(key);
+        if (previous === size) return;
+
+        sizes.current.set(key, size);
+        changed = true;
+        // A row above the viewport changing size would shift what the user
+        // is looking at; scroll by the same amount to keep it still
+        if (container && Number(element.dataset.rowOffset) < container.scrollTop) {
+          scrollAdjustment += size - (previous ?? estimateHeight);
+        }
+      });
+
+      if (container && scrollAdjustment) container.scrollTop += scrollAdjustment;
+      if (changed) setMeasureVersion(version => version + 1);
+    });
+    // Created once; the estimate only matters for rows not yet measured
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  useEffect(() => () => {
+    observer?.disconnect();
+    if (frame.current !== null) cancelAnimationFrame(frame.current);
+  }, [observer]);
+
+  // One state update per frame however many scroll events arrive
+  const onScroll = useCallback(() => {
+    if (frame.current !== null) return;
+    frame.current = requestAnimationFrame(() => {
+      frame.current = null;
+      setScrollTop(containerRef.current?.scrollTop ?? 0);
+    });
+  }, []);
+
+  const totalHeight = Math.max(0, offsets[rowCount] - gap);
+  const viewportHeight = Math.min(height, totalHeight);
+
+  const rows: React.ReactNode[] = [];
+  if (rowCount > 0) {
+    const start = Math.max(0, findRow(offsets, rowCount, scrollTop) - overscan);
+    const end = Math.min(rowCount - 1, findRow(offsets, rowCount, scrollTop + height) + overscan);
+
+    for (let row = start; row <= end; row++) {
+      const first = row * columns;
+      const rowItems = items.slice(first, first + columns);
+      const key = rowKey(row);
+
+      rows.push(
+        <VirtualRow
+          key={key}
+          rowKey={key}
+          offset={offsets[row]}
+          observer={observer}
+          style={columns > 1
+            ? { display: 'grid', gridTemplateColumns: `repeat(${columns}, minmax(0, 1fr))`, gap }
+            : {}}
+        >
+          {columns > 1
+            ? rowItems.map((item, i) => (
+              <React.Fragment key={getKey(item, first + i)}>{renderItem(item, first + i)}</React.Fragment>
+            ))
+            : renderItem(rowItems[0], first)}
+        </VirtualRow>
+      );
+    }
+  }
+
+  return (
+    <div
+      ref={containerRef}
+      onScroll={onScroll}
+      className={className}
+      style={{ height: viewportHeight, overflowY: 'auto', position: 'relative' }}
+    >
+      <div style={{ height: totalHeight, position: 'relative' }}>
+        {rows}
+      </div>
+    </div>
+  );
+}
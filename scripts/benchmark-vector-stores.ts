@@ -0,0 +1,187 @@
+// Recall and latency benchmark for the vector store backends.
+//
+//   npm run bench:vectors -- --backends=memory,weaviate --size=10000 --queries=200
+//
+// Every backend receives the same synthetic, clustered dataset and query set;
+// recall@k is measured against exact brute-force results. Weaviate can run
+// locally (see README); Pinecone needs PINECONE_BENCHMARK_INDEX pointing at a
+// scratch index, since the benchmark writes and then deletes its vectors.
+import { PineconeVectorStore } from '@/services/pinecone';
+import { WeaviateVectorStore } from '@/services/weaviate';
+import { MemoryVectorStore } from '@/services/memory-vector-store';
+import { VectorRecord, VectorStore } from '@/services/vector-store';
+
+interface BenchmarkOptions {
+  backends: string[];
+  size: number;
+  queries: number;
+  k: number;
+  dim: number;
+  seed: number;
+}
+
+const parseOptions = (): BenchmarkOptions => {
+  const args = Object.fromEntries(
+    process.argv.slice(2)
+      .filter(arg => arg.startsWith('--'))
+      .map(arg => arg.slice(2).split('='))
+  );
+
+  return {
+    backends: (args.backends || 'memory').split(','),
+    size: Number(args.size) || 10_000,
+    queries: Number(args.queries) || 200,
+    k: Number(args.k) || 10,
+    dim: Number(args.dim) || 1536,
+    seed: Number(args.seed) || 42,
+  };
+};
+
+const createStore = (backend: string): VectorStore => {
+  switch (backend) {
+    case 'memory':
+      return new MemoryVectorStore();
+    case 'weaviate':
+      return new WeaviateVectorStore(process.env.WEAVIATE_BENCHMARK_CLASS || 'TrendBenchmark');
+    case 'pinecone':
+      if (!process.env.PINECONE_BENCHMARK_INDEX) {
+        throw new Error('Set PINECONE_BENCHMARK_INDEX to a scratch index before benchmarking Pinecone');
+      }
+      return new PineconeVectorStore(process.env.PINECONE_BENCHMARK_INDEX);
+    default:
+      throw new Error(`Unknown vector store backend: ${backend}`);
+  }
+};
+
+// mulberry32; a seeded generator keeps runs comparable across backends and days
+const seededRandom = (seed: number) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), seed | 1);
+  t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const gaussian = (random: () => number) => {
+  const u = random() || Number.EPSILON;
+  return Math.sqrt(-2 * Math.log(u)) * Math.cos(2 * Math.PI * random());
+};
+
+const unit = (values: number[]): number[] => {
+  const norm = Math.sqrt(values.reduce((sum, v) => sum + v * v, 0)) || 1;
+  return values.map(v => v / norm);
+};
+
+// Trend embeddings cluster by style, so the dataset is drawn around a set of
+// centroids rather than uniformly; uniform data makes every index look good.
+const buildDataset = (options: BenchmarkOptions) => {
+  const random = seededRandom(options.seed);
+  const centroids = Array.from({ length: Math.max(1, Math.round(options.size / 50)) }, () =>
+    Array.from({ length: options.dim }, () => gaussian(random))
+  );
+
+  const records: VectorRecord[] = Array.from({ length: options.size }, (_, i) => {
+    const centroid = centroids[Math.floor(random() * centroids.length)];
+    return {
+      id: `bench_${i}`,
+      values: unit(centroid.map(v => v + gaussian(random) * 0.6)),
+    };
+  });
+
+  const queries = Array.from({ length: options.queries }, () => {
+    const base = records[Math.floor(random() * records.length)].values;
+    return unit(base.map(v => v + gaussian(random) * 0.02));
+  });
+
+  return { records, queries };
+};
+
+const exactNeighbours = (records: VectorRecord[], query: number[], k: number): Set<string> => {
+  const scored = records.map(record => {
+    let score = 0;
+    for (let i = 0; i < query.length; i++) score += query[i] * record.values[i];
+    return { id: record.id, score };
+  });
+  scored.sort((a, b) => b.score - a.score);
+  return new Set(scored.slice(0, k).map(match => match.id));
+};
+
+const percentile = (sorted: number[], p: number): number => {
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+};
+
+// Hosted indexes are eventually consistent; wait until a written vector is
+// searchable before timing queries
+const waitUntilSearchable = async (store: VectorStore, record: VectorRecord, timeoutMs = 120_000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const [match] = await store.query(record.values, 1);
+    if (match?.id === record.id) return;
+    await new Promise(resolve => setTimeout(resolve, 1000));
+  }
+  throw new Error(`${store.name} did not index the benchmark vectors within ${timeoutMs / 1000}s`);
+};
+
+const benchmark = async (
+  store: VectorStore,
+  records: VectorRecord[],
+  queries: number[][],
+  truth: Set<string>[],
+  k: number
+) => {
+  const upsertStart = performance.now();
+  await store.upsert(records);
+  const upsertMs = performance.now() - upsertStart;
+
+  try {
+    await waitUntilSearchable(store, records[records.length - 1]);
+
+    // Warm connections and caches so the first query does not skew p99
+    for (const query of queries.slice(0, 5)) await store.query(query, k);
+
+    const latencies: number[] = [];
+    let recall = 0;
+    for (let i = 0; i < queries.length; i++) {
+      const start = performance.now();
+      const matches = await store.query(queries[i], k);
+      latencies.push(performance.now() - start);
+      recall += matches.filter(match => truth[i].has(match.id)).length / k;
+    }
+    latencies.sort((a, b) => a - b);
+
+    return {
+      backend: store.name,
+      [`recall@${k}`]: Number((recall / queries.length).toFixed(4)),
+      'p50 ms': Number(percentile(latencies, 50).toFixed(2)),
+      'p95 ms': Number(percentile(latencies, 95).toFixed(2)),
+      'p99 ms': Number(percentile(latencies, 99).toFixed(2)),
+      'upsert vectors/s': Math.round(records.length / (upsertMs / 1000)),
+    };
+  } finally {
+    await store.delete(records.map(record => record.id));
+  }
+};
+
+const main = async () => {
+  const options = parseOptions();
+  console.log(`Building ${options.size} vectors (dim ${options.dim}) and ${options.queries} queries...`);
+
+  const { records, queries } = buildDataset(options);
+  const truth = queries.map(query => exactNeighbours(records, query, options.k));
+
+  const results = [];
+  for (const backend of options.backends) {
+    console.log(`Benchmarking ${backend}...`);
+    try {
+      results.push(await benchmark(createStore(backend), records, queries, truth, options.k));
+    } catch (error) {
+      console.error(`Skipping ${backend}:`, error instanceof Error ? error.message : error);
+    }
+  }
+
+  console.table(results);
+};
+
+main().catch(error => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,26 @@
+// Long-lived worker that runs queued video transcodes.
+//
+//   npm run worker:transcode
+//
+// Needs REDIS_URL, the storage credentials of UPLOAD_BACKEND and an ffmpeg
+// build (FFMPEG_PATH, FFPROBE_PATH). Run as many as there are machines to
+// encode on; each runs FFMPEG_CONCURRENCY encodes at once.
+import { videoTranscodeService } from '@/services/video-transcoder';
+
+const worker = videoTranscodeService.startWorker();
+
+worker.on('failed', (job, error) => {
+  console.error(`Transcode ${job?.id} failed:`, error);
+});
+
+const shutdown = async () => {
+  // Waits for running encodes; a worker killed mid-encode leaves its job
+  // stalled, and another worker picks it up again
+  await worker.close();
+  process.exit(0);
+};
+
+process.on('SIGINT', shutdown);
+process.on('SIGTERM', shutdown);
+
+console.log('Transcode worker started');
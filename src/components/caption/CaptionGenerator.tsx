@@ -0,0 +1,85 @@
+'use client';
+
+import React from 'react';
+import { Hash, Loader2, RefreshCw, Sparkles } from 'lucide-react';
+import { Button } from '@/components/ui/button';
+import { Card } from '@/components/ui/card';
+import { useCaptions } from '@/hooks/useCaptions';
+import { CaptionRequest, MediaAnalysis, Platform } from '@/types';
+
+interface CaptionGeneratorProps {
+  mediaAnalysis: MediaAnalysis;
+  platform: Platform;
+  tone?: CaptionRequest['tone'];
+  count?: number;
+}
+
+export function CaptionGenerator({
+  mediaAnalysis,
+  platform,
+  tone = 'casual',
+  count = 3,
+}: CaptionGeneratorProps) {
+  const { captions, generate, cancel, isGenerating, error } = useCaptions();
+
+  const handleGenerate = (regenerate = false) => {
+    generate({ mediaAnalysis, platform, tone, count }, regenerate);
+  };
+
+  return (
+    <div className="w-full space-y-4">
+      <div className="flex items-center gap-2">
+        <Button onClick={() => handleGenerate()} disabled={isGenerating}>
+          {isGenerating ? (
+            <Loader2 className="mr-2 h-4 w-4 animate-spin" />
+          ) : (
+            <Sparkles className="mr-2 h-4 w-4" />
+          )}
+          {isGenerating ? 'Generating...' : 'Generate Captions'}
+        </Button>
+        {!isGenerating && captions.length > 0 && (
+          <Button variant="outline" onClick={() => handleGenerate(true)}>
+            <RefreshCw className="mr-2 h-4 w-4" />
+            Regenerate
+          </Button>
+        )}
+        {isGenerating && (
+          <Button variant="ghost" onClick={cancel}>
+            Cancel
+          </Button>
+        )}
+      </div>
+
+      {error && (
+        <p className="text-sm text-red-600">{error.message}</p>
+      )}
+
+      <div className="space-y-2">
+        {/* Captions render as they stream in; the placeholder marks the one being written */}
+        {captions.map((caption) => (
+          <Card key={caption.id} className="p-4 space-y-2">
+            <p className="text-sm whitespace-pre-wrap">{caption.text}</p>
+            <div className="flex items-center justify-between text-xs text-gray-500">
+              <span className="flex items-center">
+                <Hash className="h-3 w-3 mr-1" />
+                {caption.hashtags.length} hashtags
+              </span>
+              <span>{caption.characterCount} characters</span>
+            </div>
+            {caption.validation && !caption.validation.valid && (
+              <p className="text-xs text-yellow-600">
+                Adjusted for {caption.platform}: {caption.validation.issues.join('; ')}
+              </p>
+            )}
+          </Card>
+        ))}
+
+        {isGenerating && captions.length < count && (
+          <Card className="p-4">
+            <div className="h-4 w-3/4 rounded bg-muted animate-pulse" />
+          </Card>
+        )}
+      </div>
+    </div>
+  );
+}
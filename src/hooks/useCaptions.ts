@@ -0,0 +1,120 @@
+import { useState, useCallback, useRef } from 'react';
+import { CaptionRequest, Platform } from '@/types';
+
+export interface Caption {
+  id: string;
+  text: string;
+  platform: Platform;
+  tone: string;
+  characterCount: number;
+  hashtags: string[];
+  createdAt: string;
+  // How platform limits changed a freshly generated caption. Captions served
+  // from the cache are returned as stored and carry no report.
+  validation?: {
+    valid: boolean;
+    issues: string[];
+    warnings: string[];
+  };
+}
+
+type CaptionStreamEvent =
+  | { type: 'caption'; caption: Caption }
+  | { type: 'done'; captions: Caption[] }
+  | { type: 'error'; message: string };
+
+interface UseCaptionsOptions {
+  onCaption?: (caption: Caption) => void;
+  onComplete?: (captions: Caption[]) => void;
+  onError?: (error: Error) => void;
+}
+
+export function useCaptions(options: UseCaptionsOptions = {}) {
+  const [captions, setCaptions] = useState<Caption[]>([]);
+  const [isGenerating, setIsGenerating] = useState(false);
+  const [error, setError] = useState<Error | null>(null);
+  const abortRef = useRef<AbortController | null>(null);
+
+  const handleEvent = useCallback((event: CaptionStreamEvent) => {
+    switch (event.type) {
+      case 'caption':
+        setCaptions(prev => [...prev, event.caption]);
+        options.onCaption?.(event.caption);
+        break;
+      case 'done':
+        setCaptions(event.captions);
+        options.onComplete?.(event.captions);
+        break;
+      case 'error':
+        throw new Error(event.message);
+    }
+  }, [options]);
+
+  const generate = useCallback(async (request: CaptionRequest, regenerate = false) => {
+    abortRef.current?.abort();
+    const controller = new AbortController();
+    abortRef.current = controller;
+
+    setCaptions([]);
+    setError(null);
+    setIsGenerating(true);
+
+    try {
+      const response = await fetch('/api/ai/generate-caption', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ ...request, stream: true, regenerate }),
+        signal: controller.signal,
+      });
+
+      if (!response.ok || !response.body) {
+        throw new Error('Caption generation failed');
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop() || '';
+
+        for (const line of lines) {
+          if (line.trim()) handleEvent(JSON.parse(line));
+        }
+      }
+
+      if (buffered.trim()) handleEvent(JSON.parse(buffered));
+    } catch (err) {
+      if (controller.signal.aborted) return;
+      const error = err instanceof Error ? err : new Error('Caption generation failed');
+      setError(error);
+      options.onError?.(error);
+    } finally {
+      if (abortRef.current === controller) {
+        abortRef.current = null;
+        setIsGenerating(false);
+      }
+    }
+  }, [handleEvent, options]);
+
+  const cancel = useCallback(() => {
+    abortRef.current?.abort();
+    abortRef.current = null;
+    setIsGenerating(false);
+  }, []);
+
+  return {
+    captions,
+    generate,
+    cancel,
+    isGenerating,
+    error,
+  };
+}
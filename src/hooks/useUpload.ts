@@ -1,73 +1,323 @@
-import { useState, useCallback } from 'react';
-import { cloudinaryService } from '@/services/storage/cloudinary';
+import { useState, useCallback, useRef, useEffect, useSyncExternalStore } from 'react';
+import { UploadError } from '@/services/storage/cloudinary';
+import { uploadDirect } from '@/services/storage/upload-client';
+import { ProgressStore } from '@/lib/progress-store';
+import { compressImage, CompressionOptions } from '@/lib/image-compression';
 
 interface UseUploadOptions {
+  // Files uploaded at the same time; the rest wait in a queue
+  concurrency?: number;
+  // Extra attempts for a file after a network or server error
+  maxRetries?: number;
+  // Resize and re-encode images in a Web Worker before uploading them
+  compress?: boolean | CompressionOptions;
+  // Keep the untouched file around (see getOriginal) when compressing
+  keepOriginals?: boolean;
   onProgress?: (progress: number) => void;
   onComplete?: (url: string) => void;
   onError?: (error: Error) => void;
 }
 
+export type UploadStatus = 'queued' | 'processing' | 'uploading' | 'completed' | 'error' | 'cancelled';
+
+// Only changes on status transitions; byte progress lives in the
+// ProgressStore so that XHR progress events never touch React state
+export interface UploadItem {
+  id: string;
+  name: string;
+  size: number;
+  type: string;
+  status: UploadStatus;
+  attempts: number;
+  url?: string;
+  // The MediaFile registered for the upload once it completes
+  mediaFileId?: string;
+  error?: string;
+}
+
+interface UploadTask {
+  file: File;
+  // What actually gets uploaded, once preprocessing has run
+  prepared?: File;
+  original?: File;
+  controller: AbortController | null;
+  resolve: (url: string | null) => void;
+  promise: Promise<string | null>;
+  onProgress?: (progress: number) => void;
+  url?: string;
+}
+
+const DEFAULT_CONCURRENCY = 3;
+const DEFAULT_MAX_RETRIES = 2;
+const RETRY_BASE_DELAY_MS = 1000;
+
+const createId = () => Math.random().toString(36).slice(2, 11);
+
+// Re-renders the caller at most once per frame with the percent complete of
+// one upload, or of all of them (byte-weighted) when no id is given
+export function useUploadProgress(store: ProgressStore, id?: string): number {
+  const subscribe = useCallback(
+    (listener: () => void) => (id ? store.subscribe(id, listener) : store.subscribeAggregate(listener)),
+    [store, id]
+  );
+  const getSnapshot = () => (id ? store.progress(id) : store.aggregate());
+  return useSyncExternalStore(subscribe, getSnapshot, () => 0);
+}
+
 export function useUpload(options: UseUploadOptions = {}) {
-  const [isUploading, setIsUploading] = useState(false);
-  const [uploadProgress, setUploadProgress] = useState(0);
+  const [uploads, setUploads] = useState<UploadItem[]>([]);
   const [error, setError] = useState<Error | null>(null);
+  const [progressStore] = useState(() => new ProgressStore());
+
+  const tasks = useRef(new Map<string, UploadTask>());
+  const queue = useRef<string[]>([]);
+  const active = useRef(0);
+  const optionsRef = useRef(options);
+  optionsRef.current = options;
+
+  const updateItem = useCallback((id: string, changes: Partial<UploadItem>) => {
+    setUploads(prev => prev.map(item => (item.id === id ? { ...item, ...changes } : item)));
+  }, []);
+
+  const pump = useCallback(() => {
+    const concurrency = optionsRef.current.concurrency || DEFAULT_CONCURRENCY;
+    while (active.current < concurrency && queue.current.length) {
+      const id = queue.current.shift()!;
+      const task = tasks.current.get(id);
+      if (task) run(id, task);
+    }
+    // run is declared below; both callbacks are created once and only
+    // reach each other at call time
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  const run = useCallback(async (id: string, task: UploadTask) => {
+    const maxRetries = optionsRef.current.maxRetries ?? DEFAULT_MAX_RETRIES;
+    const controller = new AbortController();
+    task.controller = controller;
+    active.current++;
+
+    try {
+      // Runs once per file, not per attempt, and inside the concurrency slot
+      // so only a few images are being decoded at any time
+      if (!task.prepared) {
+        const { compress, keepOriginals } = optionsRef.current;
+        if (compress) {
+          updateItem(id, { status: 'processing' });
+          const prepared = await compressImage(task.file, compress === true ? {} : compress);
+          if (controller.signal.aborted) {
+            progressStore.delete(id);
+            updateItem(id, { status: 'cancelled' });
+            task.resolve(null);
+            return;
+          }
+
+          if (prepared !== task.file) {
+            if (keepOriginals) task.original = task.file;
+            task.file = prepared;
+            updateItem(id, { name: prepared.name, size: prepared.size, type: prepared.type });
+          }
+        }
+        task.prepared = task.file;
+      }
+      const file = task.prepared;
+
+      for (let attempt = 1; ; attempt++) {
+        updateItem(id, { status: 'uploading', attempts: attempt, error: undefined });
+        progressStore.set(id, 0, file.size);
+
+        try {
+          const { url, mediaFileId } = await uploadDirect(file, (progress) => {
+            progressStore.set(id, (file.size * progress) / 100, file.size);
+            task.onProgress?.(progress);
+          }, controller.signal);
+
+          task.url = url;
+          progressStore.set(id, file.size, file.size);
+          updateItem(id, { status: 'completed', url, mediaFileId });
+          optionsRef.current.onComplete?.(url);
+          task.resolve(url);
+          return;
+        } catch (err) {
+          if (controller.signal.aborted) {
+            progressStore.delete(id);
+            updateItem(id, { status: 'cancelled' });
+            task.resolve(null);
+            return;
+          }
+
+          const retryable = !(err instanceof UploadError) || err.retryable;
+          if (!retryable || attempt > maxRetries) {
+            const uploadError = err instanceof Error ? err : new Error('Upload failed');
+            updateItem(id, { status: 'error', error: uploadError.message });
+            setError(uploadError);
+            optionsRef.current.onError?.(uploadError);
+            task.resolve(null);
+            return;
+          }
+
+          // Exponential backoff with jitter, abandoned early on cancel
+          const delay = RETRY_BASE_DELAY_MS * 2 ** (attempt - 1) * (0.5 + Math.random() / 2);
+          await new Promise<void>(resolve => {
+            const timer = setTimeout(resolve, delay);
+            controller.signal.addEventListener('abort', () => {
+              clearTimeout(timer);
+              resolve();
+            }, { once: true });
+          });
+          if (controller.signal.aborted) {
+            progressStore.delete(id);
+            updateItem(id, { status: 'cancelled' });
+            task.resolve(null);
+            return;
+          }
+        }
+      }
+    } finally {
+      task.controller = null;
+      active.current--;
+      pump();
+    }
+  }, [pump, updateItem, progressStore]);
+
+  const enqueue = useCallback((file: File, onProgress?: (progress: number) => void, id = createId()) => {
+    let resolve!: (url: string | null) => void;
+    const promise = new Promise<string | null>(done => {
+      resolve = done;
+    });
+
+    tasks.current.set(id, { file, controller: null, resolve, promise, onProgress });
+    queue.current.push(id);
+    progressStore.set(id, 0, file.size);
+    return { id, promise };
+  }, [progressStore]);
+
+  // Queues every file at once; up to `concurrency` upload in parallel, so a
+  // large file only ever occupies one slot. Resolves with one entry per file
+  // in input order; url is null if that file failed or was cancelled.
+  const uploadMultiple = useCallback(async (
+    files: File[]
+  ): Promise<{ id: string; url: string | null }[]> => {
+    setError(null);
+    const queued = files.map(file => enqueue(file));
+
+    setUploads(prev => [
+      ...prev,
+      ...queued.map(({ id }, i) => ({
+        id,
+        name: files[i].name,
+        size: files[i].size,
+        type: files[i].type,
+        status: 'queued' as const,
+        attempts: 0,
+      })),
+    ]);
+    pump();
+
+    return Promise.all(queued.map(async ({ id, promise }) => ({ id, url: await promise })));
+  }, [enqueue, pump]);
 
   const uploadFile = useCallback(async (
     file: File,
     progressCallback?: (progress: number) => void
   ): Promise<string> => {
-    setIsUploading(true);
     setError(null);
-    setUploadProgress(0);
+    const { id, promise } = enqueue(file, progressCallback);
 
-    try {
-      const url = await cloudinaryService.uploadFile(file, (progress) => {
-        setUploadProgress(progress);
-        progressCallback?.(progress);
-        options.onProgress?.(progress);
-      });
-
-      options.onComplete?.(url);
-      return url;
-    } catch (err) {
-      const error = err instanceof Error ? err : new Error('Upload failed');
-      setError(error);
-      options.onError?.(error);
-      throw error;
-    } finally {
-      setIsUploading(false);
+    setUploads(prev => [...prev, {
+      id,
+      name: file.name,
+      size: file.size,
+      type: file.type,
+      status: 'queued',
+      attempts: 0,
+    }]);
+    pump();
+
+    const url = await promise;
+    if (!url) throw new Error('Upload failed');
+    return url;
+  }, [enqueue, pump]);
+
+  const cancel = useCallback((id: string) => {
+    const task = tasks.current.get(id);
+    if (!task) return;
+
+    const position = queue.current.indexOf(id);
+    if (position !== -1) {
+      queue.current.splice(position, 1);
+      progressStore.delete(id);
+      updateItem(id, { status: 'cancelled' });
+      task.resolve(null);
+    } else {
+      task.controller?.abort();
     }
-  }, [options]);
+  }, [updateItem, progressStore]);
 
-  const uploadMultiple = useCallback(async (
-    files: File[]
-  ): Promise<string[]> => {
-    const urls: string[] = [];
-
-    for (let i = 0; i < files.length; i++) {
-      const file = files[i];
-      const url = await uploadFile(file, (progress) => {
-        const totalProgress = ((i + progress / 100) / files.length) * 100;
-        setUploadProgress(totalProgress);
-      });
-      urls.push(url);
+  // Puts a failed or cancelled file back in the queue
+  const retry = useCallback((id: string): Promise<string | null> => {
+    const task = tasks.current.get(id);
+    if (!task || task.controller || queue.current.includes(id)) {
+      return Promise.resolve(null);
     }
+    if (task.url) return Promise.resolve(task.url);
+
+    const { promise } = enqueue(task.file, task.onProgress, id);
+    // Already compressed; a retry only repeats the upload
+    Object.assign(tasks.current.get(id)!, { prepared: task.prepared, original: task.original });
+    updateItem(id, { status: 'queued', error: undefined });
+    pump();
+    return promise;
+  }, [enqueue, pump, updateItem]);
 
-    return urls;
-  }, [uploadFile]);
+  // The file as the user picked it, when it was compressed and
+  // keepOriginals is set
+  const getOriginal = useCallback((id: string): File | undefined => {
+    return tasks.current.get(id)?.original;
+  }, []);
+
+  const remove = useCallback((id: string) => {
+    cancel(id);
+    tasks.current.delete(id);
+    progressStore.delete(id);
+    setUploads(prev => prev.filter(item => item.id !== id));
+  }, [cancel, progressStore]);
+
+  const isUploading = uploads.some(item => (
+    item.status === 'queued' || item.status === 'processing' || item.status === 'uploading'
+  ));
 
+  // Reported from the store's frame-coalesced notifications rather than
+  // from every XHR progress event
+  useEffect(() => progressStore.subscribeAggregate(() => {
+    optionsRef.current.onProgress?.(progressStore.aggregate());
+  }), [progressStore]);
+
+  // Settles every pending uploadFile/uploadMultiple promise with null;
+  // queued tasks would otherwise never resolve once they are dropped
   const reset = useCallback(() => {
-    setIsUploading(false);
-    setUploadProgress(0);
+    tasks.current.forEach(task => {
+      task.controller?.abort();
+      task.resolve(null);
+    });
+    tasks.current.clear();
+    queue.current = [];
+    progressStore.clear();
+    setUploads([]);
     setError(null);
-  }, []);
+  }, [progressStore]);
 
   return {
     uploadFile,
     uploadMultiple,
+    uploads,
+    cancel,
+    retry,
+    remove,
+    getOriginal,
     isUploading,
-    uploadProgress,
+    progressStore,
     error,
     reset,
   };
-}
\ No newline at end of file
+}
@@ -0,0 +1,202 @@
+import { MediaAnalysis, Platform } from '@/types';
+import { PLATFORM_SPECS } from '@/lib/constants';
+
+// The fields that actually shape a caption. Ids, timestamps, the embedding
+// and trend matches are left out: they bloat the prompt and would make two
+// identical-looking analyses hash differently.
+export const compactAnalysis = (analysis: Partial<MediaAnalysis>) => ({
+  mood: analysis.mood,
+  sceneType: analysis.sceneType,
+  colorPalette: analysis.colorPalette || [],
+  objects: analysis.objects || [],
+  composition: analysis.composition,
+  style: analysis.style,
+  lighting: analysis.lighting,
+  emotions: analysis.emotions || [],
+});
+
+export type CompactAnalysis = ReturnType<typeof compactAnalysis>;
+
+export interface CaptionLimits {
+  maxLength: number;
+  maxHashtags: number;
+  recommendedHashtags: number;
+}
+
+// YouTube has no caption field; the description and tag limits stand in for it
+export const getCaptionLimits = (platform: Platform): CaptionLimits | null => {
+  switch (platform) {
+    case 'youtube':
+      return {
+        maxLength: PLATFORM_SPECS.youtube.maxDescriptionLength,
+        maxHashtags: PLATFORM_SPECS.youtube.recommendedTags,
+        recommendedHashtags: PLATFORM_SPECS.youtube.recommendedTags,
+      };
+    case 'instagram':
+    case 'tiktok':
+    case 'facebook':
+      return {
+        maxLength: PLATFORM_SPECS[platform].maxCaptionLength,
+        maxHashtags: PLATFORM_SPECS[platform].maxHashtags,
+        recommendedHashtags: PLATFORM_SPECS[platform].recommendedHashtags,
+      };
+    default:
+      return null;
+  }
+};
+
+const graphemes = new Intl.Segmenter(undefined, { granularity: 'grapheme' });
+
+// The longest run of whole graphemes within `maxLength` UTF-16 units, so an
+// emoji, flag or accented letter is never split into broken halves
+const sliceGraphemes = (text: string, maxLength: number): string => {
+  let end = 0;
+  for (const { index, segment } of graphemes.segment(text)) {
+    if (index + segment.length > maxLength) break;
+    end = index + segment.length;
+  }
+  return text.slice(0, end);
+};
+
+// Cuts at the last word boundary that fits rather than mid-word
+export const truncateCaption = (text: string, maxLength: number): string => {
+  if (text.length <= maxLength) return text;
+
+  const cut = sliceGraphemes(text, maxLength - 1);
+  const boundary = cut.lastIndexOf(' ');
+  return (boundary > maxLength * 0.6 ? cut.slice(0, boundary) : cut).trimEnd() + '…';
+};
+
+const HASHTAG = /#[\p{L}\p{N}_]+/gu;
+const TRAILING_HASHTAGS = /(?:\s*#[\p{L}\p{N}_]+)+\s*$/u;
+
+export interface CaptionValidationReport {
+  platform: Platform;
+  // True when the model output already met every limit unchanged
+  valid: boolean;
+  issues: string[];
+  // Advisory only; nothing was changed for these
+  warnings: string[];
+  originalLength: number;
+  removedHashtags: string[];
+  truncated: boolean;
+}
+
+export interface ConstrainedCaption {
+  text: string;
+  hashtags: string[];
+  characterCount: number;
+  validation: CaptionValidationReport;
+}
+
+interface ConstraintOptions {
+  maxLength?: number;
+  includeHashtags?: boolean;
+}
+
+const removeHashtags = (text: string, remove: (tag: string, index: number) => boolean): string => {
+  let index = 0;
+  return text
+    .replace(HASHTAG, tag => (remove(tag, index++) ? '' : tag))
+    .replace(/[ \t]{2,}/g, ' ')
+    .replace(/[ \t]+$/gm, '');
+};
+
+// Brings a generated caption within its platform's limits without another
+// model call: tidies whitespace, de-duplicates and caps hashtags, then trims
+// the body (never the trailing hashtag block) to the maximum length.
+export const enforceCaptionConstraints = (
+  caption: string,
+  platform: Platform,
+  options: ConstraintOptions = {}
+): ConstrainedCaption => {
+  const limits = getCaptionLimits(platform);
+  const maxLength = Math.min(options.maxLength ?? Infinity, limits?.maxLength ?? Infinity);
+  const issues: string[] = [];
+  const warnings: string[] = [];
+  const removedHashtags: string[] = [];
+  let truncated = false;
+
+  let text = caption.trim().replace(/\r\n/g, '\n').replace(/\n{3,}/g, '\n\n');
+
+  if (options.includeHashtags === false) {
+    text = removeHashtags(text, tag => {
+      removedHashtags.push(tag);
+      return true;
+    }).trim();
+    if (removedHashtags.length) issues.push('Removed hashtags because includeHashtags is false');
+  }
+
+  const seen = new Set<string>();
+  const duplicates: string[] = [];
+  text = removeHashtags(text, tag => {
+    const key = tag.toLowerCase();
+    if (seen.has(key)) {
+      duplicates.push(tag);
+      return true;
+    }
+    seen.add(key);
+    return false;
+  }).trim();
+  if (duplicates.length) {
+    issues.push(`Removed ${duplicates.length} duplicate hashtag(s)`);
+    removedHashtags.push(...duplicates);
+  }
+
+  if (limits) {
+    const count = text.match(HASHTAG)?.length || 0;
+    if (count > limits.maxHashtags) {
+      text = removeHashtags(text, (tag, index) => {
+        if (index < limits.maxHashtags) return false;
+        removedHashtags.push(tag);
+        return true;
+      }).trim();
+      issues.push(`Hashtags capped at ${limits.maxHashtags} (had ${count})`);
+    } else if (count > limits.recommendedHashtags) {
+      warnings.push(`Uses ${count} hashtags; ${limits.recommendedHashtags} recommended for ${platform}`);
+    }
+  }
+
+  if (text.length > maxLength) {
+    issues.push(`Caption exceeded ${maxLength} characters (had ${text.length})`);
+
+    const tail = text.match(TRAILING_HASHTAGS)?.[0] || '';
+    const tags = tail.match(HASHTAG) || [];
+    let body = text.slice(0, text.length - tail.length).trimEnd();
+
+    // Give up surplus hashtags before cutting into the body
+    const keep = limits?.recommendedHashtags ?? tags.length;
+    while (tags.length > keep && body.length + tags.join(' ').length + 2 > maxLength) {
+      removedHashtags.push(tags.pop()!);
+    }
+
+    const tagBlock = tags.length ? `\n\n${tags.join(' ')}` : '';
+    const room = maxLength - tagBlock.length;
+    if (room >= Math.min(40, maxLength)) {
+      if (body.length > room) {
+        body = truncateCaption(body, room);
+        truncated = true;
+      }
+      text = body + tagBlock;
+    } else {
+      removedHashtags.push(...tags);
+      text = truncateCaption(body, maxLength);
+      truncated = true;
+    }
+  }
+
+  return {
+    text,
+    hashtags: text.match(HASHTAG) || [],
+    characterCount: text.length,
+    validation: {
+      platform,
+      valid: issues.length === 0,
+      issues,
+      warnings,
+      originalLength: caption.length,
+      removedHashtags,
+      truncated,
+    },
+  };
+};
@@ -0,0 +1,48 @@
+import { normalizeHexColor } from '@/lib/validation';
+
+// sRGB (D65) to CIE Lab. Euclidean distance in Lab tracks perceived colour
+// difference far better than distance in RGB.
+const toLinear = (channel: number): number => {
+  const c = channel / 255;
+  return c <= 0.04045 ? c / 12.92 : Math.pow((c + 0.055) / 1.055, 2.4);
+};
+
+const labCurve = (t: number): number => (t > 216 / 24389 ? Math.cbrt(t) : (24389 / 27 * t + 16) / 116);
+
+export const rgbToLab = (r: number, g: number, b: number): [number, number, number] => {
+  const lr = toLinear(r);
+  const lg = toLinear(g);
+  const lb = toLinear(b);
+
+  const x = labCurve((0.4124 * lr + 0.3576 * lg + 0.1805 * lb) / 0.95047);
+  const y = labCurve(0.2126 * lr + 0.7152 * lg + 0.0722 * lb);
+  const z = labCurve((0.0193 * lr + 0.1192 * lg + 0.9505 * lb) / 1.08883);
+
+  return [116 * y - 16, 500 * (x - y), 200 * (y - z)];
+};
+
+export const hexToLab = (hex: string): [number, number, number] | null => {
+  const normalized = normalizeHexColor(hex);
+  if (!normalized) return null;
+
+  const value = parseInt(normalized.slice(1), 16);
+  return rgbToLab((value >> 16) & 0xff, (value >> 8) & 0xff, value & 0xff);
+};
+
+// Packs a palette into a flat [L, a, b, L, a, b, ...] array, dropping
+// anything that is not a valid hex colour
+export const paletteToLab = (colors: string[]): Float64Array => {
+  const labs = colors.map(hexToLab).filter((lab): lab is [number, number, number] => lab !== null);
+  const packed = new Float64Array(labs.length * 3);
+  labs.forEach((lab, i) => packed.set(lab, i * 3));
+  return packed;
+};
+
+// CIE76 colour difference between the i-th colour of one packed palette and
+// the j-th colour of another
+export const deltaE = (a: Float64Array, i: number, b: Float64Array, j: number): number => {
+  const dl = a[i * 3] - b[j * 3];
+  const da = a[i * 3 + 1] - b[j * 3 + 1];
+  const db = a[i * 3 + 2] - b[j * 3 + 2];
+  return Math.sqrt(dl * dl + da * da + db * db);
+};
@@ -65,4 +65,41 @@ export const FILE_UPLOAD_LIMITS = {
   maxFileSize: 100 * 1024 * 1024, // 100MB
   maxFiles: 10,
   allowedTypes: ['image/jpeg', 'image/png', 'image/webp', 'video/mp4', 'video/mov']
-} as const;
\ No newline at end of file
+} as const;
+
+// Analysis tiers each plan may use; the first one is the plan's default.
+// Paid plans keep deep, the behaviour from before tiers existed, and can
+// ask for fast per request; the free plan only gets fast.
+export const PLAN_ANALYSIS_TIERS = {
+  free: ['fast'],
+  pro: ['deep', 'fast'],
+  business: ['deep', 'fast'],
+} as const;
+
+export const UPLOAD_COMPRESSION = {
+  // Platforms display at most 1080px on the short edge; the long edge
+  // follows from each platform's aspect ratios
+  targetShortEdge: 1080,
+  // Bounding box used when no platform is known yet
+  fallbackMaxDimension: 2048,
+  quality: 0.82,
+  // Smaller images are uploaded as they are
+  minFileSize: 500 * 1024,
+} as const;
+
+// Video renditions, shared between platforms that want the same frame: a
+// single 9:16 encode serves TikTok, Reels and Shorts. Output is always MP4
+// (H.264/AAC), the one container every platform in PLATFORM_SPECS accepts.
+export const VIDEO_RENDITIONS = {
+  vertical: { aspectRatio: '9:16', width: 1080, height: 1920 },
+  portrait: { aspectRatio: '4:5', width: 1080, height: 1350 },
+  square: { aspectRatio: '1:1', width: 1080, height: 1080 },
+  landscape: { aspectRatio: '16:9', width: 1920, height: 1080 },
+} as const;
+
+export const PLATFORM_VIDEO_RENDITIONS = {
+  instagram: ['vertical', 'portrait'],
+  tiktok: ['vertical'],
+  youtube: ['landscape', 'vertical'],
+  facebook: ['landscape', 'square'],
+} as const;
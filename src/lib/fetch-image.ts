@@ -0,0 +1,35 @@
+import { FILE_UPLOAD_LIMITS } from '@/lib/constants';
+
+interface FetchImageOptions {
+  timeoutMs: number;
+  redirect?: RequestRedirect;
+}
+
+// Downloads an image into memory, never holding more than the upload limit.
+// The body is read as a stream that is abandoned once it passes the limit;
+// content-length may be missing or wrong.
+export const fetchImage = async (url: string, options: FetchImageOptions): Promise<Buffer> => {
+  const response = await fetch(url, { signal: AbortSignal.timeout(options.timeoutMs), redirect: options.redirect });
+  if (!response.ok || !response.body) throw new Error(`Image fetch failed: ${response.status}`);
+
+  const length = Number(response.headers.get('content-length'));
+  if (length > FILE_UPLOAD_LIMITS.maxFileSize) throw new Error('Image is too large');
+
+  const reader = response.body.getReader();
+  const chunks: Uint8Array[] = [];
+  let received = 0;
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    received += value.byteLength;
+    if (received > FILE_UPLOAD_LIMITS.maxFileSize) {
+      await reader.cancel();
+      throw new Error('Image is too large');
+    }
+    chunks.push(value);
+  }
+
+  return Buffer.concat(chunks);
+};
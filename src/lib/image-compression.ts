@@ -0,0 +1,137 @@
+import { PLATFORM_SPECS, UPLOAD_COMPRESSION } from '@/lib/constants';
+import { Platform } from '@/types';
+
+export interface CompressionOptions {
+  // Sizes the output for this platform's aspect ratios
+  platform?: Platform;
+  type?: 'image/webp' | 'image/jpeg';
+  quality?: number;
+}
+
+export interface CompressionJob {
+  id: number;
+  file: Blob;
+  maxWidth: number;
+  maxHeight: number;
+  type: string;
+  quality: number;
+}
+
+interface CompressionOutput {
+  blob: Blob;
+  width: number;
+  height: number;
+}
+
+type CompressionReply = { id: number } & ({ result: CompressionOutput } | { error: string });
+
+// Animated and vector formats would lose what makes them worth uploading
+const SKIPPED_TYPES = ['image/gif', 'image/svg+xml'];
+
+const EXTENSIONS: Record<string, string> = {
+  'image/webp': 'webp',
+  'image/jpeg': 'jpg',
+};
+
+// Largest box any of the platform's aspect ratios needs at the target short
+// edge, e.g. Instagram (1:1, 4:5, 9:16) gives 1080x1920
+export const platformMaxDimensions = (platform?: Platform): { width: number; height: number } => {
+  if (!platform) {
+    return { width: UPLOAD_COMPRESSION.fallbackMaxDimension, height: UPLOAD_COMPRESSION.fallbackMaxDimension };
+  }
+
+  let width = 0;
+  let height = 0;
+  PLATFORM_SPECS[platform].aspectRatios.forEach(ratio => {
+    const [w, h] = ratio.split(':').map(Number);
+    const scale = UPLOAD_COMPRESSION.targetShortEdge / Math.min(w, h);
+    width = Math.max(width, Math.round(w * scale));
+    height = Math.max(height, Math.round(h * scale));
+  });
+  return { width, height };
+};
+
+export const canCompress = (file: File): boolean => {
+  return typeof Worker !== 'undefined'
+    && typeof OffscreenCanvas !== 'undefined'
+    && typeof createImageBitmap !== 'undefined'
+    && file.type.startsWith('image/')
+    && !SKIPPED_TYPES.includes(file.type)
+    && file.size >= UPLOAD_COMPRESSION.minFileSize;
+};
+
+// One long-lived worker shared by every upload; jobs are matched to replies
+// by id, so several can be in flight at once
+class ImageCompressor {
+  private worker: Worker | null = null;
+  private nextId = 0;
+  private pending = new Map<number, { resolve: (output: CompressionOutput) => void; reject: (error: Error) => void }>();
+
+  run(job: Omit<CompressionJob, 'id'>): Promise<CompressionOutput> {
+    const worker = this.getWorker();
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { resolve, reject });
+      worker.postMessage({ ...job, id });
+    });
+  }
+
+  private getWorker(): Worker {
+    if (this.worker) return this.worker;
+
+    const worker = new Worker(new URL('./image-compression.worker.ts', import.meta.url));
+    worker.onmessage = (event: MessageEvent<CompressionReply>) => {
+      const reply = event.data;
+      const job = this.pending.get(reply.id);
+      this.pending.delete(reply.id);
+
+      if ('error' in reply) job?.reject(new Error(reply.error));
+      else job?.resolve(reply.result);
+    };
+    // A crashed worker fails everything in flight; the next job starts a new one
+    worker.onerror = () => {
+      this.pending.forEach(job => job.reject(new Error('Image compression worker failed')));
+      this.pending.clear();
+      worker.terminate();
+      this.worker = null;
+    };
+
+    this.worker = worker;
+    return worker;
+  }
+}
+
+const compressor = new ImageCompressor();
+
+// Scales a photo down to what the target platform can display and
+// re-encodes it, off the main thread. Returns the original file when it
+// cannot be compressed or the result would not be smaller.
+export const compressImage = async (file: File, options: CompressionOptions = {}): Promise<File> => {
+  if (!canCompress(file)) return file;
+
+  const type = options.type || 'image/webp';
+  const { width, height } = platformMaxDimensions(options.platform);
+
+  try {
+    const output = await compressor.run({
+      file,
+      maxWidth: width,
+      maxHeight: height,
+      type,
+      quality: options.quality ?? UPLOAD_COMPRESSION.quality,
+    });
+    if (output.blob.size >= file.size) return file;
+
+    const name = file.name.replace(/\.[^.]+$/, '') || file.name;
+    return new File([output.blob], `${name}.${EXTENSIONS[output.blob.type] || 'jpg'}`, {
+      type: output.blob.type,
+      lastModified: file.lastModified,
+    });
+  } catch (error) {
+    // Compression is an optimisation; an image the browser cannot decode
+    // still uploads as it is
+    console.error('Error compressing image:', error);
+    return file;
+  }
+};
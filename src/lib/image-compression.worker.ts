@@ -0,0 +1,31 @@
+import type { CompressionJob } from '@/lib/image-compression';
+
+// Browser Web Worker: decodes, scales and re-encodes off the main thread.
+// Replies { result } or { error }, tagged with the job id.
+const ctx = self as unknown as Worker;
+
+ctx.onmessage = async (event: MessageEvent<CompressionJob>) => {
+  const { id, file, maxWidth, maxHeight, type, quality } = event.data;
+
+  try {
+    // from-image applies EXIF orientation, which phone photos depend on
+    const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    const scale = Math.min(1, maxWidth / bitmap.width, maxHeight / bitmap.height);
+    const width = Math.max(1, Math.round(bitmap.width * scale));
+    const height = Math.max(1, Math.round(bitmap.height * scale));
+
+    const canvas = new OffscreenCanvas(width, height);
+    const context = canvas.getContext('2d')!;
+    context.imageSmoothingQuality = 'high';
+    context.drawImage(bitmap, 0, 0, width, height);
+    bitmap.close();
+
+    let blob = await canvas.convertToBlob({ type, quality });
+    // Browsers without a WebP encoder silently fall back to PNG
+    if (blob.type !== type) blob = await canvas.convertToBlob({ type: 'image/jpeg', quality });
+
+    ctx.postMessage({ id, result: { blob, width, height } });
+  } catch (error) {
+    ctx.postMessage({ id, error: error instanceof Error ? error.message : String(error) });
+  }
+};
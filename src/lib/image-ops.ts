@@ -0,0 +1,208 @@
+import { createHash } from 'crypto';
+import { ImageOperation } from '@/lib/validation';
+
+type Matrix = number[];
+
+interface Rect {
+  left: number;
+  top: number;
+  width: number;
+  height: number;
+}
+
+// Colour look, applied as matrix, saturation, hue, brightness, contrast
+interface ColorLook {
+  matrix?: Matrix;
+  brightness?: number;
+  saturation?: number;
+  hue?: number;
+  contrast?: number;
+}
+
+type Vector = [number, number, number];
+
+// Any operation list, reduced to what sharp can do in one pass: mirror,
+// quarter-turn rotation, one crop, one resize, then one colour transform.
+// Fractions in `crop` are of the rotated image, so a plan renders the same
+// at preview and full resolution.
+export interface RenderPlan {
+  mirror: boolean;
+  rotation: 0 | 90 | 180 | 270;
+  crop: Rect | null;
+  resize: { width?: number; height?: number } | null;
+  // Every colour operation is affine in RGB, so any sequence of them is one
+  // affine transform: output = matrix · rgb + offset
+  matrix: Matrix | null;
+  offset: Vector | null;
+}
+
+const IDENTITY: Matrix = [1, 0, 0, 0, 1, 0, 0, 0, 1];
+const LUMA: Matrix = [0.2126, 0.7152, 0.0722, 0.2126, 0.7152, 0.0722, 0.2126, 0.7152, 0.0722];
+const SEPIA: Matrix = [0.393, 0.769, 0.189, 0.349, 0.686, 0.168, 0.272, 0.534, 0.131];
+
+// Looks offered by the editor's filter panel
+export const FILTER_PRESETS: Record<string, ColorLook> = {
+  vivid: { saturation: 1.35, contrast: 1.1 },
+  mono: { matrix: LUMA },
+  noir: { matrix: LUMA, contrast: 1.35, brightness: 0.95 },
+  sepia: { matrix: SEPIA },
+  vintage: { matrix: SEPIA.map((v, i) => (v + IDENTITY[i]) / 2), contrast: 0.9, saturation: 0.85 },
+  warm: { matrix: [1.08, 0, 0, 0, 1.01, 0, 0, 0, 0.9] },
+  cool: { matrix: [0.92, 0, 0, 0, 1, 0, 0, 0, 1.08] },
+  fade: { brightness: 1.05, saturation: 0.8, contrast: 0.85 },
+};
+
+// `second` applied after `first`
+const multiply = (second: Matrix, first: Matrix): Matrix => {
+  const result = new Array(9).fill(0);
+  for (let row = 0; row < 3; row++) {
+    for (let col = 0; col < 3; col++) {
+      for (let k = 0; k < 3; k++) result[row * 3 + col] += second[row * 3 + k] * first[k * 3 + col];
+    }
+  }
+  return result;
+};
+
+const transform = (matrix: Matrix, vector: Vector): Vector => [0, 1, 2].map(row =>
+  matrix[row * 3] * vector[0] + matrix[row * 3 + 1] * vector[1] + matrix[row * 3 + 2] * vector[2]
+) as Vector;
+
+// Saturation and hue as RGB matrices around Rec. 709 luma (the SVG
+// feColorMatrix definitions), so they compose exactly with everything else
+const saturationMatrix = (amount: number): Matrix => LUMA.map((v, i) => v * (1 - amount) + IDENTITY[i] * amount);
+
+const hueMatrix = (degrees: number): Matrix => {
+  const cos = Math.cos((degrees * Math.PI) / 180);
+  const sin = Math.sin((degrees * Math.PI) / 180);
+  return [
+    0.213 + cos * 0.787 - sin * 0.213, 0.715 - cos * 0.715 - sin * 0.715, 0.072 - cos * 0.072 + sin * 0.928,
+    0.213 - cos * 0.213 + sin * 0.143, 0.715 + cos * 0.285 + sin * 0.140, 0.072 - cos * 0.072 - sin * 0.283,
+    0.213 - cos * 0.213 - sin * 0.787, 0.715 - cos * 0.715 + sin * 0.715, 0.072 + cos * 0.928 + sin * 0.072,
+  ];
+};
+
+const lerp = (from: number, to: number, t: number) => from + (to - from) * t;
+
+// Re-expresses a crop of the current frame after that frame is rotated a
+// quarter turn clockwise
+const rotateRect = ({ left, top, width, height }: Rect): Rect => ({
+  left: 1 - top - height,
+  top: left,
+  width: height,
+  height: width,
+});
+
+export const fuseOperations = (operations: ImageOperation[]): RenderPlan => {
+  const plan: RenderPlan = {
+    mirror: false,
+    rotation: 0,
+    crop: null,
+    resize: null,
+    matrix: null,
+    offset: null,
+  };
+
+  // Appends `matrix · rgb + offset` after the colour transform so far
+  const applyAffine = (matrix: Matrix, offset: Vector = [0, 0, 0]) => {
+    const previous = plan.offset ? transform(matrix, plan.offset) : [0, 0, 0];
+    plan.matrix = multiply(matrix, plan.matrix || IDENTITY);
+    plan.offset = [previous[0] + offset[0], previous[1] + offset[1], previous[2] + offset[2]];
+  };
+
+  const applyLook = (look: ColorLook, intensity = 1) => {
+    if (look.matrix) applyAffine(look.matrix.map((v, i) => lerp(IDENTITY[i], v, intensity)));
+
+    const saturation = lerp(1, look.saturation ?? 1, intensity);
+    if (saturation !== 1) applyAffine(saturationMatrix(saturation));
+
+    const hue = (look.hue ?? 0) * intensity;
+    if (hue) applyAffine(hueMatrix(hue));
+
+    const brightness = lerp(1, look.brightness ?? 1, intensity);
+    if (brightness !== 1) applyAffine(IDENTITY.map(v => v * brightness));
+
+    // Contrast pivots around mid-grey
+    const contrast = lerp(1, look.contrast ?? 1, intensity);
+    if (contrast !== 1) {
+      const pivot = 128 * (1 - contrast);
+      applyAffine(IDENTITY.map(v => v * contrast), [pivot, pivot, pivot]);
+    }
+  };
+
+  operations.forEach(operation => {
+    switch (operation.type) {
+      case 'crop': {
+        const current = plan.crop || { left: 0, top: 0, width: 1, height: 1 };
+        plan.crop = {
+          left: current.left + operation.left * current.width,
+          top: current.top + operation.top * current.height,
+          width: operation.width * current.width,
+          height: operation.height * current.height,
+        };
+        // Cropping a resized image is cropping first, then resizing less
+        if (plan.resize) {
+          plan.resize = {
+            width: plan.resize.width && Math.max(1, Math.round(plan.resize.width * operation.width)),
+            height: plan.resize.height && Math.max(1, Math.round(plan.resize.height * operation.height)),
+          };
+        }
+        break;
+      }
+      case 'rotate': {
+        const turns = (((operation.angle / 90) % 4) + 4) % 4;
+        for (let i = 0; i < turns; i++) {
+          if (plan.crop) plan.crop = rotateRect(plan.crop);
+          if (plan.resize) plan.resize = { width: plan.resize.height, height: plan.resize.width };
+        }
+        plan.rotation = (((plan.rotation + turns * 90) % 360) as RenderPlan['rotation']);
+        break;
+      }
+      case 'flip': {
+        // sharp mirrors before rotating, so a mirror of the rotated output
+        // becomes a mirror of the source with the rotation reversed; a
+        // vertical flip is a horizontal one plus a half turn
+        const halfTurn = operation.axis === 'vertical' ? 180 : 0;
+        plan.mirror = !plan.mirror;
+        plan.rotation = (((halfTurn - plan.rotation + 360) % 360) as RenderPlan['rotation']);
+        if (plan.crop) {
+          plan.crop = operation.axis === 'horizontal'
+            ? { ...plan.crop, left: 1 - plan.crop.left - plan.crop.width }
+            : { ...plan.crop, top: 1 - plan.crop.top - plan.crop.height };
+        }
+        break;
+      }
+      case 'resize':
+        plan.resize = { width: operation.width, height: operation.height };
+        break;
+      case 'adjust': {
+        const warmth = operation.warmth ?? 0;
+        applyLook({
+          brightness: 1 + (operation.brightness ?? 0),
+          saturation: 1 + (operation.saturation ?? 0),
+          contrast: 1 + (operation.contrast ?? 0),
+          hue: operation.hue ?? 0,
+          matrix: warmth ? [1 + 0.1 * warmth, 0, 0, 0, 1, 0, 0, 0, 1 - 0.1 * warmth] : undefined,
+        });
+        break;
+      }
+      case 'filter': {
+        const preset = FILTER_PRESETS[operation.name];
+        if (!preset) throw new Error(`Unknown filter: ${operation.name}`);
+        applyLook(preset, operation.intensity);
+        break;
+      }
+    }
+  });
+
+  return plan;
+};
+
+// Content address of a rendering: the source bytes, the fused plan and the
+// output settings. Values are rounded so slider noise below what is visible
+// still hits the cache.
+export const renderKey = (sourceHash: string, plan: RenderPlan, output: Record<string, unknown>): string => {
+  const normalized = JSON.stringify({ plan, output }, (_, value) =>
+    typeof value === 'number' ? Math.round(value * 10_000) / 10_000 : value
+  );
+  return createHash('sha256').update(sourceHash).update(normalized).digest('hex');
+};
@@ -0,0 +1,242 @@
+import { deltaE, rgbToLab } from '@/lib/color';
+
+export interface ImageStatsInput {
+  // Packed RGB, 3 bytes per pixel
+  pixels: Uint8Array;
+  paletteSize?: number;
+}
+
+export interface ImageStats {
+  colorPalette: string[];
+  // Share of the image covered by each palette colour, same order
+  paletteWeights: number[];
+  // Mean CIE lightness, 0 (black) to 1 (white)
+  brightness: number;
+  // Standard deviation of lightness, scaled so 1 is a hard black/white split
+  contrast: number;
+  saturation: number;
+  // 16 equal-width lightness bins, as fractions of the image
+  luminanceHistogram: number[];
+  // Degrees, or null when the image is close to greyscale
+  dominantHue: number | null;
+  lighting: string;
+}
+
+const HISTOGRAM_BINS = 16;
+const HUE_BINS = 36;
+const MAX_ITERATIONS = 12;
+// Stop once no centroid moves more than this in Lab units
+const CONVERGENCE_DELTA = 0.5;
+// Clusters smaller than this share of the image are noise, not palette
+const MIN_CLUSTER_SHARE = 0.02;
+// Clusters closer than this (CIE76) read as one colour and are merged
+const MERGE_DISTANCE = 10;
+
+// mulberry32; a fixed seed makes the palette for a given image deterministic
+const seededRandom = (seed: number) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), seed | 1);
+  t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const toHex = (r: number, g: number, b: number): string => {
+  const channel = (value: number) => Math.round(value).toString(16).padStart(2, '0');
+  return `#${channel(r)}${channel(g)}${channel(b)}`.toUpperCase();
+};
+
+const distanceSquared = (labs: Float64Array, i: number, centroids: Float64Array, c: number): number => {
+  const dl = labs[i * 3] - centroids[c * 3];
+  const da = labs[i * 3 + 1] - centroids[c * 3 + 1];
+  const db = labs[i * 3 + 2] - centroids[c * 3 + 2];
+  return dl * dl + da * da + db * db;
+};
+
+// k-means++ seeding followed by Lloyd iterations, all in Lab space so that
+// clusters are perceptually even
+const kMeans = (labs: Float64Array, count: number, k: number): Uint8Array => {
+  const random = seededRandom(count);
+  const centroids = new Float64Array(k * 3);
+  const nearest = new Float64Array(count).fill(Infinity);
+  const assignments = new Uint8Array(count);
+
+  centroids.set(labs.subarray(0, 3), 0);
+  for (let c = 1; c < k; c++) {
+    let total = 0;
+    for (let i = 0; i < count; i++) {
+      nearest[i] = Math.min(nearest[i], distanceSquared(labs, i, centroids, c - 1));
+      total += nearest[i];
+    }
+
+    let target = random() * total;
+    let chosen = count - 1;
+    for (let i = 0; i < count; i++) {
+      target -= nearest[i];
+      if (target <= 0) {
+        chosen = i;
+        break;
+      }
+    }
+    centroids.set(labs.subarray(chosen * 3, chosen * 3 + 3), c * 3);
+  }
+
+  const sums = new Float64Array(k * 3);
+  const sizes = new Uint32Array(k);
+
+  for (let iteration = 0; iteration < MAX_ITERATIONS; iteration++) {
+    sums.fill(0);
+    sizes.fill(0);
+
+    for (let i = 0; i < count; i++) {
+      let best = 0;
+      let bestDistance = Infinity;
+      for (let c = 0; c < k; c++) {
+        const d = distanceSquared(labs, i, centroids, c);
+        if (d < bestDistance) {
+          bestDistance = d;
+          best = c;
+        }
+      }
+      assignments[i] = best;
+      sizes[best]++;
+      sums[best * 3] += labs[i * 3];
+      sums[best * 3 + 1] += labs[i * 3 + 1];
+      sums[best * 3 + 2] += labs[i * 3 + 2];
+    }
+
+    let moved = 0;
+    for (let c = 0; c < k; c++) {
+      if (!sizes[c]) continue;
+      for (let axis = 0; axis < 3; axis++) {
+        const next = sums[c * 3 + axis] / sizes[c];
+        moved = Math.max(moved, Math.abs(next - centroids[c * 3 + axis]));
+        centroids[c * 3 + axis] = next;
+      }
+    }
+    if (moved < CONVERGENCE_DELTA) break;
+  }
+
+  return assignments;
+};
+
+const describeLighting = (brightness: number, contrast: number, warmth: number): string => {
+  let quality: string;
+  if (brightness < 0.3) quality = contrast > 0.45 ? 'dramatic low-key' : 'dim low-light';
+  else if (brightness > 0.7) quality = contrast > 0.45 ? 'bright high-contrast' : 'bright high-key';
+  else if (contrast > 0.5) quality = 'high-contrast';
+  else if (contrast < 0.2) quality = 'soft diffused';
+  else quality = 'balanced natural';
+
+  const tone = warmth > 0.15 ? 'warm ' : warmth < -0.15 ? 'cool ' : '';
+  return `${tone}${quality} light`;
+};
+
+// Palette, tonal statistics and a lighting label from a downscaled RGB
+// buffer. Pure and synchronous; run it in a worker for anything large.
+export const computeImageStats = ({ pixels, paletteSize = 5 }: ImageStatsInput): ImageStats => {
+  const count = Math.floor(pixels.length / 3);
+  if (count === 0) {
+    return {
+      colorPalette: [],
+      paletteWeights: [],
+      brightness: 0,
+      contrast: 0,
+      saturation: 0,
+      luminanceHistogram: new Array(HISTOGRAM_BINS).fill(0),
+      dominantHue: null,
+      lighting: 'unknown',
+    };
+  }
+
+  const labs = new Float64Array(count * 3);
+  const histogram = new Float64Array(HISTOGRAM_BINS);
+  const hues = new Float64Array(HUE_BINS);
+  let lightnessSum = 0;
+  let lightnessSquares = 0;
+  let saturationSum = 0;
+  let warmth = 0;
+
+  for (let i = 0; i < count; i++) {
+    const r = pixels[i * 3];
+    const g = pixels[i * 3 + 1];
+    const b = pixels[i * 3 + 2];
+    const lab = rgbToLab(r, g, b);
+    labs.set(lab, i * 3);
+
+    const lightness = lab[0] / 100;
+    lightnessSum += lightness;
+    lightnessSquares += lightness * lightness;
+    histogram[Math.min(HISTOGRAM_BINS - 1, Math.floor(lightness * HISTOGRAM_BINS))]++;
+    // Lab b* is the yellow–blue axis: positive reads warm, negative cool
+    warmth += lab[2];
+
+    const max = Math.max(r, g, b);
+    const min = Math.min(r, g, b);
+    const saturation = max === 0 ? 0 : (max - min) / max;
+    saturationSum += saturation;
+
+    // Near-grey and near-black pixels have no meaningful hue
+    if (saturation > 0.2 && max > 40) {
+      const delta = max - min;
+      let hue = max === r ? ((g - b) / delta) % 6 : max === g ? (b - r) / delta + 2 : (r - g) / delta + 4;
+      hue = (hue * 60 + 360) % 360;
+      hues[Math.floor(hue / (360 / HUE_BINS)) % HUE_BINS] += saturation;
+    }
+  }
+
+  const k = Math.min(paletteSize, count);
+  const assignments = kMeans(labs, count, k);
+  const rgbSums = new Float64Array(k * 3);
+  const sizes = new Uint32Array(k);
+  for (let i = 0; i < count; i++) {
+    const c = assignments[i];
+    sizes[c]++;
+    rgbSums[c * 3] += pixels[i * 3];
+    rgbSums[c * 3 + 1] += pixels[i * 3 + 1];
+    rgbSums[c * 3 + 2] += pixels[i * 3 + 2];
+  }
+
+  // Average RGB of each cluster's members, largest cluster first. A cluster
+  // too close to a larger one adds its weight to it instead of its colour.
+  const palette: { hex: string; lab: Float64Array; size: number }[] = [];
+  Array.from({ length: k }, (_, c) => c)
+    .filter(c => sizes[c] / count >= MIN_CLUSTER_SHARE)
+    .sort((a, b) => sizes[b] - sizes[a])
+    .forEach(c => {
+      const rgb = [rgbSums[c * 3], rgbSums[c * 3 + 1], rgbSums[c * 3 + 2]].map(sum => sum / sizes[c]);
+      const lab = Float64Array.from(rgbToLab(rgb[0], rgb[1], rgb[2]));
+      const similar = palette.find(entry => deltaE(entry.lab, 0, lab, 0) < MERGE_DISTANCE);
+
+      if (similar) similar.size += sizes[c];
+      else palette.push({ hex: toHex(rgb[0], rgb[1], rgb[2]), lab, size: sizes[c] });
+    });
+
+  const brightness = lightnessSum / count;
+  const variance = Math.max(0, lightnessSquares / count - brightness * brightness);
+  const contrast = Math.min(1, Math.sqrt(variance) * 2);
+
+  let hueBin = -1;
+  let hueWeight = 0;
+  let hueTotal = 0;
+  hues.forEach((weight, bin) => {
+    hueTotal += weight;
+    if (weight > hueWeight) {
+      hueWeight = weight;
+      hueBin = bin;
+    }
+  });
+
+  const round = (value: number) => Math.round(value * 1000) / 1000;
+
+  return {
+    colorPalette: palette.map(entry => entry.hex),
+    paletteWeights: palette.map(entry => round(entry.size / count)),
+    brightness: round(brightness),
+    contrast: round(contrast),
+    saturation: round(saturationSum / count),
+    luminanceHistogram: Array.from(histogram, value => round(value / count)),
+    // Needs a real share of saturated pixels before a hue counts as dominant
+    dominantHue: hueBin >= 0 && hueTotal / count > 0.05 ? (hueBin + 0.5) * (360 / HUE_BINS) : null,
+    lighting: describeLighting(brightness, contrast, warmth / count / 40),
+  };
+};
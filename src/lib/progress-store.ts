@@ -0,0 +1,96 @@
+type Listener = () => void;
+
+interface ProgressEntry {
+  loaded: number;
+  total: number;
+}
+
+const scheduleFrame = (callback: () => void): void => {
+  if (typeof requestAnimationFrame === 'function') requestAnimationFrame(callback);
+  else setTimeout(callback, 16);
+};
+
+// Byte progress for many concurrent transfers, kept outside React state.
+// Writes only mark an entry dirty; subscribers are notified at most once per
+// animation frame, and only those watching an entry that actually changed.
+// Components read it through useSyncExternalStore.
+export class ProgressStore {
+  private entries = new Map<string, ProgressEntry>();
+  private listeners = new Map<string, Set<Listener>>();
+  private aggregateListeners = new Set<Listener>();
+  private dirty = new Set<string>();
+  private frameScheduled = false;
+
+  set(id: string, loaded: number, total: number) {
+    const entry = this.entries.get(id);
+    if (entry && entry.loaded === loaded && entry.total === total) return;
+
+    this.entries.set(id, { loaded, total });
+    this.markDirty(id);
+  }
+
+  delete(id: string) {
+    if (this.entries.delete(id)) this.markDirty(id);
+  }
+
+  clear() {
+    this.entries.forEach((_, id) => this.markDirty(id));
+    this.entries.clear();
+  }
+
+  // Percent complete for one entry, 0 when unknown
+  progress(id: string): number {
+    const entry = this.entries.get(id);
+    return entry && entry.total ? (entry.loaded / entry.total) * 100 : 0;
+  }
+
+  // Byte-weighted percent across every entry, so one large file counts for
+  // more than many small ones
+  aggregate(): number {
+    let loaded = 0;
+    let total = 0;
+    this.entries.forEach(entry => {
+      loaded += entry.loaded;
+      total += entry.total;
+    });
+    return total ? (loaded / total) * 100 : 0;
+  }
+
+  subscribe(id: string, listener: Listener): () => void {
+    let listeners = this.listeners.get(id);
+    if (!listeners) {
+      listeners = new Set();
+      this.listeners.set(id, listeners);
+    }
+    listeners.add(listener);
+
+    return () => {
+      listeners!.delete(listener);
+      if (!listeners!.size) this.listeners.delete(id);
+    };
+  }
+
+  subscribeAggregate(listener: Listener): () => void {
+    this.aggregateListeners.add(listener);
+    return () => {
+      this.aggregateListeners.delete(listener);
+    };
+  }
+
+  private markDirty(id: string) {
+    this.dirty.add(id);
+    if (this.frameScheduled) return;
+
+    this.frameScheduled = true;
+    scheduleFrame(() => this.flush());
+  }
+
+  private flush() {
+    this.frameScheduled = false;
+    const changed = this.dirty;
+    this.dirty = new Set();
+
+    changed.forEach(id => this.listeners.get(id)?.forEach(listener => listener()));
+    if (changed.size) this.aggregateListeners.forEach(listener => listener());
+  }
+}
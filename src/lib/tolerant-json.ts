@@ -0,0 +1,183 @@
+// Incremental, forgiving JSON reader for model output. It skips any prose or
+// markdown fence before the first '{' or '[', ignores everything after the
+// root value closes, and can close a truncated document so that partial
+// output is still usable. Complete array items are reported as they arrive,
+// which lets streaming callers act on them before the response finishes.
+
+type Container = '{' | '[';
+
+export type ArrayItemListener = (value: unknown, depth: number) => void;
+
+const PARTIAL_LITERAL = /(?:-|[-\d.]+[eE][-+]?|[-\d]+\.|t|tr|tru|f|fa|fal|fals|n|nu|nul)$/;
+
+export const stripTrailingCommas = (text: string): string => {
+  let result = '';
+  let inString = false;
+  let escaped = false;
+
+  for (let i = 0; i < text.length; i++) {
+    const char = text[i];
+
+    if (inString) {
+      if (escaped) escaped = false;
+      else if (char === '\\') escaped = true;
+      else if (char === '"') inString = false;
+      result += char;
+      continue;
+    }
+
+    if (char === '"') inString = true;
+    if (char === '}' || char === ']') result = result.replace(/,\s*$/, '');
+    result += char;
+  }
+
+  return result;
+};
+
+export class StreamingJsonParser {
+  private buffer = '';
+  private start = -1;
+  private end = -1;
+  private scanned = 0;
+  private stack: Container[] = [];
+  private itemStarts: number[] = [];
+  private expectingKey: boolean[] = [];
+  private inString = false;
+  private escaped = false;
+
+  constructor(private onArrayItem?: ArrayItemListener) {}
+
+  get isComplete(): boolean {
+    return this.end >= 0;
+  }
+
+  push(chunk: string): this {
+    this.buffer += chunk;
+
+    for (let i = this.scanned; i < this.buffer.length && this.end < 0; i++) {
+      this.scan(this.buffer[i], i);
+    }
+    this.scanned = this.buffer.length;
+    return this;
+  }
+
+  // Best-effort value for everything received so far. Returns undefined when
+  // no JSON has started yet or the partial text cannot be repaired.
+  value(): unknown {
+    if (this.start < 0) return undefined;
+
+    const text = this.isComplete
+      ? this.buffer.slice(this.start, this.end)
+      : this.closeTruncated(this.buffer.slice(this.start));
+
+    try {
+      return JSON.parse(stripTrailingCommas(text));
+    } catch {
+      return undefined;
+    }
+  }
+
+  private scan(char: string, index: number) {
+    if (this.start < 0) {
+      if (char !== '{' && char !== '[') return;
+      this.start = index;
+    }
+
+    if (this.inString) {
+      if (this.escaped) this.escaped = false;
+      else if (char === '\\') this.escaped = true;
+      else if (char === '"') this.inString = false;
+      return;
+    }
+
+    const depth = this.stack.length;
+    const top = this.stack[depth - 1];
+
+    switch (char) {
+      case '"':
+        this.markItemStart(index);
+        this.inString = true;
+        break;
+      case '{':
+      case '[':
+        this.markItemStart(index);
+        this.stack.push(char);
+        this.itemStarts.push(-1);
+        this.expectingKey.push(char === '{');
+        break;
+      case '}':
+      case ']':
+        if (top === '[') this.emitItem(index);
+        this.stack.pop();
+        this.itemStarts.pop();
+        this.expectingKey.pop();
+        if (this.stack.length === 0) this.end = index + 1;
+        break;
+      case ',':
+        if (top === '[') this.emitItem(index);
+        else this.expectingKey[depth - 1] = true;
+        break;
+      case ':':
+        if (top === '{') this.expectingKey[depth - 1] = false;
+        break;
+      default:
+        if (!/\s/.test(char)) this.markItemStart(index);
+    }
+  }
+
+  private markItemStart(index: number) {
+    const level = this.stack.length - 1;
+    if (this.stack[level] === '[' && this.itemStarts[level] < 0) {
+      this.itemStarts[level] = index;
+    }
+  }
+
+  private emitItem(index: number) {
+    const level = this.stack.length - 1;
+    const itemStart = this.itemStarts[level];
+    this.itemStarts[level] = -1;
+    if (itemStart < 0 || !this.onArrayItem) return;
+
+    try {
+      const raw = stripTrailingCommas(this.buffer.slice(itemStart, index));
+      this.onArrayItem(JSON.parse(raw), this.stack.length);
+    } catch {
+      // Malformed item; the final value() pass decides what survives
+    }
+  }
+
+  private closeTruncated(text: string): string {
+    let repaired = text;
+
+    if (this.inString) {
+      if (this.escaped) repaired = repaired.slice(0, -1);
+      repaired += '"';
+    }
+
+    const level = this.stack.length - 1;
+    if (this.stack[level] === '{') {
+      if (this.expectingKey[level]) {
+        // Drop a key that has no value yet: {"a": 1, "b
+        repaired = repaired.replace(/,?\s*"(?:[^"\\]|\\.)*"\s*$/, '');
+      } else {
+        // Drop a dangling key or a half-written literal: {"a": tr
+        repaired = repaired
+          .replace(PARTIAL_LITERAL, '')
+          .replace(/,?\s*"(?:[^"\\]|\\.)*"\s*:\s*$/, '');
+      }
+    } else {
+      repaired = repaired.replace(PARTIAL_LITERAL, '');
+    }
+
+    repaired = repaired.replace(/,\s*$/, '');
+
+    for (let i = this.stack.length - 1; i >= 0; i--) {
+      repaired += this.stack[i] === '{' ? '}' : ']';
+    }
+    return repaired;
+  }
+}
+
+export const parseModelJson = (text: string | null | undefined): unknown => {
+  return new StreamingJsonParser().push(text || '').value();
+};
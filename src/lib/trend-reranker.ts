@@ -0,0 +1,178 @@
+import { MOOD_COLORS } from '@/lib/constants';
+import { deltaE, hexToLab, paletteToLab } from '@/lib/color';
+import { MediaAnalysis, Platform, TrendMatch } from '@/types';
+
+export interface RerankTrend {
+  id: string;
+  name: string;
+  platforms: string[];
+  popularity: number;
+  colors: string[];
+  mood: string;
+  updatedAt: Date;
+}
+
+export interface RerankCandidate {
+  trend: RerankTrend;
+  // Raw cosine similarity from the vector index
+  vectorScore: number;
+}
+
+export interface RerankContext {
+  analysis?: Pick<MediaAnalysis, 'mood' | 'colorPalette'>;
+  platform?: Platform;
+}
+
+// Feature columns, in the order they are laid out in the feature matrix
+const VECTOR = 0;
+const PALETTE = 1;
+const MOOD = 2;
+const PLATFORM = 3;
+const POPULARITY = 4;
+const FEATURE_COUNT = 5;
+
+const WEIGHTS = [0.5, 0.2, 0.15, 0.1, 0.05];
+
+// A CIE76 distance of 50 or more reads as unrelated colours
+const PALETTE_DISTANCE_SCALE = 50;
+// Mood colours sit further apart than palette colours, so a wider scale
+const MOOD_DISTANCE_SCALE = 100;
+const POPULARITY_HALF_LIFE_DAYS = 14;
+const NEUTRAL = 0.5;
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+const moodLab = (mood: string | undefined): Float64Array | null => {
+  const hex = MOOD_COLORS[mood?.toLowerCase() as keyof typeof MOOD_COLORS];
+  const lab = hex ? hexToLab(hex) : null;
+  return lab ? Float64Array.from(lab) : null;
+};
+
+// Symmetric chamfer distance: every colour on each side is matched to its
+// nearest colour on the other, and the two averages are combined
+const paletteSimilarity = (media: Float64Array, trend: Float64Array): number => {
+  const m = media.length / 3;
+  const t = trend.length / 3;
+  if (m === 0 || t === 0) return NEUTRAL;
+
+  const nearestToTrend = new Float64Array(t).fill(Infinity);
+  let mediaTotal = 0;
+
+  for (let i = 0; i < m; i++) {
+    let nearest = Infinity;
+    for (let j = 0; j < t; j++) {
+      const d = deltaE(media, i, trend, j);
+      if (d < nearest) nearest = d;
+      if (d < nearestToTrend[j]) nearestToTrend[j] = d;
+    }
+    mediaTotal += nearest;
+  }
+
+  let trendTotal = 0;
+  for (let j = 0; j < t; j++) trendTotal += nearestToTrend[j];
+
+  const distance = (mediaTotal / m + trendTotal / t) / 2;
+  return Math.max(0, 1 - distance / PALETTE_DISTANCE_SCALE);
+};
+
+// Same mood label is a full match. Otherwise moods are compared through their
+// MOOD_COLORS swatches, falling back to the trend palette when only the media
+// mood has a swatch.
+const moodSimilarity = (
+  mediaMood: string | undefined,
+  mediaMoodLab: Float64Array | null,
+  trend: RerankTrend,
+  trendPalette: Float64Array
+): number => {
+  if (!mediaMood) return NEUTRAL;
+  if (mediaMood.toLowerCase() === trend.mood.toLowerCase()) return 1;
+  if (!mediaMoodLab) return NEUTRAL;
+
+  const trendMoodLab = moodLab(trend.mood);
+  if (trendMoodLab) {
+    return Math.max(0, 1 - deltaE(mediaMoodLab, 0, trendMoodLab, 0) / MOOD_DISTANCE_SCALE);
+  }
+  if (trendPalette.length === 0) return NEUTRAL;
+
+  let nearest = Infinity;
+  for (let j = 0; j < trendPalette.length / 3; j++) {
+    nearest = Math.min(nearest, deltaE(mediaMoodLab, 0, trendPalette, j));
+  }
+  return Math.max(0, 1 - nearest / MOOD_DISTANCE_SCALE);
+};
+
+const describe = (
+  features: Float64Array,
+  row: number,
+  trend: RerankTrend,
+  context: RerankContext
+): string[] => {
+  const feature = (column: number) => features[row * FEATURE_COUNT + column];
+  const reasons: string[] = [];
+  const mediaMood = context.analysis?.mood;
+
+  if (feature(VECTOR) >= 0.8) reasons.push('Strong visual and thematic similarity');
+  else if (feature(VECTOR) >= 0.6) reasons.push('Similar visual themes');
+
+  if (mediaMood && mediaMood.toLowerCase() === trend.mood.toLowerCase()) {
+    reasons.push(`Shares the ${trend.mood} mood`);
+  } else if (feature(MOOD) >= 0.7) {
+    reasons.push(`${mediaMood} mood complements the trend's ${trend.mood} feel`);
+  }
+
+  if (context.analysis?.colorPalette?.length && trend.colors.length) {
+    if (feature(PALETTE) >= 0.7) reasons.push('Color palette closely matches the trend');
+    else if (feature(PALETTE) >= 0.5) reasons.push('Color palette is in the same family as the trend');
+  }
+
+  if (context.platform && feature(PLATFORM) === 1) reasons.push(`Trending on ${context.platform}`);
+  if (feature(POPULARITY) >= 0.6) reasons.push('Currently gaining popularity');
+
+  return reasons.length ? reasons : ['Some shared visual elements'];
+};
+
+// Re-scores vector-search candidates with cheap local features. All features
+// are computed into one matrix and combined with a single weighted pass, so
+// reranking 50 candidates costs microseconds and no model calls.
+export const rerankTrends = (
+  candidates: RerankCandidate[],
+  context: RerankContext = {},
+  limit = candidates.length,
+  now = Date.now()
+): TrendMatch[] => {
+  const mediaPalette = paletteToLab(context.analysis?.colorPalette || []);
+  const mediaMood = context.analysis?.mood;
+  const mediaMoodLab = moodLab(mediaMood);
+  const features = new Float64Array(candidates.length * FEATURE_COUNT);
+
+  candidates.forEach(({ trend, vectorScore }, row) => {
+    const trendPalette = paletteToLab(trend.colors);
+    const ageDays = Math.max(0, now - new Date(trend.updatedAt).getTime()) / DAY_MS;
+    const offset = row * FEATURE_COUNT;
+
+    features[offset + VECTOR] = Math.max(0, Math.min(1, vectorScore));
+    features[offset + PALETTE] = paletteSimilarity(mediaPalette, trendPalette);
+    features[offset + MOOD] = moodSimilarity(mediaMood, mediaMoodLab, trend, trendPalette);
+    features[offset + PLATFORM] = context.platform ? (trend.platforms.includes(context.platform) ? 1 : 0) : NEUTRAL;
+    features[offset + POPULARITY] = (Math.min(100, Math.max(0, trend.popularity)) / 100)
+      * Math.pow(0.5, ageDays / POPULARITY_HALF_LIFE_DAYS);
+  });
+
+  const scores = new Float64Array(candidates.length);
+  for (let row = 0; row < candidates.length; row++) {
+    let score = 0;
+    for (let column = 0; column < FEATURE_COUNT; column++) {
+      score += WEIGHTS[column] * features[row * FEATURE_COUNT + column];
+    }
+    scores[row] = score;
+  }
+
+  return candidates
+    .map((candidate, row) => ({ candidate, row }))
+    .sort((a, b) => scores[b.row] - scores[a.row])
+    .slice(0, limit)
+    .map(({ candidate, row }) => ({
+      trendId: candidate.trend.id,
+      score: Math.round(scores[row] * 1000) / 1000,
+      compatibilityReasons: describe(features, row, candidate.trend, context),
+    }));
+};
@@ -0,0 +1,206 @@
+import { z } from 'zod';
+
+const isRecord = (value: unknown): value is Record<string, unknown> =>
+  typeof value === 'object' && value !== null && !Array.isArray(value);
+
+const HEX_COLOR = /^#?([0-9a-f]{3}|[0-9a-f]{6})$/i;
+
+export const normalizeHexColor = (value: string): string | null => {
+  const match = value.trim().match(HEX_COLOR);
+  if (!match) return null;
+
+  const digits = match[1].length === 3
+    ? match[1].split('').map(d => d + d).join('')
+    : match[1];
+  return `#${digits.toUpperCase()}`;
+};
+
+// Models report confidence as 0-1, 0-100 or a string; fold all of them to 0-1
+const confidence = z.preprocess(
+  value => {
+    const num = typeof value === 'string' ? parseFloat(value) : value;
+    return typeof num === 'number' && num > 1 && num <= 100 ? num / 100 : num;
+  },
+  z.number().min(0).max(1)
+).catch(0.5);
+
+const label = z.string().trim().min(1).catch('unknown');
+
+const labelList = z
+  .union([z.array(z.unknown()), z.string()])
+  .transform(value => (Array.isArray(value) ? value : value.split(',')))
+  .transform(items =>
+    items
+      .filter((item): item is string | number => typeof item === 'string' || typeof item === 'number')
+      .map(item => String(item).trim())
+      .filter(Boolean)
+  )
+  .catch([]);
+
+const colorList = labelList.transform(colors =>
+  Array.from(new Set(colors.map(normalizeHexColor).filter((c): c is string => c !== null)))
+);
+
+// Fields the vision model is responsible for. Every field falls back to a
+// neutral value so a single bad field never forces a second model call.
+export const semanticAnalysisSchema = z.object({
+  mood: label,
+  moodConfidence: confidence,
+  sceneType: label,
+  sceneConfidence: confidence,
+  objects: labelList,
+  composition: label,
+  style: label,
+  emotions: labelList,
+});
+
+export type SemanticAnalysisResult = z.infer<typeof semanticAnalysisSchema>;
+
+// Palette and lighting are measured locally from the pixels and merged in
+export const mediaAnalysisResultSchema = semanticAnalysisSchema.extend({
+  colorPalette: colorList,
+  lighting: label,
+});
+
+export type MediaAnalysisResult = z.infer<typeof mediaAnalysisResultSchema>;
+
+// One line of a trend feed. Unlike model output, a bad feed line is rejected
+// outright rather than patched with defaults.
+export const trendFeedItemSchema = z.object({
+  externalId: z.string().trim().min(1),
+  name: z.string().trim().min(1),
+  category: z.string().trim().min(1),
+  platforms: z.array(z.string().trim().toLowerCase()).min(1),
+  popularity: z.coerce.number().int().min(0).max(100),
+  hashtags: z.array(z.string().trim().min(1)).default([]),
+  colors: z.array(z.string()).default([])
+    .transform(colors => colors.map(normalizeHexColor).filter((c): c is string => c !== null)),
+  mood: z.string().trim().min(1),
+  description: z.string().trim().default(''),
+  isActive: z.boolean().default(true),
+});
+
+export type TrendFeedItem = z.infer<typeof trendFeedItemSchema>;
+
+// Editor operations. Crop rectangles are fractions of the current image, so
+// the same list renders identically at preview and full resolution.
+const fraction = z.number().min(0).max(1);
+
+export const imageOperationSchema = z.union([
+  z.object({
+    type: z.literal('crop'),
+    left: fraction,
+    top: fraction,
+    width: fraction.positive(),
+    height: fraction.positive(),
+  }).refine(crop => crop.left + crop.width <= 1 && crop.top + crop.height <= 1, 'Crop must lie inside the image'),
+  z.object({
+    type: z.literal('rotate'),
+    // Clockwise, in quarter turns
+    angle: z.number().int().refine(angle => angle % 90 === 0, 'Rotation must be a multiple of 90 degrees'),
+  }),
+  z.object({
+    type: z.literal('flip'),
+    axis: z.enum(['horizontal', 'vertical']),
+  }),
+  z.object({
+    type: z.literal('resize'),
+    width: z.number().int().min(1).max(8192).optional(),
+    height: z.number().int().min(1).max(8192).optional(),
+  }).refine(resize => resize.width || resize.height, 'Resize needs a width or a height'),
+  z.object({
+    type: z.literal('adjust'),
+    // -1 to 1, 0 leaves the image unchanged
+    brightness: z.number().min(-1).max(1).optional(),
+    contrast: z.number().min(-1).max(1).optional(),
+    saturation: z.number().min(-1).max(1).optional(),
+    warmth: z.number().min(-1).max(1).optional(),
+    // Degrees around the colour wheel
+    hue: z.number().min(-180).max(180).optional(),
+  }),
+  z.object({
+    type: z.literal('filter'),
+    name: z.string().trim().min(1),
+    intensity: fraction.default(1),
+  }),
+]);
+
+export type ImageOperation = z.infer<typeof imageOperationSchema>;
+
+export const imageOperationListSchema = z.array(imageOperationSchema).max(50);
+
+export const captionTextSchema = z.union([
+  z.string(),
+  z.object({ text: z.string() }).transform(caption => caption.text),
+  z.object({ caption: z.string() }).transform(caption => caption.caption),
+]);
+
+// Accepts a bare array or the {"captions": [...]} envelope required by JSON mode
+export const captionListSchema = z
+  .union([z.array(z.unknown()), z.object({ captions: z.array(z.unknown()) })])
+  .transform(value => (Array.isArray(value) ? value : value.captions))
+  .transform(items =>
+    items.flatMap(item => {
+      const parsed = captionTextSchema.safeParse(item);
+      return parsed.success && parsed.data.trim() ? [parsed.data.trim()] : [];
+    })
+  );
+
+// {"captions": {"instagram": [...], "tiktok": [...]}} or the bare inner object
+export const multiPlatformCaptionSchema = z
+  .union([z.object({ captions: z.record(z.unknown()) }), z.record(z.unknown())])
+  .transform(value => ('captions' in value && isRecord(value.captions) ? value.captions : value))
+  .transform(byPlatform =>
+    Object.fromEntries(
+      Object.entries(byPlatform).map(([platform, list]) => {
+        const parsed = captionListSchema.safeParse(list);
+        return [platform.trim().toLowerCase(), parsed.success ? parsed.data : []];
+      })
+    ) as Record<string, string[]>
+  );
+
+// JSON Schemas sent to models that support structured outputs. They mirror
+// the zod schemas above.
+export const SEMANTIC_ANALYSIS_JSON_SCHEMA = {
+  type: 'object',
+  additionalProperties: false,
+  required: [
+    'mood', 'moodConfidence', 'sceneType', 'sceneConfidence',
+    'objects', 'composition', 'style', 'emotions',
+  ],
+  properties: {
+    mood: { type: 'string' },
+    moodConfidence: { type: 'number' },
+    sceneType: { type: 'string' },
+    sceneConfidence: { type: 'number' },
+    objects: { type: 'array', items: { type: 'string' } },
+    composition: { type: 'string' },
+    style: { type: 'string' },
+    emotions: { type: 'array', items: { type: 'string' } },
+  },
+} as const;
+
+export const CAPTION_LIST_JSON_SCHEMA = {
+  type: 'object',
+  additionalProperties: false,
+  required: ['captions'],
+  properties: {
+    captions: { type: 'array', items: { type: 'string' } },
+  },
+} as const;
+
+export const multiPlatformCaptionJsonSchema = (platforms: string[]) => ({
+  type: 'object',
+  additionalProperties: false,
+  required: ['captions'],
+  properties: {
+    captions: {
+      type: 'object',
+      additionalProperties: false,
+      required: platforms,
+      properties: Object.fromEntries(
+        platforms.map(platform => [platform, { type: 'array', items: { type: 'string' } }])
+      ),
+    },
+  },
+});
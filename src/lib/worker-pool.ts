@@ -0,0 +1,85 @@
+import { availableParallelism } from 'os';
+import { TransferListItem, Worker } from 'worker_threads';
+
+interface Task<TIn, TOut> {
+  input: TIn;
+  transferList?: TransferListItem[];
+  resolve: (value: TOut) => void;
+  reject: (error: Error) => void;
+}
+
+interface Slot<TIn, TOut> {
+  worker: Worker;
+  task: Task<TIn, TOut> | null;
+}
+
+// Workers reply with { result } or { error }; one task per worker at a time
+type WorkerReply<TOut> = { result: TOut } | { error: string };
+
+// Fixed-size pool of worker_threads that run CPU-bound jobs off the event
+// loop. Workers start lazily, a worker that dies is replaced, and the
+// process is never kept alive by idle workers.
+export class WorkerPool<TIn, TOut> {
+  private slots: Slot<TIn, TOut>[] = [];
+  private queue: Task<TIn, TOut>[] = [];
+
+  constructor(
+    private createWorker: () => Worker,
+    private size = Math.max(1, availableParallelism() - 1)
+  ) {}
+
+  run(input: TIn, transferList?: TransferListItem[]): Promise<TOut> {
+    return new Promise((resolve, reject) => {
+      this.queue.push({ input, transferList, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  async destroy() {
+    const slots = this.slots;
+    this.slots = [];
+    await Promise.all(slots.map(slot => slot.worker.terminate()));
+  }
+
+  private dispatch() {
+    while (this.queue.length) {
+      const slot = this.slots.find(candidate => !candidate.task)
+        || (this.slots.length < this.size ? this.spawn() : null);
+      if (!slot) return;
+
+      const task = this.queue.shift()!;
+      slot.task = task;
+      slot.worker.ref();
+      slot.worker.postMessage(task.input, task.transferList);
+    }
+  }
+
+  private spawn(): Slot<TIn, TOut> {
+    const slot: Slot<TIn, TOut> = { worker: this.createWorker(), task: null };
+
+    slot.worker.on('message', (reply: WorkerReply<TOut>) => {
+      const task = slot.task;
+      slot.task = null;
+      slot.worker.unref();
+
+      if ('error' in reply) task?.reject(new Error(reply.error));
+      else task?.resolve(reply.result);
+      this.dispatch();
+    });
+
+    slot.worker.on('error', error => {
+      slot.task?.reject(error);
+      slot.task = null;
+    });
+
+    slot.worker.on('exit', () => {
+      slot.task?.reject(new Error('Worker exited before finishing its task'));
+      this.slots = this.slots.filter(candidate => candidate !== slot);
+      this.dispatch();
+    });
+
+    slot.worker.unref();
+    this.slots.push(slot);
+    return slot;
+  }
+}
@@ -0,0 +1,126 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { openaiService } from '@/services/openai';
+import { mediaAnalysisService, isTierAllowed } from '@/services/media-analysis';
+import { vectorSearchService } from '@/services/vector-search';
+import { captionPrefetchService } from '@/services/caption-prefetch';
+import { AnalysisTier } from '@/services/openai';
+import { prisma } from '@/lib/db';
+import { MediaAnalysis, Platform } from '@/types';
+
+interface AnalyzeMediaBody {
+  mediaUrl?: string;
+  mediaId?: string;
+  platform?: Platform;
+  tier?: AnalysisTier;
+}
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { mediaUrl, mediaId, platform, tier }: AnalyzeMediaBody = req.body;
+
+    if (!mediaUrl && !mediaId) {
+      return res.status(400).json({ message: 'Media URL is required' });
+    }
+    if (tier && tier !== 'fast' && tier !== 'deep') {
+      return res.status(400).json({ message: 'Tier must be fast or deep' });
+    }
+
+    const user = await prisma.user.findUnique({
+      where: { id: session.user.id },
+      select: { plan: true, preferredPlatform: true },
+    });
+    if (tier && !isTierAllowed(tier, user?.plan)) {
+      return res.status(403).json({ message: `The ${tier} analysis tier is not included in your plan` });
+    }
+
+    const media = mediaId
+      ? await prisma.mediaFile.findFirst({ where: { id: mediaId, userId: session.user.id }, select: { id: true, url: true } })
+      : null;
+    if (mediaId && !media) {
+      return res.status(404).json({ message: 'Media not found' });
+    }
+
+    // Semantic fields from OpenAI Vision, palette and lighting from the pixels.
+    // An uploaded file is analysed from its stored URL, not the client's copy.
+    const { analysis: { imageStats, ...analysis }, usage } = await mediaAnalysisService.analyze(media?.url || mediaUrl!, {
+      tier,
+      plan: user?.plan,
+    });
+
+    // Generate embeddings for trend matching
+    const embedding = await openaiService.generateEmbedding(
+      JSON.stringify(analysis)
+    );
+
+    // Vector search, reranked on palette, mood and the target platform
+    const matchingTrends = await vectorSearchService.findSimilarTrends(
+      embedding,
+      5, // top 5 matches
+      { analysis, platform }
+    );
+
+    // Persisted only when the analysis belongs to an uploaded media file
+    const saved = media
+      ? await prisma.mediaAnalysis.create({
+        data: {
+          ...analysis,
+          mediaId: media.id,
+          userId: session.user.id,
+          embedding,
+          trendMatches: {
+            create: matchingTrends.map(match => ({
+              trendId: match.trendId,
+              score: match.score,
+              compatibilityReasons: match.compatibilityReasons,
+            })),
+          },
+        },
+        select: { id: true, createdAt: true, updatedAt: true },
+      })
+      : null;
+
+    const result = {
+      ...analysis,
+      id: saved?.id || `analysis_${Date.now()}`,
+      mediaId,
+      userId: session.user.id,
+      embedding,
+      matchingTrends,
+      createdAt: saved?.createdAt || new Date(),
+      updatedAt: saved?.updatedAt || new Date(),
+    };
+
+    // Start on the captions the caption panel will open with (default tone,
+    // preferred platform) so they are usually cached by the time it asks
+    const captionPrefetch = saved && captionPrefetchService.enabled
+      ? { platform: platform || (user?.preferredPlatform as Platform) || 'instagram', tone: 'casual' as const }
+      : null;
+    if (captionPrefetch) {
+      captionPrefetchService.start(session.user.id, { mediaAnalysis: result as MediaAnalysis, ...captionPrefetch });
+    }
+
+    res.status(200).json({
+      analysis: { ...result, imageStats },
+      matchingTrends,
+      usage,
+      captionPrefetch,
+    });
+  } catch (error) {
+    console.error('Error analyzing media:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
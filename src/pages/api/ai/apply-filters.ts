@@ -0,0 +1,91 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { prisma } from '@/lib/db';
+import { FILTER_PRESETS } from '@/lib/image-ops';
+import { imageOperationListSchema } from '@/lib/validation';
+import { imageRenderService, RenderFormat } from '@/services/image-renderer';
+import { AspectRatio, ASPECT_RATIOS, mediaVariantService } from '@/services/media-variants';
+
+interface ApplyFiltersBody {
+  mediaId?: string;
+  operations?: unknown;
+  preview?: boolean;
+  format?: RenderFormat;
+  // Edit the stored platform crop instead of the original; operation
+  // coordinates are then relative to the crop
+  aspectRatio?: AspectRatio;
+}
+
+// Renders an editor operation list (crop, rotate, flip, resize, adjust,
+// filter) for one of the user's media files and returns the image bytes.
+// `preview: true` renders from a cached low-resolution decode for live
+// slider feedback. With `aspectRatio`, the precomputed platform crop is the
+// source, so the editor never re-crops or decodes the full original.
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { mediaId, operations, preview, format, aspectRatio }: ApplyFiltersBody = req.body;
+
+    if (!mediaId) {
+      return res.status(400).json({ message: 'Media ID is required' });
+    }
+    if (format && format !== 'webp' && format !== 'jpeg') {
+      return res.status(400).json({ message: 'Format must be webp or jpeg' });
+    }
+    if (aspectRatio && !ASPECT_RATIOS.includes(aspectRatio)) {
+      return res.status(400).json({ message: `Aspect ratio must be one of ${ASPECT_RATIOS.join(', ')}` });
+    }
+
+    const parsed = imageOperationListSchema.safeParse(operations ?? []);
+    if (!parsed.success) {
+      return res.status(400).json({ message: 'Invalid operations', errors: parsed.error.flatten() });
+    }
+    const unknownFilter = parsed.data.find(op => op.type === 'filter' && !FILTER_PRESETS[op.name]);
+    if (unknownFilter?.type === 'filter') {
+      return res.status(400).json({ message: `Unknown filter: ${unknownFilter.name}` });
+    }
+
+    const media = await prisma.mediaFile.findFirst({
+      where: { id: mediaId, userId: session.user.id },
+      select: { id: true, url: true, filename: true, mimeType: true, metadata: true },
+    });
+    if (!media) {
+      return res.status(404).json({ message: 'Media not found' });
+    }
+    if (!media.mimeType.startsWith('image/')) {
+      return res.status(400).json({ message: 'Only images can be edited' });
+    }
+
+    let source = media.url;
+    if (aspectRatio) {
+      const variants = await mediaVariantService.ensureForMediaFile(media);
+      const crop = variants?.crops[aspectRatio];
+      if (!crop) {
+        return res.status(503).json({ message: 'Platform crop is not available yet' });
+      }
+      source = crop;
+    }
+
+    const result = await imageRenderService.render(source, parsed.data, { preview, format });
+
+    res.setHeader('Content-Type', result.contentType);
+    res.setHeader('ETag', `"${result.key}"`);
+    res.setHeader('X-Render-Cache', result.cached ? 'hit' : 'miss');
+    res.status(200).send(result.buffer);
+  } catch (error) {
+    console.error('Error applying filters:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
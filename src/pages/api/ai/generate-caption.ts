@@ -0,0 +1,219 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { openaiService } from '@/services/openai';
+import { captionCacheService } from '@/services/caption-cache';
+import { captionPrefetchService } from '@/services/caption-prefetch';
+import { enforceCaptionConstraints } from '@/lib/captions';
+import { CaptionRequest, Platform } from '@/types';
+
+interface GenerateCaptionBody extends Omit<CaptionRequest, 'platform'> {
+  platform?: Platform;
+  // Several platforms are generated together in a single model call
+  platforms?: Platform[];
+  stream?: boolean;
+  // Skip the cache and always ask the model for a fresh set
+  regenerate?: boolean;
+}
+
+// Platform limits are enforced here, locally, so a caption that is too long
+// or over-tagged never costs another model round-trip
+const formatCaption = (caption: string, request: CaptionRequest, index: number) => ({
+  id: `caption_${Date.now()}_${index}`,
+  platform: request.platform,
+  tone: request.tone,
+  createdAt: new Date(),
+  ...enforceCaptionConstraints(caption, request.platform, {
+    maxLength: request.maxLength,
+    includeHashtags: request.includeHashtags,
+  }),
+});
+
+type FormattedCaption = ReturnType<typeof formatCaption>;
+
+// Cached captions, or those of a speculative prefetch that is still running
+const findCaptions = async (userId: string, request: CaptionRequest) => {
+  return (await captionCacheService.get(userId, request)) || captionPrefetchService.join(userId, request);
+};
+
+const saveCaptions = async (
+  userId: string,
+  request: CaptionRequest,
+  captions: FormattedCaption[]
+) => {
+  // The stored rows carry no validation report, so the formatted captions
+  // are returned with the ids of their rows
+  try {
+    const rows = await captionCacheService.store(userId, request, captions);
+    return captions.map((caption, index) => ({ ...caption, id: rows[index].id }));
+  } catch (error) {
+    console.error('Error caching captions:', error);
+    return captions;
+  }
+};
+
+async function generateForPlatforms(
+  res: NextApiResponse,
+  userId: string,
+  baseRequest: Omit<CaptionRequest, 'platform'>,
+  platforms: Platform[],
+  regenerate: boolean
+) {
+  const requests = platforms.map(platform => ({ ...baseRequest, platform }));
+  const cached = await Promise.all(
+    requests.map(request => (regenerate ? null : findCaptions(userId, request)))
+  );
+
+  const captions: Partial<Record<Platform, unknown[]>> = {};
+  const missing: CaptionRequest[] = [];
+  requests.forEach((request, index) => {
+    const hit = cached[index];
+    if (hit) captions[request.platform] = hit;
+    else missing.push(request);
+  });
+
+  if (missing.length === 1) {
+    const texts = await openaiService.generateCaption(missing[0]);
+    captions[missing[0].platform] = await saveCaptions(
+      userId,
+      missing[0],
+      texts.map((text, index) => formatCaption(text, missing[0], index))
+    );
+  } else if (missing.length > 1) {
+    const generated = await openaiService.generateMultiPlatformCaptions(
+      baseRequest,
+      missing.map(request => request.platform)
+    );
+
+    await Promise.all(missing.map(async request => {
+      captions[request.platform] = await saveCaptions(
+        userId,
+        request,
+        (generated[request.platform] || []).map((text, index) => formatCaption(text, request, index))
+      );
+    }));
+  }
+
+  res.status(200).json({
+    success: true,
+    captions,
+    cachedPlatforms: requests.filter((_, index) => cached[index]).map(request => request.platform),
+  });
+}
+
+// Newline-delimited JSON: one {"type": "caption"} event per caption as soon as
+// the model finishes it, then a final {"type": "done"} with the full list.
+async function streamCaptions(
+  res: NextApiResponse,
+  userId: string,
+  captionRequest: CaptionRequest,
+  regenerate: boolean
+) {
+  const controller = new AbortController();
+  // The request has already been read, so only the response reports a
+  // client that goes away before the stream is finished
+  res.on('close', () => {
+    if (!res.writableFinished) controller.abort();
+  });
+
+  res.writeHead(200, {
+    'Content-Type': 'application/x-ndjson; charset=utf-8',
+    'Cache-Control': 'no-cache, no-transform',
+    'X-Accel-Buffering': 'no',
+  });
+
+  const send = (event: Record<string, unknown>) => {
+    res.write(JSON.stringify(event) + '\n');
+  };
+
+  try {
+    const cached = regenerate ? null : await findCaptions(userId, captionRequest);
+    if (cached) {
+      cached.forEach(caption => send({ type: 'caption', caption }));
+      send({ type: 'done', cached: true, captions: cached });
+      return;
+    }
+
+    const formatted: FormattedCaption[] = [];
+
+    await openaiService.streamCaptions(
+      captionRequest,
+      (caption, index) => {
+        formatted[index] = formatCaption(caption, captionRequest, index);
+        send({ type: 'caption', caption: formatted[index] });
+      },
+      { signal: controller.signal }
+    );
+
+    send({
+      type: 'done',
+      cached: false,
+      captions: await saveCaptions(userId, captionRequest, formatted),
+    });
+  } catch (error) {
+    if (!controller.signal.aborted) {
+      console.error('Error streaming captions:', error);
+      send({ type: 'error', message: 'Internal server error' });
+    }
+  } finally {
+    res.end();
+  }
+}
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { stream, regenerate = false, platforms, platform, ...baseRequest }: GenerateCaptionBody = req.body;
+    const targets = Array.from(new Set(platforms?.length ? platforms : platform ? [platform] : []));
+
+    if (!baseRequest.mediaAnalysis || targets.length === 0) {
+      return res.status(400).json({ message: 'Media analysis and platform are required' });
+    }
+
+    // A prefetch finishing after a regenerate would replace the fresh set
+    if (regenerate) {
+      captionPrefetchService.cancel(session.user.id, baseRequest.mediaAnalysis.mediaId);
+    }
+
+    if (targets.length > 1) {
+      return generateForPlatforms(res, session.user.id, baseRequest, targets, regenerate);
+    }
+
+    const captionRequest: CaptionRequest = { ...baseRequest, platform: targets[0] };
+
+    if (stream || req.query.stream === '1') {
+      return streamCaptions(res, session.user.id, captionRequest, regenerate);
+    }
+
+    if (!regenerate) {
+      const cached = await findCaptions(session.user.id, captionRequest);
+      if (cached) {
+        return res.status(200).json({ success: true, cached: true, captions: cached });
+      }
+    }
+
+    // Generate captions using OpenAI
+    const captions = await openaiService.generateCaption(captionRequest);
+    const formatted = captions.map((caption, index) => formatCaption(caption, captionRequest, index));
+
+    res.status(200).json({
+      success: true,
+      cached: false,
+      captions: await saveCaptions(session.user.id, captionRequest, formatted),
+    });
+  } catch (error) {
+    console.error('Error generating captions:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
@@ -0,0 +1,32 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { captionPrefetchService } from '@/services/caption-prefetch';
+
+// Cancels speculative caption generation, e.g. when the user leaves the
+// editor or deletes the media before ever opening the caption panel
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'DELETE') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const mediaId = typeof req.query.mediaId === 'string' ? req.query.mediaId : undefined;
+
+    res.status(200).json({
+      success: true,
+      cancelled: captionPrefetchService.cancel(session.user.id, mediaId),
+    });
+  } catch (error) {
+    console.error('Error cancelling caption prefetch:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
@@ -0,0 +1,45 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { directUploadService, DirectUploadError } from '@/services/storage/direct-upload';
+
+interface CompleteUploadBody {
+  token?: string;
+}
+
+// Called by the browser after a direct upload finishes; checks the file in
+// storage and registers it as a MediaFile
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { token }: CompleteUploadBody = req.body;
+
+    if (!token) {
+      return res.status(400).json({ message: 'Upload token is required' });
+    }
+
+    const mediaFile = await directUploadService.completeUpload(session.user.id, token);
+
+    res.status(200).json({
+      success: true,
+      mediaFile,
+    });
+  } catch (error) {
+    if (error instanceof DirectUploadError) {
+      return res.status(error.status).json({ message: error.message });
+    }
+    console.error('Error completing upload:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
@@ -0,0 +1,47 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { deletionService } from '@/services/deletion';
+
+interface DeleteMediaBody {
+  mediaIds?: string[];
+}
+
+const MAX_MEDIA_IDS = 1000;
+
+// Deletes media files with their analyses and captions at once; stored
+// files and derivatives are removed in the background
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { mediaIds }: DeleteMediaBody = req.body;
+
+    if (!Array.isArray(mediaIds) || !mediaIds.length || mediaIds.some(id => typeof id !== 'string')) {
+      return res.status(400).json({ message: 'Media ids are required' });
+    }
+    if (mediaIds.length > MAX_MEDIA_IDS) {
+      return res.status(400).json({ message: `At most ${MAX_MEDIA_IDS} media files can be deleted at once` });
+    }
+
+    const result = await deletionService.deleteMedia(session.user.id, mediaIds);
+
+    res.status(200).json({
+      success: true,
+      ...result,
+    });
+  } catch (error) {
+    console.error('Error deleting media:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
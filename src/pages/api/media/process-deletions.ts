@@ -0,0 +1,41 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { createHash, timingSafeEqual } from 'crypto';
+import { deletionService } from '@/services/deletion';
+
+// Compares digests so the check takes the same time whatever the token length
+const isAuthorized = (header: string | undefined, secret: string | undefined): boolean => {
+  if (!secret || !header?.startsWith('Bearer ')) return false;
+
+  const digest = (value: string) => createHash('sha256').update(value).digest();
+  return timingSafeEqual(digest(header.slice('Bearer '.length)), digest(secret));
+};
+
+// Drains the storage deletion outbox, retrying failed deletes that are due.
+// Meant for a scheduler, so retries happen even on instances that restart:
+// Vercel Cron sends GET with CRON_SECRET (see vercel.json), other schedulers
+// POST with DELETION_PROCESS_SECRET.
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST' && req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  const secret = req.method === 'GET' ? process.env.CRON_SECRET : process.env.DELETION_PROCESS_SECRET;
+  if (!isAuthorized(req.headers.authorization, secret)) {
+    return res.status(401).json({ message: 'Unauthorized' });
+  }
+
+  try {
+    const deleted = await deletionService.processPending();
+
+    res.status(200).json({
+      success: true,
+      deleted,
+    });
+  } catch (error) {
+    console.error('Error processing deletions:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
@@ -0,0 +1,47 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { directUploadService, DirectUploadError } from '@/services/storage/direct-upload';
+
+interface SignUploadBody {
+  filename?: string;
+  contentType?: string;
+  size?: number;
+}
+
+// Issues short-lived signed parameters for uploading one file straight to
+// storage; the bytes never pass through this API
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const { filename, contentType, size }: SignUploadBody = req.body;
+
+    if (!filename || !contentType || typeof size !== 'number') {
+      return res.status(400).json({ message: 'Filename, content type and size are required' });
+    }
+
+    const upload = await directUploadService.createUpload(session.user.id, { filename, contentType, size });
+
+    res.status(200).json({
+      success: true,
+      upload,
+    });
+  } catch (error) {
+    if (error instanceof DirectUploadError) {
+      return res.status(error.status).json({ message: error.message });
+    }
+    console.error('Error signing upload:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
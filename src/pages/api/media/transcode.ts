@@ -0,0 +1,111 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { prisma } from '@/lib/db';
+import { PLATFORM_VIDEO_RENDITIONS } from '@/lib/constants';
+import { videoTranscodeService, TranscodeJob, VideoPlatform } from '@/services/video-transcoder';
+
+interface TranscodeBody {
+  mediaId?: string;
+  platforms?: VideoPlatform[];
+}
+
+const isFinished = (job: TranscodeJob) => job.status === 'completed' || job.status === 'failed';
+
+const toResponse = ({ userId, ...job }: TranscodeJob) => job;
+
+// Newline-delimited JSON: the job after every progress step, ending with the
+// completed or failed job. On a platform with a function time limit the
+// stream is cut at that limit; clients then poll or reconnect.
+async function streamProgress(res: NextApiResponse, job: TranscodeJob) {
+  res.writeHead(200, {
+    'Content-Type': 'application/x-ndjson; charset=utf-8',
+    'Cache-Control': 'no-cache, no-transform',
+    'X-Accel-Buffering': 'no',
+  });
+
+  const send = (current: TranscodeJob) => {
+    if (res.writableEnded || res.destroyed) return;
+    res.write(JSON.stringify(toResponse(current)) + '\n');
+    if (isFinished(current)) {
+      unsubscribe();
+      res.end();
+    }
+  };
+
+  const unsubscribe = videoTranscodeService.subscribe(job.id, send);
+  res.on('close', unsubscribe);
+
+  try {
+    // Read the job again once events are flowing, so a change made while
+    // subscribing is not missed
+    await videoTranscodeService.eventsReady();
+    send((await videoTranscodeService.getJob(job.id)) || job);
+  } catch (error) {
+    console.error('Error streaming transcode progress:', error);
+    unsubscribe();
+    res.end();
+  }
+}
+
+// POST queues platform renditions of a video; GET ?jobId= reports on the
+// job, and with &stream=1 follows its progress
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST' && req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    if (!videoTranscodeService.enabled) {
+      return res.status(503).json({ message: 'Video transcoding is not configured' });
+    }
+
+    if (req.method === 'GET') {
+      const job = typeof req.query.jobId === 'string' ? await videoTranscodeService.getJob(req.query.jobId) : undefined;
+      if (!job || job.userId !== session.user.id) {
+        return res.status(404).json({ message: 'Job not found' });
+      }
+
+      if (req.query.stream === '1') return streamProgress(res, job);
+      return res.status(200).json({ success: true, job: toResponse(job) });
+    }
+
+    const { mediaId, platforms }: TranscodeBody = req.body;
+
+    if (!mediaId) {
+      return res.status(400).json({ message: 'Media ID is required' });
+    }
+    if (!Array.isArray(platforms) || !platforms.length || platforms.some(platform => !(platform in PLATFORM_VIDEO_RENDITIONS))) {
+      return res.status(400).json({ message: `Platforms must be some of: ${Object.keys(PLATFORM_VIDEO_RENDITIONS).join(', ')}` });
+    }
+
+    const media = await prisma.mediaFile.findFirst({
+      where: { id: mediaId, userId: session.user.id },
+      select: { id: true, url: true, mimeType: true },
+    });
+    if (!media) {
+      return res.status(404).json({ message: 'Media not found' });
+    }
+    if (!media.mimeType.startsWith('video/')) {
+      return res.status(400).json({ message: 'Only videos can be transcoded' });
+    }
+
+    const job = await videoTranscodeService.enqueue(session.user.id, media.id, media.url, platforms);
+
+    res.status(202).json({
+      success: true,
+      job: toResponse(job),
+    });
+  } catch (error) {
+    console.error('Error transcoding video:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
@@ -0,0 +1,64 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { prisma } from '@/lib/db';
+import { PLATFORM_SPECS } from '@/lib/constants';
+import { mediaVariantService } from '@/services/media-variants';
+
+type SpecPlatform = keyof typeof PLATFORM_SPECS;
+
+// Thumbnail and platform crops for previews, served from the variants
+// rendered at upload; `platform` narrows the crops to that platform's ratios
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const mediaId = typeof req.query.mediaId === 'string' ? req.query.mediaId : undefined;
+    const platform = (Object.keys(PLATFORM_SPECS) as SpecPlatform[]).find(p => p === req.query.platform);
+
+    if (!mediaId) {
+      return res.status(400).json({ message: 'Media ID is required' });
+    }
+    if (req.query.platform && !platform) {
+      return res.status(400).json({ message: 'Unsupported platform' });
+    }
+
+    const media = await prisma.mediaFile.findFirst({
+      where: { id: mediaId, userId: session.user.id },
+      select: { id: true, url: true, filename: true, mimeType: true, metadata: true },
+    });
+    if (!media) {
+      return res.status(404).json({ message: 'Media not found' });
+    }
+
+    const variants = await mediaVariantService.ensureForMediaFile(media);
+    if (!variants) {
+      return res.status(503).json({ message: 'Previews are not available yet' });
+    }
+
+    const ratios: readonly string[] = platform ? PLATFORM_SPECS[platform].aspectRatios : Object.keys(variants.crops);
+    const crops = Object.fromEntries(
+      Object.entries(variants.crops).filter(([ratio]) => ratios.includes(ratio))
+    );
+
+    res.setHeader('Cache-Control', 'private, max-age=300');
+    res.status(200).json({
+      success: true,
+      thumbnail: variants.thumbnail,
+      crops,
+    });
+  } catch (error) {
+    console.error('Error loading media previews:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
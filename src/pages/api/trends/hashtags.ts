@@ -0,0 +1,46 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { getServerSession } from 'next-auth/next';
+import { authOptions } from '@/lib/auth';
+import { hashtagIndex } from '@/services/hashtag-index';
+import { Platform } from '@/types';
+
+const PLATFORMS: Platform[] = ['instagram', 'tiktok', 'facebook', 'youtube', 'twitter', 'pinterest'];
+const MAX_LIMIT = 50;
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const session = await getServerSession(req, res, authOptions);
+    if (!session?.user?.id) {
+      return res.status(401).json({ message: 'Unauthorized' });
+    }
+
+    const prefix = typeof req.query.prefix === 'string' ? req.query.prefix : '';
+    const platform = PLATFORMS.find(p => p === req.query.platform);
+    const limit = Math.max(1, Math.min(Number(req.query.limit) || 10, MAX_LIMIT));
+
+    if (!prefix.replace(/^#+/, '').trim()) {
+      return res.status(400).json({ message: 'Prefix is required' });
+    }
+
+    // Served from memory; only a request landing after the sync interval waits
+    // on an incremental read of changed trends
+    await hashtagIndex.ensureFresh();
+    const suggestions = hashtagIndex.search(prefix, { platform, limit });
+
+    res.setHeader('Cache-Control', 'private, max-age=60');
+    res.status(200).json({
+      success: true,
+      suggestions,
+    });
+  } catch (error) {
+    console.error('Error searching hashtags:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
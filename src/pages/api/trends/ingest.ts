@@ -0,0 +1,47 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { createHash, timingSafeEqual } from 'crypto';
+import { trendIngestionService } from '@/services/trend-ingestion';
+
+// The feed is streamed straight from the request, so Next must not buffer it
+export const config = {
+  api: {
+    bodyParser: false,
+  },
+};
+
+// Compares digests so the check takes the same time whatever the token length
+const isAuthorized = (header: string | undefined): boolean => {
+  const secret = process.env.TREND_INGEST_SECRET;
+  if (!secret || !header?.startsWith('Bearer ')) return false;
+
+  const digest = (value: string) => createHash('sha256').update(value).digest();
+  return timingSafeEqual(digest(header.slice('Bearer '.length)), digest(secret));
+};
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  // Called by the feed job rather than a signed-in user
+  if (!isAuthorized(req.headers.authorization)) {
+    return res.status(401).json({ message: 'Unauthorized' });
+  }
+
+  try {
+    const stats = await trendIngestionService.ingest(req, {
+      deactivateMissing: req.query.deactivateMissing === '1',
+    });
+
+    res.status(200).json({
+      success: true,
+      stats,
+    });
+  } catch (error) {
+    console.error('Error ingesting trends:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
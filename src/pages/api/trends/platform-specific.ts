@@ -0,0 +1,42 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { trendLeaderboards, LEADERBOARD_SIZE } from '@/services/trend-leaderboards';
+import { Platform } from '@/types';
+
+const PLATFORMS: Platform[] = ['instagram', 'tiktok', 'facebook', 'youtube', 'twitter', 'pinterest'];
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const platform = PLATFORMS.find(p => p === req.query.platform);
+    const limit = Math.max(1, Math.min(Number(req.query.limit) || 20, LEADERBOARD_SIZE));
+
+    if (!platform) {
+      return res.status(400).json({ message: 'A valid platform is required' });
+    }
+
+    // Leaderboards are the same for every user, so shared caches may hold them
+    const { trends, version } = await trendLeaderboards.top({ platform }, limit);
+    const etag = `W/"platform-${platform}-${limit}-${version}"`;
+
+    res.setHeader('Cache-Control', 'public, s-maxage=60, stale-while-revalidate=300');
+    res.setHeader('ETag', etag);
+    if (req.headers['if-none-match'] === etag) {
+      return res.status(304).end();
+    }
+
+    res.status(200).json({
+      success: true,
+      platform,
+      trends,
+    });
+  } catch (error) {
+    console.error('Error fetching platform trends:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
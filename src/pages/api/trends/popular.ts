@@ -0,0 +1,39 @@
+import { NextApiRequest, NextApiResponse } from 'next';
+import { trendLeaderboards, LEADERBOARD_SIZE } from '@/services/trend-leaderboards';
+import { TREND_CATEGORIES } from '@/lib/constants';
+
+export default async function handler(
+  req: NextApiRequest,
+  res: NextApiResponse
+) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ message: 'Method not allowed' });
+  }
+
+  try {
+    const category = TREND_CATEGORIES.find(c => c === req.query.category);
+    const limit = Math.max(1, Math.min(Number(req.query.limit) || 20, LEADERBOARD_SIZE));
+
+    if (req.query.category && !category) {
+      return res.status(400).json({ message: 'Unknown category' });
+    }
+
+    // Leaderboards are the same for every user, so shared caches may hold them
+    const { trends, version } = await trendLeaderboards.top({ category }, limit);
+    const etag = `W/"popular-${category || 'all'}-${limit}-${version}"`;
+
+    res.setHeader('Cache-Control', 'public, s-maxage=60, stale-while-revalidate=300');
+    res.setHeader('ETag', etag);
+    if (req.headers['if-none-match'] === etag) {
+      return res.status(304).end();
+    }
+
+    res.status(200).json({
+      success: true,
+      trends,
+    });
+  } catch (error) {
+    console.error('Error fetching popular trends:', error);
+    res.status(500).json({ message: 'Internal server error' });
+  }
+}
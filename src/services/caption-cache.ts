@@ -0,0 +1,89 @@
+import { createHash, randomUUID } from 'crypto';
+import { prisma } from '@/lib/db';
+import { compactAnalysis } from '@/lib/captions';
+import { CaptionRequest } from '@/types';
+
+// Serialises with sorted keys so that property order never changes the hash
+const stableStringify = (value: unknown): string => {
+  if (Array.isArray(value)) {
+    return `[${value.map(stableStringify).join(',')}]`;
+  }
+  if (value && typeof value === 'object') {
+    const entries = Object.entries(value as Record<string, unknown>)
+      .filter(([, v]) => v !== undefined)
+      .sort(([a], [b]) => a.localeCompare(b));
+    return `{${entries.map(([k, v]) => `${JSON.stringify(k)}:${stableStringify(v)}`).join(',')}}`;
+  }
+  return JSON.stringify(value ?? null);
+};
+
+export const captionCacheKey = (request: CaptionRequest): string => {
+  const analysis = compactAnalysis(request.mediaAnalysis);
+  const key = stableStringify({
+    analysis: {
+      ...analysis,
+      mood: analysis.mood?.toLowerCase(),
+      sceneType: analysis.sceneType?.toLowerCase(),
+    },
+    platform: request.platform,
+    tone: request.tone,
+    targetAudience: request.targetAudience?.trim().toLowerCase() || 'general',
+    count: request.count || 3,
+  });
+
+  return createHash('sha256').update(key).digest('hex');
+};
+
+export class CaptionCacheService {
+  // The newest generated set for the request, whatever its size; the model
+  // may return fewer captions than were asked for
+  async get(userId: string, request: CaptionRequest) {
+    try {
+      const latest = await prisma.generatedCaption.findFirst({
+        where: { userId, cacheKey: captionCacheKey(request), generationId: { not: null } },
+        orderBy: [{ createdAt: 'desc' }, { id: 'desc' }],
+        select: { generationId: true },
+      });
+      if (!latest) return null;
+
+      const rows = await prisma.generatedCaption.findMany({
+        where: { userId, generationId: latest.generationId },
+        orderBy: [{ createdAt: 'asc' }, { id: 'asc' }],
+      });
+      return rows.length ? rows : null;
+    } catch (error) {
+      // A cache failure should degrade to a fresh generation, not an error
+      console.error('Error reading caption cache:', error);
+      return null;
+    }
+  }
+
+  async store(
+    userId: string,
+    request: CaptionRequest,
+    captions: { text: string; hashtags: string[]; characterCount: number }[]
+  ) {
+    const cacheKey = captionCacheKey(request);
+    const generationId = randomUUID();
+
+    return prisma.$transaction(
+      captions.map(caption =>
+        prisma.generatedCaption.create({
+          data: {
+            userId,
+            cacheKey,
+            generationId,
+            mediaId: request.mediaAnalysis.mediaId,
+            platform: request.platform,
+            tone: request.tone,
+            text: caption.text,
+            hashtags: caption.hashtags,
+            characterCount: caption.characterCount,
+          },
+        })
+      )
+    );
+  }
+}
+
+export const captionCacheService = new CaptionCacheService();
@@ -0,0 +1,87 @@
+import { openaiService } from '@/services/openai';
+import { openaiScheduler } from '@/services/openai-scheduler';
+import { captionCacheService, captionCacheKey } from '@/services/caption-cache';
+import { enforceCaptionConstraints } from '@/lib/captions';
+import { CaptionRequest } from '@/types';
+
+type StoredCaptions = NonNullable<Awaited<ReturnType<typeof captionCacheService.get>>>;
+
+interface PrefetchJob {
+  userId: string;
+  mediaId?: string;
+  controller: AbortController;
+  promise: Promise<StoredCaptions | null>;
+}
+
+// Speculatively generates the captions a user is most likely to ask for next
+// and writes them to the caption cache. Jobs run on the scheduler's batch
+// lane, so they only use rate budget interactive requests leave free.
+export class CaptionPrefetchService {
+  private jobs = new Map<string, PrefetchJob>();
+
+  get enabled(): boolean {
+    return process.env.CAPTION_PREFETCH_ENABLED === 'true';
+  }
+
+  start(userId: string, request: CaptionRequest) {
+    if (!this.enabled) return;
+
+    const key = `${userId}:${captionCacheKey(request)}`;
+    if (this.jobs.has(key)) return;
+
+    const controller = new AbortController();
+    const job: PrefetchJob = {
+      userId,
+      mediaId: request.mediaAnalysis.mediaId,
+      controller,
+      promise: this.run(userId, request, controller.signal).finally(() => {
+        this.jobs.delete(key);
+      }),
+    };
+    this.jobs.set(key, job);
+  }
+
+  // Lets an explicit request reuse a prefetch that is still running instead
+  // of paying for a second generation. The prefetch moves to the interactive
+  // lane, so joining is never slower than asking afresh.
+  async join(userId: string, request: CaptionRequest): Promise<StoredCaptions | null> {
+    const job = this.jobs.get(`${userId}:${captionCacheKey(request)}`);
+    if (!job) return null;
+
+    openaiScheduler.promote(job.controller.signal);
+    return job.promise;
+  }
+
+  // Cancels the user's in-flight prefetches, optionally only for one media file
+  cancel(userId: string, mediaId?: string): number {
+    let cancelled = 0;
+    this.jobs.forEach(job => {
+      if (job.userId !== userId || (mediaId && job.mediaId !== mediaId)) return;
+      job.controller.abort();
+      cancelled++;
+    });
+    return cancelled;
+  }
+
+  private async run(userId: string, request: CaptionRequest, signal: AbortSignal) {
+    try {
+      const cached = await captionCacheService.get(userId, request);
+      if (cached || signal.aborted) return cached;
+
+      const captions = await openaiService.generateCaption(request, 'batch', signal);
+      if (signal.aborted) return null;
+
+      return await captionCacheService.store(userId, request, captions.map(caption =>
+        enforceCaptionConstraints(caption, request.platform, {
+          maxLength: request.maxLength,
+          includeHashtags: request.includeHashtags,
+        })
+      ));
+    } catch (error) {
+      if (!signal.aborted) console.error('Error prefetching captions:', error);
+      return null;
+    }
+  }
+}
+
+export const captionPrefetchService = new CaptionPrefetchService();
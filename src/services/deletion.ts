@@ -0,0 +1,364 @@
+import { Prisma } from '@prisma/client';
+import { prisma } from '@/lib/db';
+import { captionPrefetchService } from '@/services/caption-prefetch';
+import { s3VariantKeys } from '@/services/media-variants';
+import { cloudinaryService } from '@/services/storage/cloudinary';
+import { s3Service } from '@/services/storage/s3';
+import { vectorSearchService } from '@/services/vector-search';
+
+export type DeletionTarget = 's3' | 'cloudinary:image' | 'cloudinary:video' | 'vector';
+
+export interface DeletionResult {
+  // Media files removed from the database
+  deleted: number;
+  // Storage objects queued for background deletion
+  queued: number;
+}
+
+export interface DeletionItem {
+  target: DeletionTarget;
+  key: string;
+}
+
+interface MediaRecord {
+  id: string;
+  filename: string;
+  mimeType: string;
+  metadata: unknown;
+  transcodes: { target: string; key: string }[];
+}
+
+interface ClaimedDeletion {
+  id: string;
+  target: string;
+  key: string;
+  attempts: number;
+}
+
+const MEDIA_SELECT = {
+  id: true,
+  filename: true,
+  mimeType: true,
+  metadata: true,
+  transcodes: { select: { target: true, key: true } },
+} as const;
+
+// Media files removed per transaction
+const CHUNK_SIZE = 500;
+// Outbox rows claimed per drain round
+const CLAIM_SIZE = 1000;
+// Claimed rows are hidden from other instances for this long
+const LEASE_MS = 5 * 60 * 1000;
+const RETRY_BASE_MS = 30 * 1000;
+const RETRY_MAX_MS = 24 * 60 * 60 * 1000;
+const MAX_ERROR_LENGTH = 500;
+
+export const storageTarget = (provider: string | undefined, mimeType: string): DeletionTarget => {
+  if (provider === 's3') return 's3';
+  return mimeType.startsWith('video/') ? 'cloudinary:video' : 'cloudinary:image';
+};
+
+const itemId = (item: { target: string; key: string }) => `${item.target}\n${item.key}`;
+
+const transcodesOf = (media: Pick<MediaRecord, 'transcodes'>): DeletionItem[] => {
+  return media.transcodes.map(({ target, key }) => ({ target: target as DeletionTarget, key }));
+};
+
+const byTarget = (items: DeletionItem[]): Map<DeletionTarget, string[]> => {
+  const keysByTarget = new Map<DeletionTarget, string[]>();
+  items.forEach(({ target, key }) => {
+    if (!keysByTarget.has(target)) keysByTarget.set(target, []);
+    keysByTarget.get(target)!.push(key);
+  });
+  return keysByTarget;
+};
+
+// Every stored object a media file owns. S3 derivatives have fixed keys
+// beside the original; Cloudinary deletes derived assets with the original.
+// Video transcodes are recorded in MediaTranscode by the transcoder.
+export const storageObjectsFor = (media: MediaRecord): DeletionItem[] => {
+  const provider = (media.metadata as { provider?: string } | null)?.provider;
+  if (provider !== 's3') {
+    return [{ target: storageTarget(provider, media.mimeType), key: media.filename }, ...transcodesOf(media)];
+  }
+
+  return [media.filename, s3Service.thumbnailKey(media.filename), ...s3VariantKeys(media.filename)]
+    .map(key => ({ target: 's3' as const, key }))
+    .concat(transcodesOf(media));
+};
+
+// Deletes media, projects and accounts. Database rows go at once, inside a
+// transaction that also writes the storage objects they owned to the
+// PendingDeletion outbox; the outbox is drained in the background with bulk
+// deletes, and failed items are retried with backoff until they succeed.
+export class DeletionService {
+  private draining: Promise<void> | null = null;
+  private drainAgain = false;
+
+  async deleteMedia(userId: string, mediaIds: string[]): Promise<DeletionResult> {
+    const result: DeletionResult = { deleted: 0, queued: 0 };
+
+    for (let i = 0; i < mediaIds.length; i += CHUNK_SIZE) {
+      const media = await prisma.mediaFile.findMany({
+        where: { userId, id: { in: mediaIds.slice(i, i + CHUNK_SIZE) } },
+        select: MEDIA_SELECT,
+      });
+      result.queued += await this.removeMedia(userId, media);
+      result.deleted += media.length;
+    }
+
+    this.processInBackground();
+    return result;
+  }
+
+  // Removes a project and the captions written for it, which would otherwise
+  // outlive it with a null projectId. With `deleteMedia`, the project's media
+  // files that no other project uses are deleted too. Null if not found.
+  async deleteProject(
+    userId: string,
+    projectId: string,
+    options: { deleteMedia?: boolean } = {}
+  ): Promise<DeletionResult | null> {
+    const project = await prisma.project.findFirst({
+      where: { id: projectId, userId },
+      select: { id: true },
+    });
+    if (!project) return null;
+
+    const media = options.deleteMedia
+      ? await prisma.mediaFile.findMany({
+        where: { userId, projectFiles: { some: { projectId }, every: { projectId } } },
+        select: { id: true },
+      })
+      : [];
+
+    await prisma.$transaction([
+      prisma.generatedCaption.deleteMany({ where: { userId, projectId } }),
+      prisma.project.delete({ where: { id: projectId } }),
+    ]);
+
+    return this.deleteMedia(userId, media.map(file => file.id));
+  }
+
+  // Media is removed in chunks so no single transaction holds thousands of
+  // rows, and an interrupted run can simply be repeated. The user row goes
+  // last and cascades to everything else.
+  async deleteAccount(userId: string): Promise<DeletionResult> {
+    const result: DeletionResult = { deleted: 0, queued: 0 };
+    captionPrefetchService.cancel(userId);
+
+    for (;;) {
+      const media = await prisma.mediaFile.findMany({ where: { userId }, select: MEDIA_SELECT, take: CHUNK_SIZE });
+      if (!media.length) break;
+
+      result.queued += await this.removeMedia(userId, media);
+      result.deleted += media.length;
+      this.processInBackground();
+    }
+
+    await prisma.user.deleteMany({ where: { id: userId } });
+    return result;
+  }
+
+  // Queues items to be deleted at `at`, or on the next drain. Returns the
+  // query so callers can run it inside their own transaction.
+  queueDeletions(items: DeletionItem[], at?: Date) {
+    return prisma.pendingDeletion.createMany({
+      data: items.map(item => ({ ...item, nextAttemptAt: at })),
+      skipDuplicates: true,
+    });
+  }
+
+  cancelDeletions(target: DeletionTarget, keys: string[]) {
+    return prisma.pendingDeletion.deleteMany({ where: { target, key: { in: keys } } });
+  }
+
+  // For use inside the caller's transaction, so vectors of trends retired
+  // there cannot be forgotten if the index is unreachable
+  queueVectorDeletions(trendIds: string[]) {
+    return this.queueDeletions(trendIds.map(key => ({ target: 'vector', key })));
+  }
+
+  // Trends written again must keep their vectors
+  cancelVectorDeletions(trendIds: string[]) {
+    return this.cancelDeletions('vector', trendIds);
+  }
+
+  // Records transcodes made from a media file so that deleting the file
+  // deletes them too. Transcodes are stored by content and may already be
+  // queued for deletion with another file; that is cancelled. If this file
+  // was deleted while encoding, they are queued unless another file uses them.
+  async recordTranscodes(mediaId: string, transcodes: DeletionItem[]) {
+    try {
+      // Inserts only, so concurrent jobs for one file cannot overwrite each other
+      await prisma.$transaction([
+        prisma.mediaTranscode.createMany({
+          data: transcodes.map(({ target, key }) => ({ mediaId, target, key })),
+          skipDuplicates: true,
+        }),
+        ...Array.from(byTarget(transcodes), ([target, keys]) => this.cancelDeletions(target, keys)),
+      ]);
+      return;
+    } catch (error) {
+      // P2003: the media file no longer exists
+      if (!(error instanceof Prisma.PrismaClientKnownRequestError && error.code === 'P2003')) throw error;
+    }
+
+    const inUse = await this.transcodesInUse([mediaId], transcodes);
+    const orphaned = transcodes.filter(item => !inUse.has(itemId(item)));
+    if (orphaned.length) {
+      await this.queueDeletions(orphaned);
+      this.processInBackground();
+    }
+  }
+
+  // Starts a drain unless this process is already running one
+  processInBackground() {
+    if (this.draining) {
+      this.drainAgain = true;
+      return;
+    }
+
+    this.draining = this.processPending()
+      .then(() => undefined)
+      .catch(error => console.error('Error processing deletions:', error))
+      .finally(() => {
+        this.draining = null;
+        if (this.drainAgain) {
+          this.drainAgain = false;
+          this.processInBackground();
+        }
+      });
+  }
+
+  // Claims due outbox rows, deletes them in bulk per target and settles each
+  // row. Every delete is idempotent, so a row processed twice after its
+  // lease ran out is harmless. Returns the number of items deleted.
+  async processPending(): Promise<number> {
+    let processed = 0;
+
+    for (;;) {
+      // One statement selects and leases the rows. SKIP LOCKED leaves rows
+      // that another instance is claiming at the same moment to that instance.
+      const now = new Date();
+      const due = await prisma.$queryRaw<ClaimedDeletion[]>`
+        UPDATE "PendingDeletion"
+        SET "nextAttemptAt" = ${new Date(now.getTime() + LEASE_MS)}
+        WHERE "id" IN (
+          SELECT "id" FROM "PendingDeletion"
+          WHERE "nextAttemptAt" <= ${now}
+          ORDER BY "nextAttemptAt"
+          LIMIT ${CLAIM_SIZE}
+          FOR UPDATE SKIP LOCKED
+        )
+        RETURNING "id", "target", "key", "attempts"`;
+      if (!due.length) return processed;
+
+      const keysByTarget = byTarget(due.map(row => ({ target: row.target as DeletionTarget, key: row.key })));
+
+      const failures = new Map<string, string>();
+      await Promise.all(Array.from(keysByTarget, async ([target, keys]) => {
+        const failed = await this.deleteFrom(target, keys);
+        failed.forEach((reason, key) => failures.set(itemId({ target, key }), reason));
+      }));
+
+      const succeeded = due.filter(row => !failures.has(itemId(row)));
+      const retried = due.filter(row => failures.has(itemId(row)));
+
+      await prisma.$transaction([
+        prisma.pendingDeletion.deleteMany({ where: { id: { in: succeeded.map(row => row.id) } } }),
+        // updateMany, as another instance may have settled the row already
+        ...retried.map(row => prisma.pendingDeletion.updateMany({
+          where: { id: row.id },
+          data: {
+            attempts: { increment: 1 },
+            lastError: failures.get(itemId(row))!.slice(0, MAX_ERROR_LENGTH),
+            nextAttemptAt: new Date(Date.now() + Math.min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** row.attempts)),
+          },
+        })),
+      ]);
+
+      processed += succeeded.length;
+    }
+  }
+
+  private async removeMedia(userId: string, media: MediaRecord[]): Promise<number> {
+    if (!media.length) return 0;
+
+    const ids = media.map(file => file.id);
+    const inUse = await this.transcodesInUse(ids, media.flatMap(transcodesOf));
+    // Files of one chunk may share transcodes; each is queued once
+    const objects = Array.from(new Map(media.flatMap(storageObjectsFor)
+      .filter(item => !inUse.has(itemId(item)))
+      .map(item => [itemId(item), item])).values());
+
+    await prisma.$transaction([
+      prisma.pendingDeletion.createMany({ data: objects, skipDuplicates: true }),
+      // Captions reference media by id only, so nothing cascades to them
+      prisma.generatedCaption.deleteMany({ where: { userId, mediaId: { in: ids } } }),
+      prisma.mediaFile.deleteMany({ where: { id: { in: ids } } }),
+    ]);
+
+    ids.forEach(id => captionPrefetchService.cancel(userId, id));
+    return objects.length;
+  }
+
+  // Transcodes that media files other than `ids` still record, as item ids
+  private async transcodesInUse(ids: string[], transcodes: DeletionItem[]): Promise<Set<string>> {
+    if (!transcodes.length) return new Set();
+
+    const others = await prisma.mediaTranscode.findMany({
+      where: {
+        mediaId: { notIn: ids },
+        OR: Array.from(byTarget(transcodes), ([target, keys]) => ({ target, key: { in: keys } })),
+      },
+      select: { target: true, key: true },
+    });
+    return new Set(others.map(itemId));
+  }
+
+  // Returns the keys that could not be deleted, with the reason
+  private async deleteFrom(target: DeletionTarget, keys: string[]): Promise<Map<string, string>> {
+    switch (target) {
+      case 's3':
+        return s3Service.deleteFiles(await this.unrecorded(target, keys));
+      case 'cloudinary:image':
+        return cloudinaryService.deleteFiles(keys, 'image');
+      case 'cloudinary:video':
+        return cloudinaryService.deleteFiles(await this.unrecorded(target, keys), 'video');
+      case 'vector':
+        return this.deleteVectors(keys);
+      default:
+        return new Map(keys.map(key => [key, `Unknown deletion target: ${target}`]));
+    }
+  }
+
+  // A transcode another file recorded after it was queued is in use again;
+  // its row is settled without deleting the object
+  private async unrecorded(target: DeletionTarget, keys: string[]): Promise<string[]> {
+    const recorded = await prisma.mediaTranscode.findMany({
+      where: { target, key: { in: keys } },
+      select: { key: true },
+    });
+    const inUse = new Set(recorded.map(transcode => transcode.key));
+    return keys.filter(key => !inUse.has(key));
+  }
+
+  private async deleteVectors(trendIds: string[]): Promise<Map<string, string>> {
+    try {
+      // A trend reactivated since it was queued has a fresh vector to keep
+      const active = await prisma.trend.findMany({
+        where: { id: { in: trendIds }, isActive: true },
+        select: { id: true },
+      });
+      const activeIds = new Set(active.map(trend => trend.id));
+
+      await vectorSearchService.deleteTrends(trendIds.filter(id => !activeIds.has(id)));
+      return new Map();
+    } catch (error) {
+      return new Map(trendIds.map(id => [id, (error as Error).message]));
+    }
+  }
+}
+
+export const deletionService = new DeletionService();
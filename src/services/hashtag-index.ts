@@ -0,0 +1,215 @@
+import { prisma } from '@/lib/db';
+import { Platform } from '@/types';
+
+export interface HashtagSuggestion {
+  tag: string;
+  popularity: number;
+  platformPopularity: number;
+  trendCount: number;
+}
+
+interface TrendHashtags {
+  id: string;
+  hashtags: string[];
+  platforms: string[];
+  popularity: number;
+  isActive?: boolean;
+  updatedAt?: Date;
+}
+
+interface HashtagEntry {
+  key: string;
+  tag: string;
+  popularity: number;
+  platformPopularity: Map<string, number>;
+  trendIds: Set<string>;
+}
+
+// Incremental syncs pick up trends whose updatedAt moved; a periodic full
+// rebuild catches rows that were deleted outright.
+const SYNC_INTERVAL_MS = 30_000;
+const REBUILD_INTERVAL_MS = 10 * 60_000;
+const MAX_CACHED_QUERIES = 1000;
+
+export const normalizeHashtag = (tag: string): string => {
+  return tag.trim().replace(/^#+/, '').normalize('NFC').toLowerCase();
+};
+
+// One entry per normalized key, keeping the first spelling seen, so that
+// "#Food" and "#food" on the same trend count once
+const uniqueHashtags = (hashtags: string[]): Map<string, string> => {
+  const unique = new Map<string, string>();
+  for (const hashtag of hashtags) {
+    const key = normalizeHashtag(hashtag);
+    if (key && !unique.has(key)) unique.set(key, hashtag);
+  }
+  return unique;
+};
+
+export class HashtagIndex {
+  private entries = new Map<string, HashtagEntry>();
+  // Keys kept in sorted order so a prefix is a contiguous range
+  private sortedKeys: string[] = [];
+  private trends = new Map<string, TrendHashtags>();
+  private queryCache = new Map<string, HashtagSuggestion[]>();
+  private lastSyncedAt: Date | null = null;
+  private lastRebuiltAt = 0;
+  private syncing: Promise<void> | null = null;
+  // While rebuilding, keys are appended and sorted once at the end
+  private rebuilding = false;
+
+  get size(): number {
+    return this.sortedKeys.length;
+  }
+
+  search(prefix: string, options: { platform?: Platform; limit?: number } = {}): HashtagSuggestion[] {
+    const key = normalizeHashtag(prefix);
+    const limit = options.limit || 10;
+    const cacheKey = `${options.platform || '*'}:${limit}:${key}`;
+
+    const cached = this.queryCache.get(cacheKey);
+    if (cached) return cached;
+
+    const matches: HashtagEntry[] = [];
+    for (let i = this.lowerBound(key); i < this.sortedKeys.length; i++) {
+      if (!this.sortedKeys[i].startsWith(key)) break;
+      matches.push(this.entries.get(this.sortedKeys[i])!);
+    }
+
+    const platform = options.platform;
+    const results = matches
+      .sort((a, b) => {
+        if (platform) {
+          const diff = (b.platformPopularity.get(platform) || 0) - (a.platformPopularity.get(platform) || 0);
+          if (diff !== 0) return diff;
+        }
+        return b.popularity - a.popularity || a.key.localeCompare(b.key);
+      })
+      .slice(0, limit)
+      .map(entry => ({
+        tag: entry.tag,
+        popularity: entry.popularity,
+        platformPopularity: platform ? entry.platformPopularity.get(platform) || 0 : entry.popularity,
+        trendCount: entry.trendIds.size,
+      }));
+
+    if (this.queryCache.size >= MAX_CACHED_QUERIES) this.queryCache.clear();
+    this.queryCache.set(cacheKey, results);
+    return results;
+  }
+
+  upsertTrend(trend: TrendHashtags) {
+    this.removeTrend(trend.id);
+    if (trend.isActive === false) return;
+
+    this.trends.set(trend.id, trend);
+    for (const [key, hashtag] of uniqueHashtags(trend.hashtags)) {
+      let entry = this.entries.get(key);
+      if (!entry) {
+        entry = {
+          key,
+          tag: `#${hashtag.trim().replace(/^#+/, '')}`,
+          popularity: 0,
+          platformPopularity: new Map(),
+          trendIds: new Set(),
+        };
+        this.entries.set(key, entry);
+        if (this.rebuilding) this.sortedKeys.push(key);
+        else this.sortedKeys.splice(this.lowerBound(key), 0, key);
+      }
+
+      entry.popularity += trend.popularity;
+      entry.trendIds.add(trend.id);
+      for (const platform of trend.platforms) {
+        entry.platformPopularity.set(platform, (entry.platformPopularity.get(platform) || 0) + trend.popularity);
+      }
+    }
+    this.queryCache.clear();
+  }
+
+  removeTrend(trendId: string) {
+    const previous = this.trends.get(trendId);
+    if (!previous) return;
+
+    this.trends.delete(trendId);
+    for (const key of uniqueHashtags(previous.hashtags).keys()) {
+      const entry = this.entries.get(key);
+      if (!entry || !entry.trendIds.delete(trendId)) continue;
+
+      if (entry.trendIds.size === 0) {
+        this.entries.delete(key);
+        this.sortedKeys.splice(this.lowerBound(key), 1);
+        continue;
+      }
+
+      entry.popularity -= previous.popularity;
+      for (const platform of previous.platforms) {
+        entry.platformPopularity.set(platform, (entry.platformPopularity.get(platform) || 0) - previous.popularity);
+      }
+    }
+    this.queryCache.clear();
+  }
+
+  // Brings the index up to date with the Trend table. Concurrent callers
+  // share one sync, and calls inside the sync interval return immediately.
+  async ensureFresh(): Promise<void> {
+    const now = Date.now();
+    if (this.lastSyncedAt && now - this.lastSyncedAt.getTime() < SYNC_INTERVAL_MS) return;
+
+    if (!this.syncing) {
+      this.syncing = (now - this.lastRebuiltAt > REBUILD_INTERVAL_MS ? this.rebuild() : this.sync())
+        .finally(() => {
+          this.syncing = null;
+        });
+    }
+    return this.syncing;
+  }
+
+  private async rebuild() {
+    const startedAt = new Date();
+    const trends = await prisma.trend.findMany({
+      where: { isActive: true },
+      select: { id: true, hashtags: true, platforms: true, popularity: true },
+    });
+
+    this.entries.clear();
+    this.sortedKeys = [];
+    this.trends.clear();
+
+    this.rebuilding = true;
+    try {
+      trends.forEach(trend => this.upsertTrend(trend));
+    } finally {
+      this.rebuilding = false;
+      // Default sort compares UTF-16 code units, as lowerBound does
+      this.sortedKeys.sort();
+    }
+
+    this.lastSyncedAt = startedAt;
+    this.lastRebuiltAt = startedAt.getTime();
+  }
+
+  private async sync() {
+    const startedAt = new Date();
+    const changed = await prisma.trend.findMany({
+      where: { updatedAt: { gt: this.lastSyncedAt! } },
+      select: { id: true, hashtags: true, platforms: true, popularity: true, isActive: true },
+    });
+
+    changed.forEach(trend => this.upsertTrend(trend));
+    this.lastSyncedAt = startedAt;
+  }
+
+  private lowerBound(key: string): number {
+    let low = 0;
+    let high = this.sortedKeys.length;
+    while (low < high) {
+      const mid = (low + high) >>> 1;
+      if (this.sortedKeys[mid] < key) low = mid + 1;
+      else high = mid;
+    }
+    return low;
+  }
+}
+
+export const hashtagIndex = new HashtagIndex();
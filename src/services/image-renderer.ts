@@ -0,0 +1,256 @@
+import sharp from 'sharp';
+import Redis from 'ioredis';
+import { createHash } from 'crypto';
+import { fetchImage } from '@/lib/fetch-image';
+import { fuseOperations, renderKey, RenderPlan } from '@/lib/image-ops';
+import { ImageOperation } from '@/lib/validation';
+
+export type RenderFormat = 'webp' | 'jpeg';
+
+export interface RenderOptions {
+  // Low-resolution fast path for live editor previews
+  preview?: boolean;
+  format?: RenderFormat;
+}
+
+export interface RenderResult {
+  buffer: Buffer;
+  contentType: string;
+  key: string;
+  cached: boolean;
+}
+
+// Decoded pixels, ready to run a plan on without touching the original file
+interface DecodedSource {
+  data: Buffer;
+  width: number;
+  height: number;
+  channels: 1 | 2 | 3 | 4;
+  // Source pixels per original pixel; resize targets are scaled by this
+  scale: number;
+}
+
+interface RenderCacheStore {
+  get(key: string): Promise<Buffer | null>;
+  set(key: string, buffer: Buffer): Promise<void>;
+}
+
+const PREVIEW_SIZE = 1024;
+const PREVIEW_QUALITY = 70;
+const FULL_QUALITY = 90;
+// Per-instance memory; kept small by default so a serverless function stays
+// well inside its limit. Larger long-lived servers can raise both.
+const SOURCE_CACHE_BYTES = Number(process.env.RENDER_SOURCE_CACHE_MB || 64) * 1024 * 1024;
+const RENDER_CACHE_BYTES = Number(process.env.RENDER_CACHE_MB || 32) * 1024 * 1024;
+const RENDER_TTL_SECONDS = 24 * 60 * 60;
+const MAX_URL_HASHES = 10_000;
+const FETCH_TIMEOUT_MS = 15_000;
+
+// Map-order LRU bounded by total bytes rather than entry count. A value
+// larger than the whole budget is not kept at all.
+class ByteLru<T> {
+  private entries = new Map<string, { value: T; size: number }>();
+  private bytes = 0;
+
+  constructor(private maxBytes: number) {}
+
+  get(key: string): T | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: string, value: T, size: number) {
+    const existing = this.entries.get(key);
+    if (existing) {
+      this.bytes -= existing.size;
+      this.entries.delete(key);
+    }
+    if (size > this.maxBytes) return;
+    this.entries.set(key, { value, size });
+    this.bytes += size;
+
+    while (this.bytes > this.maxBytes) {
+      const [oldest, entry] = this.entries.entries().next().value!;
+      this.entries.delete(oldest);
+      this.bytes -= entry.size;
+    }
+  }
+}
+
+class MemoryRenderCacheStore implements RenderCacheStore {
+  private lru = new ByteLru<Buffer>(RENDER_CACHE_BYTES);
+
+  async get(key: string) {
+    return this.lru.get(key) || null;
+  }
+
+  async set(key: string, buffer: Buffer) {
+    this.lru.set(key, buffer, buffer.length);
+  }
+}
+
+class RedisRenderCacheStore implements RenderCacheStore {
+  constructor(private redis: Redis, private prefix = 'manty:renders') {}
+
+  async get(key: string) {
+    return this.redis.getBuffer(`${this.prefix}:${key}`);
+  }
+
+  async set(key: string, buffer: Buffer) {
+    await this.redis.set(`${this.prefix}:${key}`, buffer, 'EX', RENDER_TTL_SECONDS);
+  }
+}
+
+// Editor rendering on sharp. An operation list is fused into one plan and
+// executed as a single pipeline over pixels decoded once per source and
+// resolution, so a slider move costs one encode and never a re-decode of
+// the original. Results are content-addressed by source hash and plan.
+export class ImageRenderService {
+  private sources = new ByteLru<DecodedSource>(SOURCE_CACHE_BYTES);
+  // Lets a repeated render be answered from the cache without fetching
+  private hashesByUrl = new Map<string, string>();
+
+  constructor(private cache: RenderCacheStore) {}
+
+  async render(url: string, operations: ImageOperation[], options: RenderOptions = {}): Promise<RenderResult> {
+    const preview = options.preview ?? false;
+    const format = options.format || 'webp';
+    const plan = fuseOperations(operations);
+    const output = { preview, format };
+    const contentType = `image/${format}`;
+
+    try {
+      let sourceHash = this.hashesByUrl.get(url);
+      if (sourceHash) {
+        const key = renderKey(sourceHash, plan, output);
+        const cached = await this.readCache(key);
+        if (cached) return { buffer: cached, contentType, key, cached: true };
+      }
+
+      const level = preview ? 'preview' : 'full';
+      let source = sourceHash ? this.sources.get(`${sourceHash}:${level}`) : undefined;
+      if (!source) {
+        const original = await fetchImage(url, { timeoutMs: FETCH_TIMEOUT_MS });
+        sourceHash = createHash('sha256').update(original).digest('hex');
+        this.rememberHash(url, sourceHash);
+
+        const key = renderKey(sourceHash, plan, output);
+        const cached = await this.readCache(key);
+        if (cached) return { buffer: cached, contentType, key, cached: true };
+
+        source = await this.decode(original, preview);
+        this.sources.set(`${sourceHash}:${level}`, source, source.data.length);
+      }
+
+      const key = renderKey(sourceHash!, plan, output);
+      const buffer = await this.execute(source, plan, format, preview ? PREVIEW_QUALITY : FULL_QUALITY);
+      await this.writeCache(key, buffer);
+      return { buffer, contentType, key, cached: false };
+    } catch (error) {
+      console.error('Error rendering image:', error);
+      throw new Error('Failed to render image');
+    }
+  }
+
+  // EXIF orientation is applied here, once, so plans work in display space.
+  // The preview level uses shrink-on-load and is far cheaper to keep.
+  private async decode(original: Buffer, preview: boolean): Promise<DecodedSource> {
+    const metadata = await sharp(original, { failOn: 'none' }).metadata();
+    // Colour transforms are 3x3, so greyscale sources are expanded to RGB
+    let image = sharp(original, { failOn: 'none' }).rotate().toColourspace('srgb');
+    if (preview) image = image.resize(PREVIEW_SIZE, PREVIEW_SIZE, { fit: 'inside', withoutEnlargement: true });
+
+    const { data, info } = await image.raw().toBuffer({ resolveWithObject: true });
+    // Orientations 5-8 swap the stored width and height
+    const originalWidth = (metadata.orientation || 1) >= 5 ? metadata.height! : metadata.width!;
+
+    return {
+      data,
+      width: info.width,
+      height: info.height,
+      channels: info.channels,
+      scale: info.width / originalWidth,
+    };
+  }
+
+  private async execute(source: DecodedSource, plan: RenderPlan, format: RenderFormat, quality: number): Promise<Buffer> {
+    let image = sharp(source.data, {
+      raw: { width: source.width, height: source.height, channels: source.channels },
+    });
+
+    if (plan.mirror) image = image.flop();
+    if (plan.rotation) image = image.rotate(plan.rotation);
+
+    const quarterTurn = plan.rotation === 90 || plan.rotation === 270;
+    const width = quarterTurn ? source.height : source.width;
+    const height = quarterTurn ? source.width : source.height;
+
+    if (plan.crop) {
+      const left = Math.min(width - 1, Math.round(plan.crop.left * width));
+      const top = Math.min(height - 1, Math.round(plan.crop.top * height));
+      image = image.extract({
+        left,
+        top,
+        width: Math.max(1, Math.min(width - left, Math.round(plan.crop.width * width))),
+        height: Math.max(1, Math.min(height - top, Math.round(plan.crop.height * height))),
+      });
+    }
+
+    if (plan.resize) {
+      const scaled = (value?: number) => value && Math.max(1, Math.round(value * source.scale));
+      image = image.resize(scaled(plan.resize.width), scaled(plan.resize.height), { fit: 'fill' });
+    }
+
+    // sharp runs recomb before linear, which is the order of the fused
+    // transform; values are only clipped once, at the end, where applying
+    // the operations one by one would clip after each
+    if (plan.matrix) {
+      const m = plan.matrix;
+      image = image.recomb([[m[0], m[1], m[2]], [m[3], m[4], m[5]], [m[6], m[7], m[8]]]);
+    }
+    if (plan.offset && plan.offset.some(Boolean)) {
+      image = image.linear([1, 1, 1], plan.offset);
+    }
+
+    return format === 'jpeg'
+      ? image.jpeg({ quality, mozjpeg: true }).toBuffer()
+      : image.webp({ quality }).toBuffer();
+  }
+
+  private rememberHash(url: string, hash: string) {
+    if (this.hashesByUrl.size >= MAX_URL_HASHES) {
+      this.hashesByUrl.delete(this.hashesByUrl.keys().next().value!);
+    }
+    this.hashesByUrl.set(url, hash);
+  }
+
+  // The cache is an optimisation; a failing store only costs a re-render
+  private async readCache(key: string): Promise<Buffer | null> {
+    try {
+      return await this.cache.get(key);
+    } catch (error) {
+      console.error('Error reading render cache:', error);
+      return null;
+    }
+  }
+
+  private async writeCache(key: string, buffer: Buffer) {
+    try {
+      await this.cache.set(key, buffer);
+    } catch (error) {
+      console.error('Error writing render cache:', error);
+    }
+  }
+}
+
+const createRenderCache = (): RenderCacheStore => {
+  if (process.env.RENDER_CACHE_BACKEND === 'redis' && process.env.REDIS_URL) {
+    return new RedisRenderCacheStore(new Redis(process.env.REDIS_URL));
+  }
+  return new MemoryRenderCacheStore();
+};
+
+export const imageRenderService = new ImageRenderService(createRenderCache());
@@ -0,0 +1,49 @@
+import sharp from 'sharp';
+import { Worker } from 'worker_threads';
+import { fetchImage } from '@/lib/fetch-image';
+import { ImageStats, ImageStatsInput } from '@/lib/image-stats';
+import { WorkerPool } from '@/lib/worker-pool';
+import { isStorageUrl } from '@/services/storage/storage-service';
+
+// 64x64 keeps k-means at a few milliseconds while preserving every colour
+// that covers a meaningful share of the frame
+const SAMPLE_SIZE = 64;
+const PALETTE_SIZE = 5;
+const FETCH_TIMEOUT_MS = 10_000;
+
+export class ImageStatsService {
+  private pool = new WorkerPool<ImageStatsInput, ImageStats>(
+    () => new Worker(new URL('./image-stats.worker.ts', import.meta.url))
+  );
+
+  // Palette, brightness/contrast histogram, dominant hue and a lighting
+  // label. sharp decodes and downsamples on libvips threads; clustering runs
+  // in the worker pool so neither blocks the event loop.
+  async extract(source: string | Buffer): Promise<ImageStats> {
+    try {
+      const image = typeof source === 'string' ? await this.fetchImage(source) : source;
+
+      const { data } = await sharp(image, { failOn: 'none' })
+        .rotate()
+        .resize(SAMPLE_SIZE, SAMPLE_SIZE, { fit: 'inside' })
+        .removeAlpha()
+        .toColourspace('srgb')
+        .raw()
+        .toBuffer({ resolveWithObject: true });
+
+      const pixels = new Uint8Array(data.buffer, data.byteOffset, data.byteLength).slice();
+      return await this.pool.run({ pixels, paletteSize: PALETTE_SIZE }, [pixels.buffer]);
+    } catch (error) {
+      console.error('Error extracting image stats:', error);
+      throw new Error('Failed to extract image stats');
+    }
+  }
+
+  // Only our own storage is fetched, without following redirects
+  private async fetchImage(url: string): Promise<Buffer> {
+    if (!isStorageUrl(url)) throw new Error('Image is not in media storage');
+    return fetchImage(url, { timeoutMs: FETCH_TIMEOUT_MS, redirect: 'error' });
+  }
+}
+
+export const imageStatsService = new ImageStatsService();
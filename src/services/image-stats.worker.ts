@@ -0,0 +1,10 @@
+import { parentPort } from 'worker_threads';
+import { computeImageStats, ImageStatsInput } from '@/lib/image-stats';
+
+parentPort!.on('message', (input: ImageStatsInput) => {
+  try {
+    parentPort!.postMessage({ result: computeImageStats(input) });
+  } catch (error) {
+    parentPort!.postMessage({ error: error instanceof Error ? error.message : String(error) });
+  }
+});
@@ -0,0 +1,62 @@
+import { openaiService, AnalysisTier, AnalysisUsage } from '@/services/openai';
+import { imageStatsService } from '@/services/image-stats';
+import { PLAN_ANALYSIS_TIERS } from '@/lib/constants';
+import { MediaAnalysisResult } from '@/lib/validation';
+import { ImageStats } from '@/lib/image-stats';
+
+export interface AnalyzedMedia extends MediaAnalysisResult {
+  imageStats: ImageStats | null;
+}
+
+interface AnalyzeOptions {
+  // Explicit choice from the request; must be allowed by the plan
+  tier?: AnalysisTier;
+  plan?: string;
+}
+
+export type Plan = keyof typeof PLAN_ANALYSIS_TIERS;
+
+const planTiers = (plan?: string): readonly AnalysisTier[] => {
+  return PLAN_ANALYSIS_TIERS[plan as Plan] || PLAN_ANALYSIS_TIERS.free;
+};
+
+export const isTierAllowed = (tier: AnalysisTier, plan?: string): boolean => {
+  return planTiers(plan).includes(tier);
+};
+
+// The explicit request when the plan allows it, otherwise the plan's default
+export const resolveAnalysisTier = (options: AnalyzeOptions): AnalysisTier => {
+  const allowed = planTiers(options.plan);
+  if (options.tier && allowed.includes(options.tier)) return options.tier;
+  return allowed[0];
+};
+
+export class MediaAnalysisService {
+  // The vision model and the local image statistics run side by side; the
+  // model only answers semantic questions, the pixels supply palette and
+  // lighting. If local extraction fails the analysis still completes.
+  async analyze(
+    imageUrl: string,
+    options: AnalyzeOptions = {}
+  ): Promise<{ analysis: AnalyzedMedia; usage: AnalysisUsage }> {
+    const tier = resolveAnalysisTier(options);
+    const [{ analysis: semantic, usage }, imageStats] = await Promise.all([
+      openaiService.analyzeMedia(imageUrl, tier),
+      imageStatsService.extract(imageUrl).catch(() => null),
+    ]);
+
+    console.info('Media analysis usage:', JSON.stringify(usage));
+
+    return {
+      analysis: {
+        ...semantic,
+        colorPalette: imageStats?.colorPalette || [],
+        lighting: imageStats?.lighting || 'unknown',
+        imageStats,
+      },
+      usage,
+    };
+  }
+}
+
+export const mediaAnalysisService = new MediaAnalysisService();
@@ -0,0 +1,177 @@
+import { v2 as cloudinary } from 'cloudinary';
+import sharp from 'sharp';
+import { PLATFORM_SPECS, UPLOAD_COMPRESSION } from '@/lib/constants';
+import { prisma } from '@/lib/db';
+import { s3Service } from '@/services/storage/s3';
+import type { UploadProvider } from '@/services/storage/direct-upload';
+
+export type AspectRatio = (typeof PLATFORM_SPECS)[keyof typeof PLATFORM_SPECS]['aspectRatios'][number];
+
+// Stored on MediaFile.metadata.variants
+export interface MediaVariants {
+  thumbnail: string;
+  crops: Partial<Record<AspectRatio, string>>;
+}
+
+interface StoredMediaFile {
+  id: string;
+  filename: string;
+  mimeType: string;
+  metadata: unknown;
+}
+
+interface VariantSource {
+  provider: UploadProvider;
+  // Cloudinary public id or S3 object key
+  key: string;
+  mimeType: string;
+}
+
+// Every ratio any platform accepts, rendered once instead of per platform
+export const ASPECT_RATIOS = Array.from(
+  new Set(Object.values(PLATFORM_SPECS).flatMap(spec => spec.aspectRatios))
+) as AspectRatio[];
+
+const THUMBNAIL_SIZE = 300;
+
+// Crop size at the platforms' display short edge, e.g. 4:5 -> 1080x1350
+export const cropDimensions = (ratio: AspectRatio): { width: number; height: number } => {
+  const [w, h] = ratio.split(':').map(Number);
+  const scale = UPLOAD_COMPRESSION.targetShortEdge / Math.min(w, h);
+  return { width: Math.round(w * scale), height: Math.round(h * scale) };
+};
+
+const variantName = (ratio: AspectRatio) => ratio.replace(':', 'x');
+const variantKey = (key: string, name: string) => `variants/${key.replace(/\.[^./]+$/, '')}/${name}.webp`;
+
+// Every S3 object renderWithSharp writes for an original
+export const s3VariantKeys = (key: string): string[] => {
+  return ['thumbnail', ...ASPECT_RATIOS.map(variantName)].map(name => variantKey(key, name));
+};
+
+const cloudinaryTransformation = (width: number, height: number) => ({
+  width,
+  height,
+  crop: 'fill',
+  gravity: 'auto',
+  quality: 'auto',
+  fetch_format: 'auto',
+});
+
+// Renders the thumbnail and every platform crop when a file is uploaded,
+// so the editor and previews open on finished assets instead of waiting
+// for transformations on first view
+export class MediaVariantService {
+  async generate(source: VariantSource): Promise<MediaVariants | null> {
+    const isVideo = source.mimeType.startsWith('video/');
+    // sharp cannot crop video; on S3 those keep the original until the
+    // video pipeline produces frames
+    if (isVideo && source.provider === 's3') return null;
+
+    return source.provider === 's3'
+      ? this.renderWithSharp(source.key)
+      : this.requestFromCloudinary(source.key, isVideo);
+  }
+
+  // Generates and stores the variants for a MediaFile. Failures are logged
+  // and leave the file usable; variants are then produced lazily.
+  async generateForMediaFile(mediaFileId: string, source: VariantSource): Promise<MediaVariants | null> {
+    try {
+      const variants = await this.generate(source);
+      if (!variants) return null;
+
+      const mediaFile = await prisma.mediaFile.findUnique({ where: { id: mediaFileId }, select: { metadata: true } });
+      const metadata = (mediaFile?.metadata as Record<string, unknown> | null) || {};
+
+      await prisma.mediaFile.update({
+        where: { id: mediaFileId },
+        data: {
+          thumbnailUrl: variants.thumbnail,
+          metadata: { ...metadata, variants: { ...variants } },
+        },
+      });
+      return variants;
+    } catch (error) {
+      console.error('Error generating media variants:', error);
+      return null;
+    }
+  }
+
+  // The variants stored for a media file, generated now when the upload
+  // stage did not produce them
+  async ensureForMediaFile(media: StoredMediaFile): Promise<MediaVariants | null> {
+    const metadata = media.metadata as { provider?: string; variants?: MediaVariants } | null;
+    if (metadata?.variants) return metadata.variants;
+
+    return this.generateForMediaFile(media.id, {
+      provider: metadata?.provider === 's3' ? 's3' : 'cloudinary',
+      key: media.filename,
+      mimeType: media.mimeType,
+    });
+  }
+
+  // Eager transformations are created by a single explicit call; their URLs
+  // are the same deterministic URLs a lazy request would use. Video
+  // derivatives are slow, so Cloudinary builds those asynchronously.
+  private async requestFromCloudinary(publicId: string, isVideo: boolean): Promise<MediaVariants> {
+    const resourceType = isVideo ? 'video' : 'image';
+    // A still frame for video thumbnails; the format is part of the eager
+    // entry so the stored URL points at a derivative that was generated
+    const thumbnail = {
+      ...cloudinaryTransformation(THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+      ...(isVideo ? { format: 'jpg' } : {}),
+    };
+    const crops = ASPECT_RATIOS.map(ratio => {
+      const { width, height } = cropDimensions(ratio);
+      return { ratio, transformation: cloudinaryTransformation(width, height) };
+    });
+
+    await cloudinary.uploader.explicit(publicId, {
+      type: 'upload',
+      resource_type: resourceType,
+      eager: [thumbnail, ...crops.map(crop => crop.transformation)],
+      eager_async: isVideo,
+    });
+
+    const url = (transformation: object) => cloudinary.url(publicId, {
+      secure: true,
+      resource_type: resourceType,
+      ...transformation,
+    });
+
+    return {
+      thumbnail: url(thumbnail),
+      crops: Object.fromEntries(crops.map(crop => [crop.ratio, url(crop.transformation)])),
+    };
+  }
+
+  // The original is downloaded once and every clone reads the same buffer,
+  // but each clone decodes it again; the renders run in parallel on libvips
+  // threads and the uploads run in parallel too
+  private async renderWithSharp(key: string): Promise<MediaVariants> {
+    const base = sharp(await s3Service.download(key), { failOn: 'none' }).rotate();
+
+    const render = async (name: string, width: number, height: number) => {
+      const body = await base.clone()
+        .resize(width, height, { fit: 'cover', position: sharp.strategy.attention })
+        .webp({ quality: 82 })
+        .toBuffer();
+      return s3Service.upload(variantKey(key, name), body, { contentType: 'image/webp' });
+    };
+
+    const [thumbnail, ...crops] = await Promise.all([
+      render('thumbnail', THUMBNAIL_SIZE, THUMBNAIL_SIZE),
+      ...ASPECT_RATIOS.map(ratio => {
+        const { width, height } = cropDimensions(ratio);
+        return render(variantName(ratio), width, height);
+      }),
+    ]);
+
+    return {
+      thumbnail,
+      crops: Object.fromEntries(ASPECT_RATIOS.map((ratio, i) => [ratio, crops[i]])),
+    };
+  }
+}
+
+export const mediaVariantService = new MediaVariantService();
@@ -0,0 +1,77 @@
+import { VectorMatch, VectorRecord, VectorStore } from '@/services/vector-store';
+
+const normalize = (values: number[]): Float32Array => {
+  const vector = Float32Array.from(values);
+  let norm = 0;
+  for (let i = 0; i < vector.length; i++) norm += vector[i] * vector[i];
+  norm = Math.sqrt(norm) || 1;
+  for (let i = 0; i < vector.length; i++) vector[i] /= norm;
+  return vector;
+};
+
+// Exact brute-force search over unit vectors held in process memory. Good
+// for development, tests and catalogs of a few tens of thousands of trends;
+// results are lost on restart and not shared between instances.
+export class MemoryVectorStore implements VectorStore {
+  readonly name = 'memory';
+  private ids: string[] = [];
+  private vectors: Float32Array[] = [];
+  private positions = new Map<string, number>();
+
+  get size(): number {
+    return this.ids.length;
+  }
+
+  async upsert(records: VectorRecord[]) {
+    for (const record of records) {
+      const vector = normalize(record.values);
+      const position = this.positions.get(record.id);
+
+      if (position !== undefined) {
+        this.vectors[position] = vector;
+      } else {
+        this.positions.set(record.id, this.ids.length);
+        this.ids.push(record.id);
+        this.vectors.push(vector);
+      }
+    }
+  }
+
+  async query(vector: number[], topK: number): Promise<VectorMatch[]> {
+    const query = normalize(vector);
+    // Kept sorted by descending score; only the best topK survive
+    const best: VectorMatch[] = [];
+
+    for (let row = 0; row < this.vectors.length; row++) {
+      const candidate = this.vectors[row];
+      let score = 0;
+      for (let i = 0; i < query.length; i++) score += query[i] * candidate[i];
+
+      if (best.length === topK && score <= best[best.length - 1].score) continue;
+
+      let position = best.length;
+      while (position > 0 && best[position - 1].score < score) position--;
+      best.splice(position, 0, { id: this.ids[row], score });
+      if (best.length > topK) best.pop();
+    }
+
+    return best;
+  }
+
+  async delete(ids: string[]) {
+    for (const id of ids) {
+      const position = this.positions.get(id);
+      if (position === undefined) continue;
+
+      // Move the last row into the gap so storage stays dense
+      const last = this.ids.length - 1;
+      this.ids[position] = this.ids[last];
+      this.vectors[position] = this.vectors[last];
+      this.positions.set(this.ids[position], position);
+
+      this.ids.pop();
+      this.vectors.pop();
+      this.positions.delete(id);
+    }
+  }
+}
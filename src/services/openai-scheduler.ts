@@ -0,0 +1,329 @@
+import Redis from 'ioredis';
+
+export type SchedulerPriority = 'interactive' | 'batch';
+
+export interface ScheduleOptions {
+  priority?: SchedulerPriority;
+  estimatedTokens: number;
+  maxRetries?: number;
+  // Aborting drops the job if it is still queued and stops further retries
+  signal?: AbortSignal;
+}
+
+interface RateLimits {
+  requestsPerMinute: number;
+  tokensPerMinute: number;
+}
+
+interface QueuedJob<T = any> {
+  run: () => Promise<T>;
+  resolve: (value: T) => void;
+  reject: (error: unknown) => void;
+  priority: SchedulerPriority;
+  tokens: number;
+  attempt: number;
+  maxRetries: number;
+  signal?: AbortSignal;
+}
+
+interface RateLimitBucket {
+  // Resolves to 0 when the request was admitted, otherwise the number of
+  // milliseconds to wait before trying again.
+  acquire(tokens: number): Promise<number>;
+  // Gives back an admission that ended up unused
+  release(tokens: number): Promise<void>;
+}
+
+const WINDOW_MS = 60_000;
+const BASE_BACKOFF_MS = 500;
+const MAX_BACKOFF_MS = 30_000;
+const CHARS_PER_TOKEN = 4;
+
+// Rough per-image token cost for vision requests (OpenAI's published figures).
+export const IMAGE_TOKENS = {
+  low: 85,
+  high: 765,
+} as const;
+
+export const estimateTokens = (text: string): number => {
+  return Math.ceil(text.length / CHARS_PER_TOKEN);
+};
+
+class LocalBucket implements RateLimitBucket {
+  private requests: number;
+  private tokens: number;
+  private updatedAt = Date.now();
+
+  constructor(private limits: RateLimits) {
+    this.requests = limits.requestsPerMinute;
+    this.tokens = limits.tokensPerMinute;
+  }
+
+  async acquire(cost: number): Promise<number> {
+    const { requestsPerMinute, tokensPerMinute } = this.limits;
+    const now = Date.now();
+    const elapsed = now - this.updatedAt;
+    this.updatedAt = now;
+
+    this.requests = Math.min(requestsPerMinute, this.requests + (elapsed * requestsPerMinute) / WINDOW_MS);
+    this.tokens = Math.min(tokensPerMinute, this.tokens + (elapsed * tokensPerMinute) / WINDOW_MS);
+
+    const needed = Math.min(cost, tokensPerMinute);
+    if (this.requests >= 1 && this.tokens >= needed) {
+      this.requests -= 1;
+      this.tokens -= needed;
+      return 0;
+    }
+
+    const requestWait = ((1 - this.requests) * WINDOW_MS) / requestsPerMinute;
+    const tokenWait = ((needed - this.tokens) * WINDOW_MS) / tokensPerMinute;
+    return Math.ceil(Math.max(requestWait, tokenWait, 0));
+  }
+
+  async release(cost: number) {
+    const { requestsPerMinute, tokensPerMinute } = this.limits;
+    this.requests = Math.min(requestsPerMinute, this.requests + 1);
+    this.tokens = Math.min(tokensPerMinute, this.tokens + Math.min(cost, tokensPerMinute));
+  }
+}
+
+// Both buckets are refilled and debited in one atomic script so that every
+// instance sharing the Redis sees the same budget.
+const BUCKET_PRELUDE = `
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local requestCap = tonumber(ARGV[2])
+local tokenCap = tonumber(ARGV[3])
+local needed = math.min(tonumber(ARGV[4]), tokenCap)
+
+local function refill(key, cap)
+  local data = redis.call('HMGET', key, 'level', 'ts')
+  local level = tonumber(data[1]) or cap
+  local ts = tonumber(data[2]) or now
+  return math.min(cap, level + (now - ts) * cap / window)
+end
+
+local function store(key, level)
+  redis.call('HSET', key, 'level', level, 'ts', now)
+  redis.call('PEXPIRE', key, window * 2)
+end
+
+local requests = refill(KEYS[1], requestCap)
+local tokens = refill(KEYS[2], tokenCap)
+`;
+
+const ACQUIRE_SCRIPT = `${BUCKET_PRELUDE}
+if requests >= 1 and tokens >= needed then
+  store(KEYS[1], requests - 1)
+  store(KEYS[2], tokens - needed)
+  return 0
+end
+
+local wait = 0
+if requests < 1 then wait = math.max(wait, (1 - requests) * window / requestCap) end
+if tokens < needed then wait = math.max(wait, (needed - tokens) * window / tokenCap) end
+return math.ceil(wait)
+`;
+
+const RELEASE_SCRIPT = `${BUCKET_PRELUDE}
+store(KEYS[1], math.min(requestCap, requests + 1))
+store(KEYS[2], math.min(tokenCap, tokens + needed))
+return 0
+`;
+
+class RedisBucket implements RateLimitBucket {
+  constructor(
+    private redis: Redis,
+    private limits: RateLimits,
+    private keyPrefix = 'manty:openai-rate'
+  ) {}
+
+  async acquire(cost: number): Promise<number> {
+    return Number(await this.run(ACQUIRE_SCRIPT, cost));
+  }
+
+  async release(cost: number) {
+    await this.run(RELEASE_SCRIPT, cost);
+  }
+
+  private run(script: string, cost: number) {
+    return this.redis.eval(
+      script,
+      2,
+      `${this.keyPrefix}:requests`,
+      `${this.keyPrefix}:tokens`,
+      WINDOW_MS,
+      this.limits.requestsPerMinute,
+      this.limits.tokensPerMinute,
+      cost
+    );
+  }
+}
+
+const isRetryable = (error: any): boolean => {
+  const status = error?.status;
+  if (status === 429 || (typeof status === 'number' && status >= 500)) return true;
+  // Network failures surface without a status code
+  return error?.name === 'APIConnectionError' || error?.code === 'ECONNRESET';
+};
+
+const retryAfterMs = (error: any): number | null => {
+  const header = error?.headers?.['retry-after'];
+  const seconds = header ? Number(header) : NaN;
+  return Number.isFinite(seconds) ? seconds * 1000 : null;
+};
+
+export class OpenAIScheduler {
+  private queues: Record<SchedulerPriority, QueuedJob[]> = {
+    interactive: [],
+    batch: [],
+  };
+  private timer: NodeJS.Timeout | null = null;
+  private draining = false;
+  // Signals of batch work that an interactive caller is now waiting on
+  private promoted = new WeakSet<AbortSignal>();
+
+  constructor(private bucket: RateLimitBucket) {}
+
+  schedule<T>(run: () => Promise<T>, options: ScheduleOptions): Promise<T> {
+    return new Promise<T>((resolve, reject) => {
+      const { signal } = options;
+      if (signal?.aborted) {
+        reject(signal.reason);
+        return;
+      }
+
+      const job: QueuedJob<T> = {
+        run,
+        resolve,
+        reject,
+        priority: options.priority || 'interactive',
+        tokens: options.estimatedTokens,
+        attempt: 0,
+        maxRetries: options.maxRetries ?? 4,
+        signal,
+      };
+
+      signal?.addEventListener('abort', () => {
+        const queue = this.queues[job.priority];
+        const index = queue.indexOf(job);
+        if (index !== -1) {
+          queue.splice(index, 1);
+          reject(signal.reason);
+        }
+      }, { once: true });
+
+      this.enqueue(job);
+    });
+  }
+
+  get pending(): number {
+    return this.queues.interactive.length + this.queues.batch.length;
+  }
+
+  // Moves batch work to the interactive lane once a user is waiting on its
+  // result. Jobs are identified by their abort signal; one that has not been
+  // scheduled yet, or is backing off before a retry, is promoted when queued.
+  promote(signal: AbortSignal) {
+    this.promoted.add(signal);
+
+    const index = this.queues.batch.findIndex(job => job.signal === signal);
+    if (index === -1) return;
+
+    const [job] = this.queues.batch.splice(index, 1);
+    job.priority = 'interactive';
+    this.queues.interactive.push(job);
+  }
+
+  private enqueue(job: QueuedJob) {
+    if (job.signal && this.promoted.has(job.signal)) job.priority = 'interactive';
+    this.queues[job.priority].push(job);
+    this.drain();
+  }
+
+  private peek(): QueuedJob | undefined {
+    return this.queues.interactive[0] || this.queues.batch[0];
+  }
+
+  private async drain() {
+    if (this.draining || this.timer) return;
+    this.draining = true;
+
+    try {
+      for (let job = this.peek(); job; job = this.peek()) {
+        const wait = await this.bucket.acquire(job.tokens);
+        if (wait > 0) {
+          this.timer = setTimeout(() => {
+            this.timer = null;
+            this.drain();
+          }, wait);
+          return;
+        }
+
+        // While we waited on the bucket an interactive job may have arrived,
+        // or this one been aborted. The budget was sized for this job, so it
+        // only runs if still first; otherwise the budget goes back and the
+        // new head is admitted on its own estimate.
+        if (this.peek() !== job) {
+          await this.bucket.release(job.tokens);
+          continue;
+        }
+
+        this.queues[job.priority].shift();
+        this.execute(job);
+      }
+    } catch (error) {
+      // Bucket backend unavailable: fail the queued work rather than hang
+      console.error('Error acquiring OpenAI rate limit:', error);
+      for (const queued of [...this.queues.interactive, ...this.queues.batch]) {
+        queued.reject(error);
+      }
+      this.queues = { interactive: [], batch: [] };
+    } finally {
+      this.draining = false;
+    }
+  }
+
+  private async execute(job: QueuedJob) {
+    try {
+      job.resolve(await job.run());
+    } catch (error) {
+      if (job.signal?.aborted || !isRetryable(error) || job.attempt >= job.maxRetries) {
+        job.reject(error);
+        return;
+      }
+
+      const ceiling = Math.min(MAX_BACKOFF_MS, BASE_BACKOFF_MS * 2 ** job.attempt);
+      const delay = retryAfterMs(error) ?? Math.random() * ceiling;
+      job.attempt += 1;
+
+      // The job is outside the queue while it backs off, so the listener in
+      // schedule() cannot see it; an abort now must cancel the retry itself
+      const { signal } = job;
+      const onAbort = () => {
+        clearTimeout(timer);
+        job.reject(signal!.reason);
+      };
+      const timer = setTimeout(() => {
+        signal?.removeEventListener('abort', onAbort);
+        this.enqueue(job);
+      }, delay);
+      signal?.addEventListener('abort', onAbort, { once: true });
+    }
+  }
+}
+
+const createScheduler = (): OpenAIScheduler => {
+  const limits: RateLimits = {
+    requestsPerMinute: Number(process.env.OPENAI_RPM_LIMIT) || 500,
+    tokensPerMinute: Number(process.env.OPENAI_TPM_LIMIT) || 30_000,
+  };
+
+  if (process.env.OPENAI_SCHEDULER_BACKEND === 'redis' && process.env.REDIS_URL) {
+    return new OpenAIScheduler(new RedisBucket(new Redis(process.env.REDIS_URL), limits));
+  }
+  return new OpenAIScheduler(new LocalBucket(limits));
+};
+
+export const openaiScheduler = createScheduler();
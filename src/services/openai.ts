@@ -1,96 +1,313 @@
 import OpenAI from 'openai';
-import { MediaAnalysis, CaptionRequest } from '@/types';
+import { CaptionRequest, Platform } from '@/types';
+import { compactAnalysis, getCaptionLimits } from '@/lib/captions';
+import { parseModelJson, StreamingJsonParser } from '@/lib/tolerant-json';
+import {
+  semanticAnalysisSchema,
+  captionListSchema,
+  captionTextSchema,
+  multiPlatformCaptionSchema,
+  multiPlatformCaptionJsonSchema,
+  SemanticAnalysisResult,
+  SEMANTIC_ANALYSIS_JSON_SCHEMA,
+  CAPTION_LIST_JSON_SCHEMA,
+} from '@/lib/validation';
+import { openaiScheduler, estimateTokens, IMAGE_TOKENS, SchedulerPriority } from './openai-scheduler';
 
 const openai = new OpenAI({
   apiKey: process.env.OPENAI_API_KEY,
+  // Retries are handled by the scheduler so they count against the rate budget
+  maxRetries: 0,
 });
 
+const VISION_MODEL = process.env.OPENAI_VISION_MODEL || "gpt-4-vision-preview";
+const CAPTION_MODEL = process.env.OPENAI_CAPTION_MODEL || "gpt-4";
+
+// Structured outputs (json_schema) and the older JSON mode are only available
+// on some models; everything else relies on the tolerant parser alone.
+const STRUCTURED_OUTPUT_MODELS = /^(gpt-4o(?!-2024-05-13)|gpt-4\.1|o[134])/;
+const JSON_MODE_MODELS = /^(gpt-4o|gpt-4-turbo|gpt-4-\d{4}-preview|gpt-3\.5-turbo)/;
+
+const jsonResponseFormat = (model: string, name: string, schema: Record<string, unknown>) => {
+  if (STRUCTURED_OUTPUT_MODELS.test(model)) {
+    return { response_format: { type: 'json_schema' as const, json_schema: { name, schema, strict: true } } };
+  }
+  if (JSON_MODE_MODELS.test(model)) {
+    return { response_format: { type: 'json_object' as const } };
+  }
+  return {};
+};
+
+const CAPTION_SYSTEM_PROMPT = "You are a social media expert who creates viral content. Generate engaging captions that match current trends and platform best practices.";
+
+// The analysis instructions are fixed, so their size is known up front
+const ANALYSIS_PROMPT_TOKENS = 90;
+
+export type AnalysisTier = 'fast' | 'deep';
+
+// "deep" is the original call unchanged: the full vision model at the API's
+// default detail with the original output budget. "fast" sends a low-detail
+// image (85 tokens flat) to a smaller model.
+const ANALYSIS_TIERS: Record<AnalysisTier, { model: string; detail?: 'low' | 'high'; maxTokens: number }> = {
+  fast: { model: process.env.OPENAI_FAST_VISION_MODEL || 'gpt-4o-mini', detail: 'low', maxTokens: 300 },
+  deep: { model: VISION_MODEL, maxTokens: 1000 },
+};
+
+// USD per million input / output tokens, for the per-analysis cost report
+const MODEL_PRICING: [RegExp, number, number][] = [
+  [/^gpt-4o-mini/, 0.15, 0.6],
+  [/^gpt-4o/, 2.5, 10],
+  [/^gpt-4\.1-mini/, 0.4, 1.6],
+  [/^gpt-4\.1/, 2, 8],
+  [/^gpt-4-(vision-preview|turbo|\d{4}-preview)/, 10, 30],
+];
+
+export interface AnalysisUsage {
+  tier: AnalysisTier;
+  model: string;
+  latencyMs: number;
+  promptTokens: number;
+  completionTokens: number;
+  // null when the model has no entry in MODEL_PRICING
+  costUsd: number | null;
+}
+
+const analysisCost = (model: string, promptTokens: number, completionTokens: number): number | null => {
+  const pricing = MODEL_PRICING.find(([pattern]) => pattern.test(model));
+  if (!pricing) return null;
+  // Rounded to the nearest millionth of a dollar
+  return Math.round(promptTokens * pricing[1] + completionTokens * pricing[2]) / 1e6;
+};
+
 export class OpenAIService {
-  async analyzeMedia(imageUrl: string): Promise<MediaAnalysis> {
+  // Semantic fields only. Palette and lighting come from local image
+  // statistics, which are faster and deterministic (see media-analysis.ts).
+  async analyzeMedia(
+    imageUrl: string,
+    tier: AnalysisTier = 'deep',
+    priority: SchedulerPriority = 'interactive'
+  ): Promise<{ analysis: SemanticAnalysisResult; usage: AnalysisUsage }> {
+    const { model, detail, maxTokens } = ANALYSIS_TIERS[tier];
+    const startedAt = Date.now();
+
     try {
-      const response = await openai.chat.completions.create({
-        model: "gpt-4-vision-preview",
+      const response = await openaiScheduler.schedule(() => openai.chat.completions.create({
+        model,
         messages: [
           {
             role: "user",
             content: [
               {
                 type: "text",
-                text: `Analyze this image and provide a detailed analysis in JSON format with the following structure:
-                {
-                  "mood": "string",
-                  "moodConfidence": number,
-                  "sceneType": "string", 
-                  "sceneConfidence": number,
-                  "colorPalette": ["hex codes"],
-                  "objects": ["detected objects"],
-                  "composition": "string",
-                  "style": "string",
-                  "lighting": "string",
-                  "emotions": ["detected emotions"]
-                }`
+                text: `Analyze this image. Reply with JSON only:
+{"mood": string, "moodConfidence": 0-1, "sceneType": string, "sceneConfidence": 0-1, "objects": [string], "composition": string, "style": string, "emotions": [string]}`
               },
               {
                 type: "image_url",
                 image_url: {
                   url: imageUrl,
+                  ...(detail ? { detail } : {}),
                 },
               },
             ],
           }
         ],
-        max_tokens: 1000,
+        max_tokens: maxTokens,
+        ...jsonResponseFormat(model, 'media_analysis', SEMANTIC_ANALYSIS_JSON_SCHEMA),
+      }), {
+        priority,
+        // The default detail may go high, so it is budgeted as high
+        estimatedTokens: ANALYSIS_PROMPT_TOKENS + IMAGE_TOKENS[detail || 'high'] + maxTokens,
       });
 
       const analysisText = response.choices[0].message.content;
-      return JSON.parse(analysisText || '{}');
+      const promptTokens = response.usage?.prompt_tokens || 0;
+      const completionTokens = response.usage?.completion_tokens || 0;
+
+      return {
+        analysis: semanticAnalysisSchema.parse(parseModelJson(analysisText)),
+        usage: {
+          tier,
+          model,
+          latencyMs: Date.now() - startedAt,
+          promptTokens,
+          completionTokens,
+          costUsd: analysisCost(model, promptTokens, completionTokens),
+        },
+      };
     } catch (error) {
       console.error('Error analyzing media:', error);
       throw new Error('Failed to analyze media');
     }
   }
 
-  async generateCaption(request: CaptionRequest): Promise<string[]> {
+  async generateCaption(
+    request: CaptionRequest,
+    priority: SchedulerPriority = 'interactive',
+    signal?: AbortSignal
+  ): Promise<string[]> {
+    try {
+      const params = this.buildCaptionParams(request);
+      const response = await openaiScheduler.schedule(
+        () => openai.chat.completions.create(params, { signal }),
+        { priority, signal, estimatedTokens: this.estimateCaptionTokens(params) }
+      );
+
+      const captionsText = response.choices[0].message.content;
+      return captionListSchema.parse(parseModelJson(captionsText));
+    } catch (error) {
+      console.error('Error generating captions:', error);
+      throw new Error('Failed to generate captions');
+    }
+  }
+
+  // Streams the completion and reports each caption as soon as its closing
+  // quote arrives, instead of waiting for the whole JSON document.
+  async streamCaptions(
+    request: CaptionRequest,
+    onCaption: (caption: string, index: number) => void,
+    options: { priority?: SchedulerPriority; signal?: AbortSignal } = {}
+  ): Promise<string[]> {
     try {
-      const prompt = `Generate ${request.count || 3} engaging social media captions for ${request.platform} with the following requirements:
+      const params = this.buildCaptionParams(request);
+      const stream = await openaiScheduler.schedule(
+        () => openai.chat.completions.create({ ...params, stream: true }, { signal: options.signal }),
+        { priority: options.priority, signal: options.signal, estimatedTokens: this.estimateCaptionTokens(params) }
+      );
+
+      const emitted: string[] = [];
+      // Only top-level caption items: depth 1 for a bare array, 2 inside the
+      // {"captions": [...]} envelope. Deeper arrays are per-caption hashtags.
+      const parser = new StreamingJsonParser((item, depth) => {
+        if (depth > 2) return;
+        const caption = captionTextSchema.safeParse(item);
+        if (caption.success && caption.data.trim()) {
+          emitted.push(caption.data.trim());
+          onCaption(caption.data.trim(), emitted.length - 1);
+        }
+      });
+
+      for await (const chunk of stream) {
+        parser.push(chunk.choices[0]?.delta?.content || '');
+      }
+
+      // A truncated response leaves the last caption unterminated; recover it
+      // from the repaired document so it is not silently dropped.
+      const captions = captionListSchema.parse(parser.value());
+      for (let i = emitted.length; i < captions.length; i++) {
+        emitted.push(captions[i]);
+        onCaption(captions[i], i);
+      }
+      return emitted;
+    } catch (error) {
+      console.error('Error streaming captions:', error);
+      throw new Error('Failed to generate captions');
+    }
+  }
+
+  // One completion for several platforms: the analysis is sent once and each
+  // platform's limits are spelled out, instead of one round-trip per platform.
+  async generateMultiPlatformCaptions(
+    request: Omit<CaptionRequest, 'platform'>,
+    platforms: Platform[],
+    priority: SchedulerPriority = 'interactive'
+  ): Promise<Partial<Record<Platform, string[]>>> {
+    try {
+      const count = request.count || 3;
+      const requirements = platforms.map(platform => {
+        const limits = getCaptionLimits(platform);
+        return limits
+          ? `      - ${platform}: at most ${limits.maxLength} characters and ${limits.maxHashtags} hashtags (ideally ${limits.recommendedHashtags})`
+          : `      - ${platform}: follow the platform's usual limits`;
+      });
+
+      const prompt = `Generate ${count} engaging social media captions for each of these platforms: ${platforms.join(', ')}.
       - Tone: ${request.tone}
       - Target audience: ${request.targetAudience || 'general'}
       - Include relevant hashtags
-      - Consider the image analysis: ${JSON.stringify(request.mediaAnalysis)}
-      - Match trending style for ${request.platform}
-      - Keep within character limits for ${request.platform}
+      - Consider the image analysis: ${JSON.stringify(compactAnalysis(request.mediaAnalysis))}
+      - Match the trending style of each platform
+      - Respect each platform's limits:
+${requirements.join('\n')}
 
-      Return as JSON array of caption strings.`;
+      Return a JSON object of the form {"captions": {"${platforms[0]}": ["caption text", ...], ...}} with one key per platform.`;
 
-      const response = await openai.chat.completions.create({
-        model: "gpt-4",
+      const params = {
+        model: CAPTION_MODEL,
         messages: [
           {
-            role: "system",
-            content: "You are a social media expert who creates viral content. Generate engaging captions that match current trends and platform best practices."
+            role: "system" as const,
+            content: CAPTION_SYSTEM_PROMPT
           },
           {
-            role: "user",
+            role: "user" as const,
             content: prompt
           }
         ],
-        max_tokens: 1000,
+        max_tokens: Math.min(4000, 300 * count * platforms.length),
         temperature: 0.8,
-      });
+        ...jsonResponseFormat(CAPTION_MODEL, 'multi_platform_captions', multiPlatformCaptionJsonSchema(platforms)),
+      };
 
-      const captionsText = response.choices[0].message.content;
-      return JSON.parse(captionsText || '[]');
+      const response = await openaiScheduler.schedule(
+        () => openai.chat.completions.create(params),
+        { priority, estimatedTokens: this.estimateCaptionTokens(params) }
+      );
+
+      const byPlatform = multiPlatformCaptionSchema.parse(parseModelJson(response.choices[0].message.content));
+      return Object.fromEntries(
+        platforms.map(platform => [platform, byPlatform[platform] || []])
+      );
     } catch (error) {
-      console.error('Error generating captions:', error);
+      console.error('Error generating multi-platform captions:', error);
       throw new Error('Failed to generate captions');
     }
   }
 
-  async generateEmbedding(text: string): Promise<number[]> {
+  private buildCaptionParams(request: CaptionRequest) {
+    const prompt = `Generate ${request.count || 3} engaging social media captions for ${request.platform} with the following requirements:
+      - Tone: ${request.tone}
+      - Target audience: ${request.targetAudience || 'general'}
+      - Include relevant hashtags
+      - Consider the image analysis: ${JSON.stringify(compactAnalysis(request.mediaAnalysis))}
+      - Match trending style for ${request.platform}
+      - Keep within character limits for ${request.platform}
+
+      Return a JSON object of the form {"captions": ["caption text", ...]}.`;
+
+    return {
+      model: CAPTION_MODEL,
+      messages: [
+        {
+          role: "system" as const,
+          content: CAPTION_SYSTEM_PROMPT
+        },
+        {
+          role: "user" as const,
+          content: prompt
+        }
+      ],
+      max_tokens: 1000,
+      temperature: 0.8,
+      ...jsonResponseFormat(CAPTION_MODEL, 'caption_list', CAPTION_LIST_JSON_SCHEMA),
+    };
+  }
+
+  private estimateCaptionTokens(params: { messages: { content: string }[]; max_tokens: number }): number {
+    return estimateTokens(params.messages.map(m => m.content).join('\n')) + params.max_tokens;
+  }
+
+  async generateEmbedding(
+    text: string,
+    priority: SchedulerPriority = 'interactive'
+  ): Promise<number[]> {
     try {
-      const response = await openai.embeddings.create({
+      const response = await openaiScheduler.schedule(() => openai.embeddings.create({
         model: "text-embedding-ada-002",
         input: text,
+      }), {
+        priority,
+        estimatedTokens: estimateTokens(text),
       });
 
       return response.data[0].embedding;
@@ -99,6 +316,31 @@ export class OpenAIService {
       throw new Error('Failed to generate embedding');
     }
   }
+
+  // One request per batch of inputs; results come back in input order
+  async generateEmbeddings(
+    texts: string[],
+    priority: SchedulerPriority = 'batch'
+  ): Promise<number[][]> {
+    if (texts.length === 0) return [];
+
+    try {
+      const response = await openaiScheduler.schedule(() => openai.embeddings.create({
+        model: "text-embedding-ada-002",
+        input: texts,
+      }), {
+        priority,
+        estimatedTokens: texts.reduce((sum, text) => sum + estimateTokens(text), 0),
+      });
+
+      return [...response.data]
+        .sort((a, b) => a.index - b.index)
+        .map(item => item.embedding);
+    } catch (error) {
+      console.error('Error generating embeddings:', error);
+      throw new Error('Failed to generate embeddings');
+    }
+  }
 }
 
 export const openaiService = new OpenAIService();
\ No newline at end of file
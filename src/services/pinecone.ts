@@ -1,89 +1,73 @@
 import { Pinecone } from '@pinecone-database/pinecone';
-import { TrendMatch } from '@/types';
+import { VectorMatch, VectorRecord, VectorStore } from '@/services/vector-store';
 
-export class PineconeService {
+// Pinecone caps request sizes; these keep bulk writes well inside the limits
+const UPSERT_BATCH_SIZE = 100;
+const DELETE_BATCH_SIZE = 1000;
+
+export class PineconeVectorStore implements VectorStore {
+  readonly name = 'pinecone';
   private pinecone: Pinecone;
   private indexName: string;
 
-  constructor() {
+  constructor(indexName = process.env.PINECONE_INDEX_NAME || 'manty-trends') {
     this.pinecone = new Pinecone({
       apiKey: process.env.PINECONE_API_KEY!,
       environment: process.env.PINECONE_ENVIRONMENT!,
     });
-    this.indexName = process.env.PINECONE_INDEX_NAME || 'manty-trends';
+    this.indexName = indexName;
   }
 
   async getIndex() {
     return this.pinecone.index(this.indexName);
   }
 
-  async upsertTrend(trendId: string, embedding: number[], metadata: any) {
+  async upsert(records: VectorRecord[]) {
     try {
       const index = await this.getIndex();
 
-      await index.upsert([{
-        id: trendId,
-        values: embedding,
-        metadata
-      }]);
+      for (let i = 0; i < records.length; i += UPSERT_BATCH_SIZE) {
+        await index.upsert(records.slice(i, i + UPSERT_BATCH_SIZE).map(record => ({
+          id: record.id,
+          values: record.values,
+          metadata: record.metadata as any,
+        })));
+      }
     } catch (error) {
-      console.error('Error upserting trend:', error);
-      throw new Error('Failed to upsert trend');
+      console.error('Error upserting vectors:', error);
+      throw new Error('Failed to upsert vectors');
     }
   }
 
-  async findSimilarTrends(embedding: number[], topK: number = 5): Promise<TrendMatch[]> {
+  async query(vector: number[], topK: number): Promise<VectorMatch[]> {
     try {
       const index = await this.getIndex();
 
       const queryResponse = await index.query({
-        vector: embedding,
+        vector,
         topK,
-        includeMetadata: true,
       });
 
       return queryResponse.matches?.map(match => ({
-        trendId: match.id,
+        id: match.id,
         score: match.score || 0,
-        compatibilityReasons: this.generateCompatibilityReasons(match.score || 0)
       })) || [];
     } catch (error) {
-      console.error('Error finding similar trends:', error);
-      throw new Error('Failed to find similar trends');
-    }
-  }
-
-  async generateEmbedding(text: string): Promise<number[]> {
-    // This would typically use the same embedding model as OpenAI
-    // For now, we'll create a mock embedding
-    return new Array(1536).fill(0).map(() => Math.random() - 0.5);
-  }
-
-  private generateCompatibilityReasons(score: number): string[] {
-    if (score >= 0.8) {
-      return ['Excellent mood match', 'Perfect color palette alignment', 'Strong visual similarity'];
-    } else if (score >= 0.6) {
-      return ['Good thematic match', 'Similar visual elements', 'Complementary mood'];
-    } else {
-      return ['Basic compatibility', 'Some shared elements'];
+      console.error('Error querying vectors:', error);
+      throw new Error('Failed to query vectors');
     }
   }
 
-  async deleteTrend(trendId: string) {
+  async delete(ids: string[]) {
     try {
       const index = await this.getIndex();
-      await index.delete1([trendId]);
+
+      for (let i = 0; i < ids.length; i += DELETE_BATCH_SIZE) {
+        await index.deleteMany(ids.slice(i, i + DELETE_BATCH_SIZE));
+      }
     } catch (error) {
-      console.error('Error deleting trend:', error);
-      throw new Error('Failed to delete trend');
+      console.error('Error deleting vectors:', error);
+      throw new Error('Failed to delete vectors');
     }
   }
-
-  async searchTrends(query: string, filters?: any): Promise<TrendMatch[]> {
-    // Convert query to embedding first
-    const embedding = await this.generateEmbedding(query);
-    return this.findSimilarTrends(embedding);
-  }
 }
-
-export const pineconeService = new PineconeService();
\ No newline at end of file
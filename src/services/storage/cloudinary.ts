@@ -1,4 +1,5 @@
 import { v2 as cloudinary } from 'cloudinary';
+import { StorageService } from '@/services/storage/storage-service';
 
 cloudinary.config({
   cloud_name: process.env.CLOUDINARY_CLOUD_NAME,
@@ -6,17 +7,43 @@ cloudinary.config({
   api_secret: process.env.CLOUDINARY_API_SECRET,
 });
 
-export class CloudinaryService {
+// Most public ids one Admin API delete request accepts
+const DELETE_BATCH_SIZE = 100;
+
+// Network failures, throttling and server errors are worth retrying;
+// anything else (bad file, bad preset) will fail the same way again
+export class UploadError extends Error {
+  constructor(message: string, public status?: number) {
+    super(message);
+    this.name = 'UploadError';
+  }
+
+  get retryable(): boolean {
+    return this.status === undefined || this.status === 0 || this.status === 429 || this.status >= 500;
+  }
+}
+
+export class CloudinaryService implements StorageService {
+  readonly name = 'cloudinary';
+
   async uploadFile(
     file: File, 
-    progressCallback?: (progress: number) => void
+    progressCallback?: (progress: number) => void,
+    signal?: AbortSignal
   ): Promise<string> {
     return new Promise((resolve, reject) => {
+      if (signal?.aborted) {
+        reject(new UploadError('Upload cancelled'));
+        return;
+      }
+
       const formData = new FormData();
       formData.append('file', file);
       formData.append('upload_preset', 'manty_uploads'); // You need to create this preset
 
       const xhr = new XMLHttpRequest();
+      const abort = () => xhr.abort();
+      signal?.addEventListener('abort', abort, { once: true });
 
       xhr.upload.onprogress = (event) => {
         if (event.lengthComputable) {
@@ -26,15 +53,20 @@ export class CloudinaryService {
       };
 
       xhr.onload = () => {
+        signal?.removeEventListener('abort', abort);
         if (xhr.status === 200) {
           const response = JSON.parse(xhr.responseText);
           resolve(response.secure_url);
         } else {
-          reject(new Error('Upload failed'));
+          reject(new UploadError('Upload failed', xhr.status));
         }
       };
 
-      xhr.onerror = () => reject(new Error('Upload failed'));
+      xhr.onerror = () => {
+        signal?.removeEventListener('abort', abort);
+        reject(new UploadError('Upload failed'));
+      };
+      xhr.onabort = () => reject(new UploadError('Upload cancelled'));
 
       xhr.open('POST', `https://api.cloudinary.com/v1_1/${process.env.CLOUDINARY_CLOUD_NAME}/upload`);
       xhr.send(formData);
@@ -64,6 +96,32 @@ export class CloudinaryService {
     }
   }
 
+  // Bulk delete of originals together with all their derived assets, purged
+  // from the CDN. Ids already gone count as deleted. Returns the ids that
+  // failed, with Cloudinary's reason.
+  async deleteFiles(publicIds: string[], resourceType: 'image' | 'video' = 'image'): Promise<Map<string, string>> {
+    const failed = new Map<string, string>();
+
+    for (let i = 0; i < publicIds.length; i += DELETE_BATCH_SIZE) {
+      const batch = publicIds.slice(i, i + DELETE_BATCH_SIZE);
+      try {
+        const result = await cloudinary.api.delete_resources(batch, {
+          resource_type: resourceType,
+          invalidate: true,
+        });
+        batch.forEach(id => {
+          const status = result.deleted?.[id];
+          if (status !== 'deleted' && status !== 'not_found') failed.set(id, status || 'Delete failed');
+        });
+      } catch (error: any) {
+        console.error('Error deleting files:', error);
+        batch.forEach(id => failed.set(id, error?.error?.message || error?.message || 'Delete failed'));
+      }
+    }
+
+    return failed;
+  }
+
   async generateThumbnail(publicId: string): Promise<string> {
     return cloudinary.url(publicId, {
       width: 300,
@@ -83,9 +141,4 @@ export class CloudinaryService {
   }
 }
 
-export const cloudinaryService = {
-  upload: async (file: File) => {
-    // Implement upload logic here
-    return { url: '', public_id: '' };
-  }
-};
\ No newline at end of file
+export const cloudinaryService = new CloudinaryService();
@@ -0,0 +1,299 @@
+import { v2 as cloudinary } from 'cloudinary';
+import { createHmac, randomUUID, timingSafeEqual } from 'crypto';
+import { Prisma } from '@prisma/client';
+import { prisma } from '@/lib/db';
+import { FILE_UPLOAD_LIMITS } from '@/lib/constants';
+import { s3Service } from '@/services/storage/s3';
+import { mediaVariantService } from '@/services/media-variants';
+import { deletionService, storageTarget } from '@/services/deletion';
+
+export type UploadProvider = 'cloudinary' | 's3';
+
+export interface UploadRequest {
+  filename: string;
+  contentType: string;
+  size: number;
+}
+
+// Everything the browser needs to POST the file straight to storage, plus a
+// token it hands back to /api/media/complete-upload afterwards
+export interface SignedUpload {
+  provider: UploadProvider;
+  url: string;
+  fields: Record<string, string>;
+  token: string;
+  expiresAt: string;
+}
+
+interface UploadClaims {
+  userId: string;
+  provider: UploadProvider;
+  key: string;
+  originalName: string;
+  contentType: string;
+  exp: number;
+}
+
+// Rejections the caller caused, surfaced by the routes with this status
+export class DirectUploadError extends Error {
+  constructor(message: string, public status = 400) {
+    super(message);
+    this.name = 'DirectUploadError';
+  }
+}
+
+// Long enough for a large video on a slow connection, short enough that a
+// leaked signature is not worth much
+const SIGNATURE_TTL_SECONDS = 15 * 60;
+// An upload started just before the signature expired may finish well after
+const COMPLETION_GRACE_SECONDS = 60 * 60;
+// Margin after the token stops verifying before an uncompleted upload is
+// removed, so a completion in flight is never raced
+const EXPIRY_MARGIN_SECONDS = 5 * 60;
+const CLOUDINARY_FOLDER = 'manty';
+
+// Cloudinary format names for the allowed upload types
+const CLOUDINARY_FORMATS: Record<string, string> = {
+  'image/jpeg': 'jpg',
+  'image/png': 'png',
+  'image/webp': 'webp',
+  'video/mp4': 'mp4',
+  'video/mov': 'mov',
+};
+
+const base64url = (value: string | Buffer) => Buffer.from(value).toString('base64url');
+
+const extensionOf = (filename: string): string => {
+  const match = filename.match(/\.([a-z0-9]{1,8})$/i);
+  return match ? `.${match[1].toLowerCase()}` : '';
+};
+
+export class DirectUploadService {
+  constructor(private provider: UploadProvider) {}
+
+  // Validates the file against the upload limits and signs a one-off upload
+  // for it. No bytes pass through the API.
+  async createUpload(userId: string, request: UploadRequest): Promise<SignedUpload> {
+    if (!(FILE_UPLOAD_LIMITS.allowedTypes as readonly string[]).includes(request.contentType)) {
+      throw new DirectUploadError('File type is not supported');
+    }
+    if (!(request.size > 0) || request.size > FILE_UPLOAD_LIMITS.maxFileSize) {
+      throw new DirectUploadError('File is too large');
+    }
+
+    const id = randomUUID();
+    const exp = Math.floor(Date.now() / 1000) + SIGNATURE_TTL_SECONDS;
+
+    try {
+      const { url, fields, key } = this.provider === 's3'
+        ? await this.signS3(userId, id, request)
+        : this.signCloudinary(userId, id, request);
+
+      // Removed by the deletion outbox unless completeUpload registers it
+      // first, so uploads that are never completed do not orphan storage
+      await deletionService.queueDeletions(
+        [{ target: storageTarget(this.provider, request.contentType), key }],
+        new Date((exp + COMPLETION_GRACE_SECONDS + EXPIRY_MARGIN_SECONDS) * 1000)
+      );
+
+      const token = this.sign({
+        userId,
+        provider: this.provider,
+        key,
+        originalName: request.filename,
+        contentType: request.contentType,
+        exp,
+      });
+
+      return { provider: this.provider, url, fields, token, expiresAt: new Date(exp * 1000).toISOString() };
+    } catch (error) {
+      console.error('Error signing upload:', error);
+      throw new Error('Failed to sign upload');
+    }
+  }
+
+  // Registers the MediaFile once the browser reports the upload finished.
+  // Size and type come from storage, not from the client; a file that broke
+  // the limits is deleted again. Completing twice returns the same record.
+  async completeUpload(userId: string, token: string) {
+    const claims = this.verify(token);
+    if (!claims || claims.userId !== userId) {
+      throw new DirectUploadError('Invalid or expired upload token', 403);
+    }
+
+    const existingWhere = { userId_filename: { userId, filename: claims.key } };
+    const existing = await prisma.mediaFile.findUnique({ where: existingWhere });
+    if (existing) return existing;
+
+    const stored = claims.provider === 's3'
+      ? await this.describeS3(claims.key)
+      : await this.describeCloudinary(claims.key, claims.contentType);
+    if (!stored) {
+      throw new DirectUploadError('Upload not found in storage', 404);
+    }
+
+    if (stored.size > FILE_UPLOAD_LIMITS.maxFileSize) {
+      await this.remove(claims.provider, claims.key, claims.contentType);
+      throw new DirectUploadError('File is too large');
+    }
+
+    let mediaFile;
+    try {
+      [mediaFile] = await prisma.$transaction([
+        prisma.mediaFile.create({
+          data: {
+            userId,
+            filename: claims.key,
+            originalName: claims.originalName,
+            mimeType: stored.mimeType || claims.contentType,
+            size: stored.size,
+            url: stored.url,
+            metadata: { provider: claims.provider, ...stored.metadata },
+          },
+        }),
+        deletionService.cancelDeletions(storageTarget(claims.provider, claims.contentType), [claims.key]),
+      ]);
+    } catch (error) {
+      // A concurrent completion of the same upload registered it first
+      if (error instanceof Prisma.PrismaClientKnownRequestError && error.code === 'P2002') {
+        const registered = await prisma.mediaFile.findUnique({ where: existingWhere });
+        if (registered) return registered;
+      }
+      console.error('Error registering upload:', error);
+      throw new Error('Failed to register upload');
+    }
+
+    // Thumbnail and platform crops are rendered now, while the uploader is
+    // still showing progress, rather than on the first editor open
+    const variants = await mediaVariantService.generateForMediaFile(mediaFile.id, {
+      provider: claims.provider,
+      key: claims.key,
+      mimeType: mediaFile.mimeType,
+    });
+    if (!variants) return mediaFile;
+
+    return {
+      ...mediaFile,
+      thumbnailUrl: variants.thumbnail,
+      metadata: { ...(mediaFile.metadata as Record<string, unknown>), variants },
+    };
+  }
+
+  // Signed to the declared type: the resource type is fixed by the endpoint
+  // and allowed_formats makes Cloudinary reject any other format. Cloudinary
+  // cannot sign a size limit, so size is checked on completion, and an upload
+  // never completed is removed when its expiry comes up in the outbox.
+  private signCloudinary(userId: string, id: string, request: UploadRequest) {
+    const resourceType = request.contentType.startsWith('video/') ? 'video' : 'image';
+    const params = {
+      allowed_formats: CLOUDINARY_FORMATS[request.contentType],
+      folder: `${CLOUDINARY_FOLDER}/${userId}`,
+      public_id: id,
+      timestamp: Math.floor(Date.now() / 1000),
+    };
+    const signature = cloudinary.utils.api_sign_request(params, process.env.CLOUDINARY_API_SECRET!);
+
+    return {
+      url: `https://api.cloudinary.com/v1_1/${process.env.CLOUDINARY_CLOUD_NAME}/${resourceType}/upload`,
+      fields: {
+        allowed_formats: params.allowed_formats,
+        folder: params.folder,
+        public_id: params.public_id,
+        timestamp: String(params.timestamp),
+        api_key: process.env.CLOUDINARY_API_KEY!,
+        signature,
+      },
+      key: `${params.folder}/${id}`,
+    };
+  }
+
+  // A presigned POST rather than PUT so the size limit is a signed
+  // condition S3 enforces itself
+  private async signS3(userId: string, id: string, request: UploadRequest) {
+    const key = `uploads/${userId}/${id}${extensionOf(request.filename)}`;
+    const post = await new Promise<{ url: string; fields: Record<string, string> }>((resolve, reject) => {
+      s3Service.client.createPresignedPost({
+        Bucket: process.env.AWS_S3_BUCKET!,
+        Fields: { key, 'Content-Type': request.contentType },
+        Conditions: [['content-length-range', 1, FILE_UPLOAD_LIMITS.maxFileSize]],
+        Expires: SIGNATURE_TTL_SECONDS,
+      }, (error, data) => (error ? reject(error) : resolve(data)));
+    });
+
+    return { url: post.url, fields: post.fields, key };
+  }
+
+  private async describeCloudinary(publicId: string, contentType: string) {
+    try {
+      const resource = await cloudinary.api.resource(publicId, {
+        resource_type: contentType.startsWith('video/') ? 'video' : 'image',
+      });
+      return {
+        url: resource.secure_url as string,
+        size: resource.bytes as number,
+        mimeType: null,
+        metadata: { width: resource.width, height: resource.height, format: resource.format },
+      };
+    } catch (error: any) {
+      if (error?.error?.http_code === 404) return null;
+      console.error('Error reading uploaded file:', error);
+      throw new Error('Failed to read uploaded file');
+    }
+  }
+
+  private async describeS3(key: string) {
+    const head = await s3Service.head(key);
+    if (!head) return null;
+
+    return {
+      url: s3Service.objectUrl(key),
+      size: head.ContentLength || 0,
+      mimeType: head.ContentType || null,
+      metadata: { etag: head.ETag },
+    };
+  }
+
+  private async remove(provider: UploadProvider, key: string, contentType: string) {
+    try {
+      if (provider === 's3') {
+        await s3Service.deleteFile(key);
+      } else {
+        await cloudinary.uploader.destroy(key, {
+          resource_type: contentType.startsWith('video/') ? 'video' : 'image',
+        });
+      }
+    } catch (error) {
+      console.error('Error deleting rejected upload:', error);
+    }
+  }
+
+  // Stateless upload tokens: the claims plus an HMAC over them
+  private sign(claims: UploadClaims): string {
+    const payload = base64url(JSON.stringify(claims));
+    return `${payload}.${this.hmac(payload)}`;
+  }
+
+  private verify(token: string): UploadClaims | null {
+    const [payload, signature] = token.split('.');
+    if (!payload || !signature) return null;
+
+    const expected = Buffer.from(this.hmac(payload));
+    const actual = Buffer.from(signature);
+    if (expected.length !== actual.length || !timingSafeEqual(expected, actual)) return null;
+
+    try {
+      const claims: UploadClaims = JSON.parse(Buffer.from(payload, 'base64url').toString());
+      return (claims.exp + COMPLETION_GRACE_SECONDS) * 1000 > Date.now() ? claims : null;
+    } catch {
+      return null;
+    }
+  }
+
+  private hmac(payload: string): string {
+    return createHmac('sha256', process.env.NEXTAUTH_SECRET!).update(payload).digest('base64url');
+  }
+}
+
+export const directUploadService = new DirectUploadService(
+  process.env.UPLOAD_BACKEND === 's3' ? 's3' : 'cloudinary'
+);
@@ -0,0 +1,206 @@
+import AWS from 'aws-sdk';
+import sharp from 'sharp';
+import { randomUUID } from 'crypto';
+import { Readable } from 'stream';
+import { StorageService } from '@/services/storage/storage-service';
+
+export interface S3UploadOptions {
+  contentType?: string;
+  // Bytes per multipart part; S3 requires at least 5MB
+  partSize?: number;
+  // Parts uploaded in parallel
+  queueSize?: number;
+  onProgress?: (loaded: number, total?: number) => void;
+}
+
+export interface S3RangeResult {
+  body: Buffer;
+  contentRange?: string;
+  contentType?: string;
+  totalSize?: number;
+}
+
+const MIN_PART_SIZE = 5 * 1024 * 1024;
+const DEFAULT_PART_SIZE = Math.max(MIN_PART_SIZE, Number(process.env.AWS_S3_PART_SIZE_MB || 8) * 1024 * 1024);
+const DEFAULT_QUEUE_SIZE = Number(process.env.AWS_S3_QUEUE_SIZE) || 4;
+const THUMBNAIL_SIZE = 300;
+// Most keys one DeleteObjects request accepts
+const DELETE_BATCH_SIZE = 1000;
+const FETCH_TIMEOUT_MS = 60_000;
+
+const extensionOf = (url: string): string => {
+  const match = new URL(url).pathname.match(/\.([a-z0-9]{1,8})$/i);
+  return match ? `.${match[1].toLowerCase()}` : '';
+};
+
+// Media storage on S3 or any S3-compatible server. AWS_S3_ENDPOINT points
+// it at a local stand-in such as MinIO, with path-style addressing.
+export class S3Service implements StorageService {
+  readonly name = 's3';
+  private s3: AWS.S3 | null = null;
+
+  constructor(private bucket = process.env.AWS_S3_BUCKET!) {}
+
+  get client(): AWS.S3 {
+    if (!this.s3) {
+      const endpoint = process.env.AWS_S3_ENDPOINT;
+      this.s3 = new AWS.S3({
+        region: process.env.AWS_REGION,
+        signatureVersion: 'v4',
+        ...(endpoint ? { endpoint, s3ForcePathStyle: true } : {}),
+      });
+    }
+    return this.s3;
+  }
+
+  objectUrl(key: string): string {
+    const path = key.split('/').map(encodeURIComponent).join('/');
+    const endpoint = process.env.AWS_S3_ENDPOINT;
+    if (endpoint) return `${endpoint.replace(/\/$/, '')}/${this.bucket}/${path}`;
+    return `https://${this.bucket}.s3.${process.env.AWS_REGION}.amazonaws.com/${path}`;
+  }
+
+  // Streams the body in parts, `queueSize` of them in flight at once, so a
+  // large video never sits in memory whole. Small bodies go up in a single
+  // PUT. Returns the object URL.
+  async upload(key: string, body: Readable | Buffer, options: S3UploadOptions = {}): Promise<string> {
+    try {
+      const upload = this.client.upload({
+        Bucket: this.bucket,
+        Key: key,
+        Body: body,
+        ContentType: options.contentType,
+      }, {
+        partSize: Math.max(MIN_PART_SIZE, options.partSize || DEFAULT_PART_SIZE),
+        queueSize: options.queueSize || DEFAULT_QUEUE_SIZE,
+      });
+
+      if (options.onProgress) {
+        upload.on('httpUploadProgress', progress => options.onProgress!(progress.loaded, progress.total));
+      }
+
+      await upload.promise();
+      return this.objectUrl(key);
+    } catch (error) {
+      console.error('Error uploading to S3:', error);
+      throw new Error('Failed to upload to S3');
+    }
+  }
+
+  async uploadFromUrl(url: string, folder?: string): Promise<string> {
+    const response = await fetch(url, { signal: AbortSignal.timeout(FETCH_TIMEOUT_MS) });
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to fetch ${url}: ${response.status}`);
+    }
+
+    const key = `${folder || 'manty'}/${randomUUID()}${extensionOf(url)}`;
+    return this.upload(key, Readable.fromWeb(response.body as any), {
+      contentType: response.headers.get('content-type') || undefined,
+    });
+  }
+
+  // Inclusive byte range, as in an HTTP Range header; `end` omitted reads to
+  // the end of the object
+  async getRange(key: string, start: number, end?: number): Promise<S3RangeResult> {
+    try {
+      const object = await this.client.getObject({
+        Bucket: this.bucket,
+        Key: key,
+        Range: `bytes=${start}-${end ?? ''}`,
+      }).promise();
+
+      return {
+        body: object.Body as Buffer,
+        contentRange: object.ContentRange,
+        contentType: object.ContentType,
+        totalSize: object.ContentRange ? Number(object.ContentRange.split('/')[1]) || undefined : object.ContentLength,
+      };
+    } catch (error) {
+      console.error('Error reading range from S3:', error);
+      throw new Error('Failed to read from S3');
+    }
+  }
+
+  // Streaming variant for proxying video seeks or probing large files
+  createReadStream(key: string, range?: { start: number; end?: number }): Readable {
+    return this.client.getObject({
+      Bucket: this.bucket,
+      Key: key,
+      Range: range ? `bytes=${range.start}-${range.end ?? ''}` : undefined,
+    }).createReadStream();
+  }
+
+  async head(key: string): Promise<AWS.S3.HeadObjectOutput | null> {
+    try {
+      return await this.client.headObject({ Bucket: this.bucket, Key: key }).promise();
+    } catch (error: any) {
+      if (error?.statusCode === 404) return null;
+      console.error('Error reading S3 object metadata:', error);
+      throw new Error('Failed to read from S3');
+    }
+  }
+
+  async deleteFile(key: string): Promise<void> {
+    try {
+      await this.client.deleteObject({ Bucket: this.bucket, Key: key }).promise();
+    } catch (error) {
+      console.error('Error deleting file:', error);
+      throw new Error('Failed to delete file');
+    }
+  }
+
+  // Bulk delete. Keys that do not exist count as deleted, so a batch can be
+  // retried safely. Returns the keys that failed, with S3's reason.
+  async deleteFiles(keys: string[]): Promise<Map<string, string>> {
+    const failed = new Map<string, string>();
+
+    for (let i = 0; i < keys.length; i += DELETE_BATCH_SIZE) {
+      const batch = keys.slice(i, i + DELETE_BATCH_SIZE);
+      try {
+        const result = await this.client.deleteObjects({
+          Bucket: this.bucket,
+          Delete: { Objects: batch.map(Key => ({ Key })), Quiet: true },
+        }).promise();
+        (result.Errors || []).forEach(error => failed.set(error.Key!, error.Message || error.Code || 'Delete failed'));
+      } catch (error) {
+        console.error('Error deleting files:', error);
+        batch.forEach(key => failed.set(key, (error as Error).message));
+      }
+    }
+
+    return failed;
+  }
+
+  thumbnailKey(key: string): string {
+    return `thumbnails/${key.replace(/\.[^./]+$/, '')}.webp`;
+  }
+
+  // S3 cannot transform on the fly, so the thumbnail is rendered once and
+  // stored beside the original
+  async generateThumbnail(key: string): Promise<string> {
+    try {
+      const thumbnailKey = this.thumbnailKey(key);
+      const thumbnail = await sharp(await this.download(key), { failOn: 'none' })
+        .rotate()
+        .resize(THUMBNAIL_SIZE, THUMBNAIL_SIZE, { fit: 'cover' })
+        .webp({ quality: 80 })
+        .toBuffer();
+
+      return await this.upload(thumbnailKey, thumbnail, { contentType: 'image/webp' });
+    } catch (error) {
+      console.error('Error generating thumbnail:', error);
+      throw new Error('Failed to generate thumbnail');
+    }
+  }
+
+  getOptimizedUrl(key: string): string {
+    return this.objectUrl(key);
+  }
+
+  async download(key: string): Promise<Buffer> {
+    const object = await this.client.getObject({ Bucket: this.bucket, Key: key }).promise();
+    return object.Body as Buffer;
+  }
+}
+
+export const s3Service = new S3Service();
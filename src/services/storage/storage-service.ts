@@ -0,0 +1,35 @@
+// Server-side operations every media storage backend provides; keys are the
+// backend's own identifiers (a Cloudinary public id, an S3 object key)
+export interface StorageService {
+  readonly name: string;
+  uploadFromUrl(url: string, folder?: string): Promise<string>;
+  deleteFile(key: string): Promise<void>;
+  generateThumbnail(key: string): Promise<string>;
+  getOptimizedUrl(key: string, options?: any): string;
+}
+
+// Whether a URL points at our own media storage: the Cloudinary cloud or the
+// S3 bucket (or its S3-compatible endpoint). The server only fetches media
+// itself from these, never from an arbitrary client-supplied address.
+export const isStorageUrl = (value: string): boolean => {
+  let url: URL;
+  try {
+    url = new URL(value);
+  } catch {
+    return false;
+  }
+
+  const cloudName = process.env.CLOUDINARY_CLOUD_NAME;
+  if (cloudName && url.protocol === 'https:' && url.hostname === 'res.cloudinary.com') {
+    return url.pathname.startsWith(`/${cloudName}/`);
+  }
+
+  const bucket = process.env.AWS_S3_BUCKET;
+  if (!bucket) return false;
+
+  const endpoint = process.env.AWS_S3_ENDPOINT;
+  if (endpoint) {
+    return url.origin === new URL(endpoint).origin && url.pathname.startsWith(`/${bucket}/`);
+  }
+  return url.protocol === 'https:' && url.hostname === `${bucket}.s3.${process.env.AWS_REGION}.amazonaws.com`;
+};
@@ -0,0 +1,87 @@
+import { UploadError } from '@/services/storage/cloudinary';
+import type { SignedUpload } from '@/services/storage/direct-upload';
+
+export interface DirectUploadResult {
+  mediaFileId: string;
+  url: string;
+}
+
+const postJson = async <T>(path: string, body: unknown, signal?: AbortSignal): Promise<T> => {
+  const response = await fetch(path, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+    signal,
+  });
+  const data = await response.json().catch(() => ({}));
+  if (!response.ok) throw new UploadError(data.message || 'Upload failed', response.status);
+  return data;
+};
+
+const sendToStorage = (
+  upload: SignedUpload,
+  file: File,
+  progressCallback?: (progress: number) => void,
+  signal?: AbortSignal
+): Promise<void> => {
+  return new Promise((resolve, reject) => {
+    if (signal?.aborted) {
+      reject(new UploadError('Upload cancelled'));
+      return;
+    }
+
+    const formData = new FormData();
+    Object.entries(upload.fields).forEach(([name, value]) => formData.append(name, value));
+    // Both Cloudinary and S3 expect the file after the signed fields
+    formData.append('file', file);
+
+    const xhr = new XMLHttpRequest();
+    const abort = () => xhr.abort();
+    signal?.addEventListener('abort', abort, { once: true });
+
+    xhr.upload.onprogress = (event) => {
+      if (event.lengthComputable) {
+        progressCallback?.((event.loaded / event.total) * 100);
+      }
+    };
+
+    xhr.onload = () => {
+      signal?.removeEventListener('abort', abort);
+      if (xhr.status >= 200 && xhr.status < 300) resolve();
+      else reject(new UploadError('Upload failed', xhr.status));
+    };
+
+    xhr.onerror = () => {
+      signal?.removeEventListener('abort', abort);
+      reject(new UploadError('Upload failed'));
+    };
+    xhr.onabort = () => reject(new UploadError('Upload cancelled'));
+
+    xhr.open('POST', upload.url);
+    xhr.send(formData);
+  });
+};
+
+// Signed direct upload: the API signs, the browser sends the bytes straight
+// to Cloudinary or S3, then the API registers the MediaFile. Only the two
+// small JSON calls touch our servers.
+export const uploadDirect = async (
+  file: File,
+  progressCallback?: (progress: number) => void,
+  signal?: AbortSignal
+): Promise<DirectUploadResult> => {
+  const { upload } = await postJson<{ upload: SignedUpload }>('/api/media/sign-upload', {
+    filename: file.name,
+    contentType: file.type,
+    size: file.size,
+  }, signal);
+
+  await sendToStorage(upload, file, progressCallback, signal);
+
+  const { mediaFile } = await postJson<{ mediaFile: { id: string; url: string } }>(
+    '/api/media/complete-upload',
+    { token: upload.token },
+    signal
+  );
+  return { mediaFileId: mediaFile.id, url: mediaFile.url };
+};
@@ -0,0 +1,286 @@
+import { createHash } from 'crypto';
+import { createInterface } from 'readline';
+import { Readable } from 'stream';
+import { prisma } from '@/lib/db';
+import { trendFeedItemSchema, TrendFeedItem } from '@/lib/validation';
+import { openaiService } from '@/services/openai';
+import { vectorSearchService } from '@/services/vector-search';
+import { hashtagIndex } from '@/services/hashtag-index';
+import { trendLeaderboards } from '@/services/trend-leaderboards';
+import { deletionService } from '@/services/deletion';
+
+export interface IngestionStats {
+  received: number;
+  invalid: number;
+  created: number;
+  reembedded: number;
+  popularityUpdated: number;
+  unchanged: number;
+  deactivated: number;
+  errors: string[];
+}
+
+interface IngestOptions {
+  // Deactivate catalog trends that the feed no longer lists
+  deactivateMissing?: boolean;
+}
+
+interface ExistingTrend {
+  id: string;
+  externalId: string | null;
+  contentHash: string | null;
+  popularity: number;
+  isActive: boolean;
+}
+
+// One embeddings request and one Postgres round-trip per batch
+const BATCH_SIZE = 200;
+const MAX_REPORTED_ERRORS = 20;
+
+// Popularity is left out on purpose: it changes daily but does not change
+// what a trend looks like, so it never triggers a re-embed.
+export const trendContentHash = (item: TrendFeedItem): string => {
+  const content = JSON.stringify([
+    item.name,
+    item.category,
+    [...item.platforms].sort(),
+    item.hashtags,
+    item.colors,
+    item.mood,
+    item.description,
+  ]);
+  return createHash('sha256').update(content).digest('hex');
+};
+
+export const trendEmbeddingText = (item: TrendFeedItem): string => {
+  return [
+    item.name,
+    item.description,
+    `Category: ${item.category}`,
+    `Mood: ${item.mood}`,
+    `Colors: ${item.colors.join(', ')}`,
+    `Hashtags: ${item.hashtags.join(' ')}`,
+  ].filter(Boolean).join('\n');
+};
+
+const vectorMetadata = (item: TrendFeedItem) => ({
+  name: item.name,
+  category: item.category,
+  platforms: item.platforms,
+  mood: item.mood,
+});
+
+const trendFields = (item: TrendFeedItem) => ({
+  name: item.name,
+  category: item.category,
+  platforms: item.platforms,
+  popularity: item.popularity,
+  hashtags: item.hashtags,
+  colors: item.colors,
+  mood: item.mood,
+  description: item.description,
+});
+
+// Yields each non-empty line of a newline-delimited JSON stream without
+// buffering the whole feed
+export async function* readJsonLines(input: Readable): AsyncGenerator<{ line: number; value: unknown }> {
+  const lines = createInterface({ input, crlfDelay: Infinity });
+  let line = 0;
+
+  for await (const text of lines) {
+    line++;
+    if (!text.trim()) continue;
+
+    try {
+      yield { line, value: JSON.parse(text) };
+    } catch {
+      yield { line, value: undefined };
+    }
+  }
+}
+
+export class TrendIngestionService {
+  // Streams a JSONL feed into the catalog. Trends whose content hash is
+  // unchanged are never re-embedded; everything else is written in batches.
+  async ingest(input: Readable, options: IngestOptions = {}): Promise<IngestionStats> {
+    const stats: IngestionStats = {
+      received: 0,
+      invalid: 0,
+      created: 0,
+      reembedded: 0,
+      popularityUpdated: 0,
+      unchanged: 0,
+      deactivated: 0,
+      errors: [],
+    };
+    const seen = new Set<string>();
+    let batch = new Map<string, TrendFeedItem>();
+
+    for await (const { line, value } of readJsonLines(input)) {
+      stats.received++;
+
+      const parsed = trendFeedItemSchema.safeParse(value);
+      if (!parsed.success) {
+        stats.invalid++;
+        if (stats.errors.length < MAX_REPORTED_ERRORS) {
+          const issue = parsed.error.issues[0];
+          stats.errors.push(value === undefined
+            ? `Line ${line}: invalid JSON`
+            : `Line ${line}: ${issue.path.join('.') || 'value'} ${issue.message}`);
+        }
+        continue;
+      }
+
+      // A later line for the same trend replaces an earlier one
+      seen.add(parsed.data.externalId);
+      batch.set(parsed.data.externalId, parsed.data);
+
+      if (batch.size >= BATCH_SIZE) {
+        await this.processBatch([...batch.values()], stats);
+        batch = new Map();
+      }
+    }
+
+    if (batch.size) await this.processBatch([...batch.values()], stats);
+
+    // A feed with bad lines may have dropped trends that still exist upstream
+    if (options.deactivateMissing && stats.invalid === 0) {
+      stats.deactivated += await this.deactivateMissing(seen);
+    }
+
+    return stats;
+  }
+
+  private async processBatch(items: TrendFeedItem[], stats: IngestionStats) {
+    const existing = await prisma.trend.findMany({
+      where: { externalId: { in: items.map(item => item.externalId) } },
+      select: { id: true, externalId: true, contentHash: true, popularity: true, isActive: true },
+    });
+    const byExternalId = new Map<string, ExistingTrend>(existing.map(trend => [trend.externalId!, trend]));
+
+    const created: TrendFeedItem[] = [];
+    const changed: { id: string; item: TrendFeedItem }[] = [];
+    const popularity: { id: string; item: TrendFeedItem }[] = [];
+    const deactivated: string[] = [];
+    const hashes = new Map<string, string>();
+
+    for (const item of items) {
+      const current = byExternalId.get(item.externalId);
+      const hash = trendContentHash(item);
+      hashes.set(item.externalId, hash);
+
+      if (!item.isActive) {
+        if (current?.isActive) deactivated.push(current.id);
+        else stats.unchanged++;
+      } else if (!current) {
+        created.push(item);
+      } else if (current.contentHash !== hash || !current.isActive) {
+        changed.push({ id: current.id, item });
+      } else if (current.popularity !== item.popularity) {
+        popularity.push({ id: current.id, item });
+      } else {
+        stats.unchanged++;
+      }
+    }
+
+    const toEmbed = [...created, ...changed.map(({ item }) => item)];
+    const embeddings = await openaiService.generateEmbeddings(toEmbed.map(trendEmbeddingText));
+    const embeddingFor = new Map(toEmbed.map((item, i) => [item.externalId, embeddings[i]]));
+
+    // Rows are written without a content hash and only get one once their
+    // vector is in the index, so a failure anywhere before that leaves them
+    // to be re-embedded and retried on the next run
+    const inserted = created.length
+      ? await prisma.trend.createManyAndReturn({
+        data: created.map(item => ({
+          ...trendFields(item),
+          externalId: item.externalId,
+          contentHash: null,
+          embedding: embeddingFor.get(item.externalId),
+        })),
+        select: { id: true, externalId: true },
+      })
+      : [];
+
+    await prisma.$transaction([
+      ...changed.map(({ id, item }) => prisma.trend.update({
+        where: { id },
+        data: {
+          ...trendFields(item),
+          contentHash: null,
+          embedding: embeddingFor.get(item.externalId),
+          isActive: true,
+        },
+      })),
+      ...popularity.map(({ id, item }) => prisma.trend.update({
+        where: { id },
+        data: { popularity: item.popularity },
+      })),
+      ...(changed.length ? [deletionService.cancelVectorDeletions(changed.map(({ id }) => id))] : []),
+      ...(deactivated.length
+        ? [
+          prisma.trend.updateMany({ where: { id: { in: deactivated } }, data: { isActive: false } }),
+          // Removed from the index by the deletion outbox, which retries
+          deletionService.queueVectorDeletions(deactivated),
+        ]
+        : []),
+    ]);
+    if (deactivated.length) deletionService.processInBackground();
+
+    const createdByExternalId = new Map(created.map(item => [item.externalId, item]));
+    const written = [
+      ...inserted.map(row => ({ id: row.id, item: createdByExternalId.get(row.externalId!)! })),
+      ...changed,
+    ];
+
+    await vectorSearchService.upsertTrends(written.map(({ id, item }) => ({
+      id,
+      values: embeddingFor.get(item.externalId)!,
+      metadata: vectorMetadata(item),
+    })));
+    if (written.length) {
+      await prisma.$transaction(written.map(({ id, item }) => prisma.trend.update({
+        where: { id },
+        data: { contentHash: hashes.get(item.externalId) },
+      })));
+    }
+
+    for (const { id, item } of [...written, ...popularity]) {
+      const trend = { id, ...trendFields(item) };
+      hashtagIndex.upsertTrend(trend);
+      await trendLeaderboards.upsertTrend(trend);
+    }
+    for (const id of deactivated) {
+      hashtagIndex.removeTrend(id);
+      await trendLeaderboards.removeTrend(id);
+    }
+
+    stats.created += inserted.length;
+    stats.reembedded += changed.length;
+    stats.popularityUpdated += popularity.length;
+    stats.deactivated += deactivated.length;
+  }
+
+  private async deactivateMissing(seen: Set<string>): Promise<number> {
+    const active = await prisma.trend.findMany({
+      where: { isActive: true, externalId: { not: null } },
+      select: { id: true, externalId: true },
+    });
+    const missing = active.filter(trend => !seen.has(trend.externalId!)).map(trend => trend.id);
+    if (!missing.length) return 0;
+
+    await prisma.$transaction([
+      prisma.trend.updateMany({ where: { id: { in: missing } }, data: { isActive: false } }),
+      deletionService.queueVectorDeletions(missing),
+    ]);
+    deletionService.processInBackground();
+    for (const id of missing) {
+      hashtagIndex.removeTrend(id);
+      await trendLeaderboards.removeTrend(id);
+    }
+
+    return missing.length;
+  }
+}
+
+export const trendIngestionService = new TrendIngestionService();
@@ -0,0 +1,459 @@
+import Redis from 'ioredis';
+import { prisma } from '@/lib/db';
+
+export interface TrendSummary {
+  id: string;
+  name: string;
+  category: string;
+  platforms: string[];
+  popularity: number;
+  hashtags: string[];
+  colors: string[];
+  mood: string;
+  description: string;
+}
+
+// Boards keep only their top BOARD_CAPACITY trends. upsert and remove
+// return the trimmed boards that fell below LEADERBOARD_SIZE, to be refilled
+// with replaceBoard.
+interface LeaderboardStore {
+  replaceAll(trends: TrendSummary[]): Promise<void>;
+  replaceBoard(board: string, trends: TrendSummary[], complete: boolean): Promise<void>;
+  upsert(trend: TrendSummary): Promise<string[]>;
+  remove(trendId: string): Promise<string[]>;
+  top(board: string, limit: number): Promise<TrendSummary[]>;
+  version(): Promise<number>;
+  syncState(): Promise<{ syncedAt: number; rebuiltAt: number } | null>;
+  setSyncState(state: { syncedAt: number; rebuiltAt: number }): Promise<void>;
+}
+
+export const LEADERBOARD_SIZE = 100;
+// Headroom above what is served, so a few removals do not force a refill
+const BOARD_CAPACITY = LEADERBOARD_SIZE + 50;
+const SYNC_INTERVAL_MS = 30_000;
+const REBUILD_INTERVAL_MS = 10 * 60_000;
+
+const TREND_SUMMARY_SELECT = {
+  id: true,
+  name: true,
+  category: true,
+  platforms: true,
+  popularity: true,
+  hashtags: true,
+  colors: true,
+  mood: true,
+  description: true,
+} as const;
+
+export const boardKey = (filter: { platform?: string; category?: string } = {}): string => {
+  if (filter.platform) return `platform:${filter.platform}`;
+  if (filter.category) return `category:${filter.category}`;
+  return 'all';
+};
+
+// Postgres filter selecting a board's trends
+const boardWhere = (board: string) => {
+  const [kind, value] = board.split(/:(.*)/);
+  if (kind === 'platform') return { platforms: { has: value } };
+  if (kind === 'category') return { category: value };
+  return {};
+};
+
+const boardsFor = (trend: TrendSummary): string[] => [
+  boardKey(),
+  boardKey({ category: trend.category }),
+  ...trend.platforms.map(platform => boardKey({ platform })),
+];
+
+// Highest popularity first; id breaks ties so positions are deterministic
+const compareTrends = (a: TrendSummary, b: TrendSummary): number => {
+  return b.popularity - a.popularity || (a.id < b.id ? -1 : a.id > b.id ? 1 : 0);
+};
+
+// Every board's top BOARD_CAPACITY trends, and which boards were cut short
+const buildBoards = (trends: TrendSummary[]) => {
+  const boards = new Map<string, TrendSummary[]>();
+  for (const trend of trends) {
+    for (const board of boardsFor(trend)) {
+      if (!boards.has(board)) boards.set(board, []);
+      boards.get(board)!.push(trend);
+    }
+  }
+
+  const truncated = new Set<string>();
+  boards.forEach((entries, board) => {
+    entries.sort(compareTrends);
+    if (entries.length > BOARD_CAPACITY) {
+      entries.length = BOARD_CAPACITY;
+      truncated.add(board);
+    }
+  });
+  return { boards, truncated };
+};
+
+export class MemoryLeaderboardStore implements LeaderboardStore {
+  private boards = new Map<string, TrendSummary[]>();
+  // Boards that were cut to capacity: trends below their tail exist but are
+  // not held, so nothing may be appended there
+  private truncated = new Set<string>();
+  // Summaries of trends on at least one board
+  private trends = new Map<string, TrendSummary>();
+  private currentVersion = 0;
+  private state: { syncedAt: number; rebuiltAt: number } | null = null;
+
+  async replaceAll(trends: TrendSummary[]) {
+    const { boards, truncated } = buildBoards(trends);
+    this.boards = boards;
+    this.truncated = truncated;
+    this.trends.clear();
+    boards.forEach(entries => entries.forEach(trend => this.trends.set(trend.id, trend)));
+    this.currentVersion++;
+  }
+
+  async replaceBoard(board: string, trends: TrendSummary[], complete: boolean) {
+    const previous = this.boards.get(board) || [];
+    this.boards.set(board, [...trends].sort(compareTrends));
+    if (complete) this.truncated.delete(board);
+    else this.truncated.add(board);
+
+    trends.forEach(trend => this.trends.set(trend.id, trend));
+    previous.forEach(trend => this.forgetIfUnlisted(trend));
+    this.currentVersion++;
+  }
+
+  async upsert(trend: TrendSummary) {
+    const left = this.detach(trend.id);
+
+    for (const board of boardsFor(trend)) {
+      if (!this.boards.has(board)) this.boards.set(board, []);
+      const entries = this.boards.get(board)!;
+      const index = this.position(entries, trend);
+      if (index === entries.length && this.truncated.has(board)) continue;
+
+      entries.splice(index, 0, trend);
+      if (entries.length > BOARD_CAPACITY) {
+        this.truncated.add(board);
+        this.forgetIfUnlisted(entries.pop()!);
+      }
+    }
+
+    this.trends.set(trend.id, trend);
+    this.forgetIfUnlisted(trend);
+    this.currentVersion++;
+    return this.shortBoards(left);
+  }
+
+  async remove(trendId: string) {
+    const left = this.detach(trendId);
+    if (left.length) this.currentVersion++;
+    return this.shortBoards(left);
+  }
+
+  async top(board: string, limit: number) {
+    return (this.boards.get(board) || []).slice(0, limit);
+  }
+
+  async version() {
+    return this.currentVersion;
+  }
+
+  async syncState() {
+    return this.state;
+  }
+
+  async setSyncState(state: { syncedAt: number; rebuiltAt: number }) {
+    this.state = state;
+  }
+
+  // Takes a trend off every board; returns the boards it was on
+  private detach(trendId: string): string[] {
+    const previous = this.trends.get(trendId);
+    if (!previous) return [];
+
+    this.trends.delete(trendId);
+    return boardsFor(previous).filter(board => {
+      const entries = this.boards.get(board);
+      const index = entries ? entries.findIndex(entry => entry.id === trendId) : -1;
+      if (index !== -1) entries!.splice(index, 1);
+      return index !== -1;
+    });
+  }
+
+  private forgetIfUnlisted(trend: TrendSummary) {
+    const listed = boardsFor(trend).some(board => this.boards.get(board)?.some(entry => entry.id === trend.id));
+    if (!listed) this.trends.delete(trend.id);
+  }
+
+  private shortBoards(boards: string[]): string[] {
+    return boards.filter(board => this.truncated.has(board) && this.boards.get(board)!.length < LEADERBOARD_SIZE);
+  }
+
+  private position(entries: TrendSummary[], trend: TrendSummary): number {
+    let low = 0;
+    let high = entries.length;
+    while (low < high) {
+      const mid = (low + high) >>> 1;
+      if (compareTrends(entries[mid], trend) < 0) low = mid + 1;
+      else high = mid;
+    }
+    return low;
+  }
+}
+
+// Shared by the scripts below. ARGV starts with the key prefix, the board
+// capacity and LEADERBOARD_SIZE. A trend's summary is kept while it is on
+// any board; `refs` counts those boards.
+const BOARD_PRELUDE = `
+local prefix = ARGV[1]
+local capacity = tonumber(ARGV[2])
+local minimum = tonumber(ARGV[3])
+local function key(name) return prefix .. ':' .. name end
+
+local function release(id)
+  if redis.call('HINCRBY', key('refs'), id, -1) <= 0 then
+    redis.call('HDEL', key('refs'), id)
+    redis.call('HDEL', key('trends'), id)
+  end
+end
+
+local function list(id, score, board)
+  local board_key = key('board:' .. board)
+  if redis.call('SISMEMBER', key('truncated'), board) == 1 then
+    local tail = redis.call('ZRANGE', board_key, 0, 0, 'WITHSCORES')
+    if not tail[2] or score <= tonumber(tail[2]) then return end
+  end
+
+  if redis.call('ZADD', board_key, score, id) == 1 then redis.call('HINCRBY', key('refs'), id, 1) end
+  redis.call('SADD', key('boards'), board)
+
+  if redis.call('ZCARD', board_key) > capacity then
+    for _, dropped in ipairs(redis.call('ZRANGE', board_key, 0, -(capacity + 1))) do release(dropped) end
+    redis.call('ZREMRANGEBYRANK', board_key, 0, -(capacity + 1))
+    redis.call('SADD', key('truncated'), board)
+  end
+end
+`;
+
+// ARGV after the prelude: id, summary, score, the number of boards the trend
+// was on, those boards, then the boards it belongs on now. Returns the
+// trimmed boards it left that fell below LEADERBOARD_SIZE.
+const UPSERT_SCRIPT = `${BOARD_PRELUDE}
+local id = ARGV[4]
+local score = tonumber(ARGV[6])
+local old_count = tonumber(ARGV[7])
+
+local short = {}
+for i = 8, 7 + old_count do
+  local board = ARGV[i]
+  if redis.call('ZREM', key('board:' .. board), id) == 1 then
+    release(id)
+    if redis.call('SISMEMBER', key('truncated'), board) == 1
+      and redis.call('ZCARD', key('board:' .. board)) < minimum then
+      table.insert(short, board)
+    end
+  end
+end
+
+for i = 8 + old_count, #ARGV do list(id, score, ARGV[i]) end
+
+if redis.call('HEXISTS', key('refs'), id) == 1 then
+  redis.call('HSET', key('trends'), id, ARGV[5])
+else
+  redis.call('HDEL', key('trends'), id)
+end
+redis.call('INCR', key('version'))
+return short
+`;
+
+// ARGV after the prelude: board, '1' if the board holds all its trends,
+// then id, score and summary per trend.
+const REPLACE_BOARD_SCRIPT = `${BOARD_PRELUDE}
+local board = ARGV[4]
+local board_key = key('board:' .. board)
+
+for _, id in ipairs(redis.call('ZRANGE', board_key, 0, -1)) do release(id) end
+redis.call('DEL', board_key)
+
+for i = 6, #ARGV, 3 do
+  redis.call('ZADD', board_key, tonumber(ARGV[i + 1]), ARGV[i])
+  redis.call('HINCRBY', key('refs'), ARGV[i], 1)
+  redis.call('HSET', key('trends'), ARGV[i], ARGV[i + 2])
+end
+
+redis.call('SADD', key('boards'), board)
+if ARGV[5] == '1' then
+  redis.call('SREM', key('truncated'), board)
+else
+  redis.call('SADD', key('truncated'), board)
+end
+redis.call('INCR', key('version'))
+return 0
+`;
+
+// Sorted sets per board plus a hash of trend summaries, so every instance
+// serves the same leaderboards and only one of them needs to sync. Board
+// updates run as scripts, so trimming and the summary refcounts stay
+// consistent with concurrent writers.
+class RedisLeaderboardStore implements LeaderboardStore {
+  constructor(private redis: Redis, private prefix = 'manty:leaderboard') {}
+
+  private key(name: string) {
+    return `${this.prefix}:${name}`;
+  }
+
+  async replaceAll(trends: TrendSummary[]) {
+    const { boards, truncated } = buildBoards(trends);
+    const existing = await this.redis.smembers(this.key('boards'));
+    const pipeline = this.redis.multi();
+
+    if (existing.length) pipeline.del(...existing.map(board => this.key(`board:${board}`)));
+    pipeline.del(this.key('trends'), this.key('refs'), this.key('boards'), this.key('truncated'));
+    boards.forEach((entries, board) => {
+      for (const trend of entries) {
+        pipeline.zadd(this.key(`board:${board}`), trend.popularity, trend.id);
+        pipeline.hincrby(this.key('refs'), trend.id, 1);
+        pipeline.hset(this.key('trends'), trend.id, JSON.stringify(trend));
+      }
+      pipeline.sadd(this.key('boards'), board);
+    });
+    if (truncated.size) pipeline.sadd(this.key('truncated'), ...truncated);
+    pipeline.incr(this.key('version'));
+
+    await pipeline.exec();
+  }
+
+  async replaceBoard(board: string, trends: TrendSummary[], complete: boolean) {
+    await this.eval(
+      REPLACE_BOARD_SCRIPT,
+      board,
+      complete ? '1' : '0',
+      ...trends.flatMap(trend => [trend.id, trend.popularity, JSON.stringify(trend)])
+    );
+  }
+
+  async upsert(trend: TrendSummary) {
+    return this.write(trend.id, JSON.stringify(trend), trend.popularity, boardsFor(trend));
+  }
+
+  async remove(trendId: string) {
+    return this.write(trendId, '', 0, []);
+  }
+
+  async top(board: string, limit: number) {
+    const ids = await this.redis.zrevrange(this.key(`board:${board}`), 0, limit - 1);
+    if (!ids.length) return [];
+
+    const rows = await this.redis.hmget(this.key('trends'), ...ids);
+    return rows.filter((row): row is string => row !== null).map(row => JSON.parse(row) as TrendSummary);
+  }
+
+  async version() {
+    return Number(await this.redis.get(this.key('version'))) || 0;
+  }
+
+  async syncState() {
+    const state = await this.redis.get(this.key('sync'));
+    return state ? JSON.parse(state) : null;
+  }
+
+  async setSyncState(state: { syncedAt: number; rebuiltAt: number }) {
+    await this.redis.set(this.key('sync'), JSON.stringify(state));
+  }
+
+  private async write(id: string, summary: string, score: number, boards: string[]): Promise<string[]> {
+    const previous = await this.redis.hget(this.key('trends'), id);
+    const left = previous ? boardsFor(JSON.parse(previous)) : [];
+    if (!left.length && !boards.length) return [];
+
+    return await this.eval(UPSERT_SCRIPT, id, summary, score, left.length, ...left, ...boards) as string[];
+  }
+
+  private eval(script: string, ...args: (string | number)[]) {
+    return this.redis.eval(script, 0, this.prefix, BOARD_CAPACITY, LEADERBOARD_SIZE, ...args);
+  }
+}
+
+export class TrendLeaderboards {
+  private checkedAt = 0;
+  private syncing: Promise<void> | null = null;
+
+  constructor(private store: LeaderboardStore) {}
+
+  async top(filter: { platform?: string; category?: string }, limit = 20) {
+    await this.ensureFresh();
+    return {
+      trends: await this.store.top(boardKey(filter), Math.min(limit, LEADERBOARD_SIZE)),
+      version: await this.store.version(),
+    };
+  }
+
+  // Called by anything that changes a trend so boards move immediately
+  // instead of waiting for the next sync.
+  async upsertTrend(trend: TrendSummary & { isActive?: boolean }) {
+    const short = trend.isActive === false
+      ? await this.store.remove(trend.id)
+      : await this.store.upsert(trend);
+    await this.refill(short);
+  }
+
+  async removeTrend(trendId: string) {
+    await this.refill(await this.store.remove(trendId));
+  }
+
+  // Tops trimmed boards that lost entries back up from Postgres, so reads
+  // find LEADERBOARD_SIZE trends whenever the catalog has them
+  private async refill(boards: string[]) {
+    for (const board of boards) {
+      const trends = await prisma.trend.findMany({
+        where: { isActive: true, ...boardWhere(board) },
+        orderBy: [{ popularity: 'desc' }, { id: 'asc' }],
+        take: BOARD_CAPACITY + 1,
+        select: TREND_SUMMARY_SELECT,
+      });
+      await this.store.replaceBoard(board, trends.slice(0, BOARD_CAPACITY), trends.length <= BOARD_CAPACITY);
+    }
+  }
+
+  private async ensureFresh() {
+    const now = Date.now();
+    if (now - this.checkedAt < SYNC_INTERVAL_MS) return;
+
+    if (!this.syncing) {
+      this.syncing = this.sync(now).finally(() => {
+        this.syncing = null;
+      });
+    }
+    return this.syncing;
+  }
+
+  private async sync(now: number) {
+    const state = await this.store.syncState();
+
+    if (!state || now - state.rebuiltAt > REBUILD_INTERVAL_MS) {
+      const trends = await prisma.trend.findMany({
+        where: { isActive: true },
+        select: TREND_SUMMARY_SELECT,
+      });
+      await this.store.replaceAll(trends);
+      await this.store.setSyncState({ syncedAt: now, rebuiltAt: now });
+    } else if (now - state.syncedAt >= SYNC_INTERVAL_MS) {
+      const changed = await prisma.trend.findMany({
+        where: { updatedAt: { gt: new Date(state.syncedAt) } },
+        select: { ...TREND_SUMMARY_SELECT, isActive: true },
+      });
+      for (const trend of changed) await this.upsertTrend(trend);
+      await this.store.setSyncState({ ...state, syncedAt: now });
+    }
+
+    this.checkedAt = now;
+  }
+}
+
+const createLeaderboards = (): TrendLeaderboards => {
+  if (process.env.TRENDS_CACHE_BACKEND === 'redis' && process.env.REDIS_URL) {
+    return new TrendLeaderboards(new RedisLeaderboardStore(new Redis(process.env.REDIS_URL)));
+  }
+  return new TrendLeaderboards(new MemoryLeaderboardStore());
+};
+
+export const trendLeaderboards = createLeaderboards();
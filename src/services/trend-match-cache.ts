@@ -0,0 +1,209 @@
+import Redis from 'ioredis';
+import { VectorMatch } from '@/services/vector-store';
+
+interface CachedMatches {
+  signature: string;
+  matches: VectorMatch[];
+}
+
+interface MatchCacheStore {
+  getMany(keys: string[]): Promise<(CachedMatches | null)[]>;
+  setMany(keys: string[], entry: CachedMatches): Promise<void>;
+  version(): Promise<number>;
+  bumpVersion(): Promise<void>;
+}
+
+// Banded LSH: a 64-bit signature split into four 16-bit bands, each its own
+// cache key. Embeddings 3° apart share any one band about 76% of the time
+// and at least one of the four over 99% of the time.
+const SIGNATURE_BITS = 64;
+const BAND_BITS = 16;
+// A band collision only counts when the full signatures are this close,
+// which bounds the angle between the two embeddings to roughly 8°
+const MAX_HAMMING_DISTANCE = 3;
+const TTL_SECONDS = 60 * 60;
+const MAX_MEMORY_ENTRIES = 5000;
+const HYPERPLANE_SEED = 0x5eed;
+
+// mulberry32; the hyperplanes must be identical on every instance so that
+// signatures written to Redis by one instance are found by the others
+const seededRandom = (seed: number) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), seed | 1);
+  t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296 - 0.5;
+};
+
+const hyperplanesByDimension = new Map<number, Float32Array>();
+
+const hyperplanes = (dimension: number): Float32Array => {
+  let planes = hyperplanesByDimension.get(dimension);
+  if (!planes) {
+    const random = seededRandom(HYPERPLANE_SEED);
+    planes = new Float32Array(SIGNATURE_BITS * dimension);
+    for (let i = 0; i < planes.length; i++) planes[i] = random();
+    hyperplanesByDimension.set(dimension, planes);
+  }
+  return planes;
+};
+
+// Random-hyperplane LSH (SimHash): one bit per plane, set when the vector
+// lies on its positive side. Returned as hex so it can sit in a cache key.
+export const embeddingSignature = (embedding: number[]): string => {
+  const planes = hyperplanes(embedding.length);
+  let signature = '';
+
+  for (let word = 0; word < SIGNATURE_BITS / 32; word++) {
+    let bits = 0;
+    for (let bit = 0; bit < 32; bit++) {
+      const offset = (word * 32 + bit) * embedding.length;
+      let dot = 0;
+      for (let i = 0; i < embedding.length; i++) dot += planes[offset + i] * embedding[i];
+      if (dot > 0) bits |= 1 << bit;
+    }
+    signature += (bits >>> 0).toString(16).padStart(8, '0');
+  }
+
+  return signature;
+};
+
+const bands = (signature: string): string[] => {
+  const width = BAND_BITS / 4;
+  return Array.from({ length: SIGNATURE_BITS / BAND_BITS }, (_, i) => signature.slice(i * width, (i + 1) * width));
+};
+
+const hammingDistance = (a: string, b: string): number => {
+  let distance = 0;
+  for (let i = 0; i < a.length; i += 8) {
+    let bits = parseInt(a.slice(i, i + 8), 16) ^ parseInt(b.slice(i, i + 8), 16);
+    while (bits) {
+      bits &= bits - 1;
+      distance++;
+    }
+  }
+  return distance;
+};
+
+export class MemoryMatchCacheStore implements MatchCacheStore {
+  private entries = new Map<string, { value: CachedMatches; expiresAt: number }>();
+  private currentVersion = 0;
+
+  async getMany(keys: string[]) {
+    return keys.map(key => {
+      const entry = this.entries.get(key);
+      if (!entry) return null;
+      if (entry.expiresAt < Date.now()) {
+        this.entries.delete(key);
+        return null;
+      }
+
+      // Re-insert so Map order doubles as least-recently-used order
+      this.entries.delete(key);
+      this.entries.set(key, entry);
+      return entry.value;
+    });
+  }
+
+  async setMany(keys: string[], value: CachedMatches) {
+    const expiresAt = Date.now() + TTL_SECONDS * 1000;
+    for (const key of keys) {
+      this.entries.delete(key);
+      if (this.entries.size >= MAX_MEMORY_ENTRIES) {
+        this.entries.delete(this.entries.keys().next().value!);
+      }
+      this.entries.set(key, { value, expiresAt });
+    }
+  }
+
+  async version() {
+    return this.currentVersion;
+  }
+
+  // Old-version keys can never be read again; drop them rather than let
+  // them age out
+  async bumpVersion() {
+    this.currentVersion++;
+    this.entries.clear();
+  }
+}
+
+// Entries from older catalog versions are simply never read again and
+// expire through their TTL
+class RedisMatchCacheStore implements MatchCacheStore {
+  constructor(private redis: Redis, private prefix = 'manty:trend-matches') {}
+
+  async getMany(keys: string[]) {
+    const values = await this.redis.mget(keys.map(key => `${this.prefix}:${key}`));
+    return values.map(value => (value ? JSON.parse(value) : null));
+  }
+
+  async setMany(keys: string[], entry: CachedMatches) {
+    const value = JSON.stringify(entry);
+    const pipeline = this.redis.pipeline();
+    keys.forEach(key => pipeline.set(`${this.prefix}:${key}`, value, 'EX', TTL_SECONDS));
+    await pipeline.exec();
+  }
+
+  async version() {
+    return Number(await this.redis.get(`${this.prefix}:version`)) || 0;
+  }
+
+  async bumpVersion() {
+    await this.redis.incr(`${this.prefix}:version`);
+  }
+}
+
+// Caches raw vector-index results for near-duplicate query embeddings.
+// Keys combine the catalog version, one signature band, topK and any
+// filters, so a catalog write invalidates every entry at once.
+export class TrendMatchCache {
+  constructor(private store: MatchCacheStore) {}
+
+  async get(embedding: number[], topK: number, filters: Record<string, unknown> = {}) {
+    try {
+      const signature = embeddingSignature(embedding);
+      const entries = await this.store.getMany(await this.keys(signature, topK, filters));
+      const hit = entries.find(entry => entry && hammingDistance(entry.signature, signature) <= MAX_HAMMING_DISTANCE);
+      return hit ? hit.matches : null;
+    } catch (error) {
+      console.error('Error reading trend match cache:', error);
+      return null;
+    }
+  }
+
+  async set(embedding: number[], topK: number, matches: VectorMatch[], filters: Record<string, unknown> = {}) {
+    try {
+      const signature = embeddingSignature(embedding);
+      await this.store.setMany(await this.keys(signature, topK, filters), { signature, matches });
+    } catch (error) {
+      console.error('Error writing trend match cache:', error);
+    }
+  }
+
+  async invalidate() {
+    try {
+      await this.store.bumpVersion();
+    } catch (error) {
+      console.error('Error invalidating trend match cache:', error);
+    }
+  }
+
+  private async keys(signature: string, topK: number, filters: Record<string, unknown>) {
+    const filterKey = Object.keys(filters)
+      .sort()
+      .filter(name => filters[name] !== undefined)
+      .map(name => `${name}=${JSON.stringify(filters[name])}`)
+      .join('&');
+    const version = await this.store.version();
+    return bands(signature).map((band, i) => `v${version}:b${i}:${band}:${topK}:${filterKey}`);
+  }
+}
+
+const createMatchCache = (): TrendMatchCache => {
+  if (process.env.TRENDS_CACHE_BACKEND === 'redis' && process.env.REDIS_URL) {
+    return new TrendMatchCache(new RedisMatchCacheStore(new Redis(process.env.REDIS_URL)));
+  }
+  return new TrendMatchCache(new MemoryMatchCacheStore());
+};
+
+export const trendMatchCache = createMatchCache();
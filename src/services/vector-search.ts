@@ -0,0 +1,96 @@
+import { prisma } from '@/lib/db';
+import { rerankTrends, RerankContext } from '@/lib/trend-reranker';
+import { openaiService } from '@/services/openai';
+import { PineconeVectorStore } from '@/services/pinecone';
+import { WeaviateVectorStore } from '@/services/weaviate';
+import { MemoryVectorStore } from '@/services/memory-vector-store';
+import { trendMatchCache, TrendMatchCache } from '@/services/trend-match-cache';
+import { VectorRecord, VectorStore } from '@/services/vector-store';
+import { TrendMatch } from '@/types';
+
+// Candidates pulled from the index for the local reranking pass
+const RERANK_CANDIDATES = 50;
+
+export const createVectorStore = (backend = process.env.VECTOR_STORE_BACKEND || 'pinecone'): VectorStore => {
+  switch (backend) {
+    case 'weaviate':
+      return new WeaviateVectorStore();
+    case 'memory':
+      return new MemoryVectorStore();
+    case 'pinecone':
+      return new PineconeVectorStore();
+    default:
+      throw new Error(`Unknown vector store backend: ${backend}`);
+  }
+};
+
+export class VectorSearchService {
+  constructor(private store: VectorStore, private cache: TrendMatchCache) {}
+
+  get backend(): string {
+    return this.store.name;
+  }
+
+  // Every catalog write bumps the match cache version, so no cached result
+  // can outlive the vectors it came from
+  async upsertTrend(trendId: string, embedding: number[], metadata: Record<string, unknown>) {
+    return this.upsertTrends([{ id: trendId, values: embedding, metadata }]);
+  }
+
+  async upsertTrends(records: VectorRecord[]) {
+    if (!records.length) return;
+    await this.store.upsert(records);
+    await this.cache.invalidate();
+  }
+
+  async deleteTrend(trendId: string) {
+    return this.deleteTrends([trendId]);
+  }
+
+  async deleteTrends(trendIds: string[]) {
+    if (!trendIds.length) return;
+    await this.store.delete(trendIds);
+    await this.cache.invalidate();
+  }
+
+  // Over-fetches from the index, then reranks locally on colour, mood,
+  // platform and popularity so the top matches reflect more than the vector
+  async findSimilarTrends(
+    embedding: number[],
+    topK: number = 5,
+    context: RerankContext = {}
+  ): Promise<TrendMatch[]> {
+    try {
+      // Only the index query is cached. Trend rows are always read fresh, so
+      // popularity and isActive changes apply without invalidating anything.
+      const candidateCount = Math.max(topK, RERANK_CANDIDATES);
+      let matches = await this.cache.get(embedding, candidateCount);
+      if (!matches) {
+        matches = await this.store.query(embedding, candidateCount);
+        await this.cache.set(embedding, candidateCount, matches);
+      }
+
+      const trends = await prisma.trend.findMany({
+        where: { id: { in: matches.map(match => match.id) }, isActive: true },
+        select: { id: true, name: true, platforms: true, popularity: true, colors: true, mood: true, updatedAt: true },
+      });
+      const byId = new Map(trends.map(trend => [trend.id, trend]));
+
+      const candidates = matches
+        .filter(match => byId.has(match.id))
+        .map(match => ({ trend: byId.get(match.id)!, vectorScore: match.score }));
+
+      return rerankTrends(candidates, context, topK);
+    } catch (error) {
+      console.error('Error finding similar trends:', error);
+      throw new Error('Failed to find similar trends');
+    }
+  }
+
+  async searchTrends(query: string, topK: number = 5): Promise<TrendMatch[]> {
+    const embedding = await openaiService.generateEmbedding(query);
+    return this.findSimilarTrends(embedding, topK);
+  }
+}
+
+export const vectorSearchService = new VectorSearchService(createVectorStore(), trendMatchCache);
@@ -0,0 +1,20 @@
+export interface VectorRecord {
+  id: string;
+  values: number[];
+  metadata?: Record<string, unknown>;
+}
+
+export interface VectorMatch {
+  id: string;
+  // Cosine similarity, higher is closer
+  score: number;
+}
+
+// The operations trend matching needs from a vector backend. Implementations
+// batch internally, so callers can pass any number of records or ids.
+export interface VectorStore {
+  readonly name: string;
+  upsert(records: VectorRecord[]): Promise<void>;
+  query(vector: number[], topK: number): Promise<VectorMatch[]>;
+  delete(ids: string[]): Promise<void>;
+}
@@ -0,0 +1,427 @@
+import { Job, Queue, QueueEvents, Worker } from 'bullmq';
+import { v2 as cloudinary } from 'cloudinary';
+import Redis from 'ioredis';
+import { spawn } from 'child_process';
+import { createHash } from 'crypto';
+import { createReadStream, createWriteStream } from 'fs';
+import { mkdtemp, rm } from 'fs/promises';
+import { availableParallelism, tmpdir } from 'os';
+import { join } from 'path';
+import { Readable, Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+import { PLATFORM_VIDEO_RENDITIONS, VIDEO_RENDITIONS } from '@/lib/constants';
+import { DeletionItem, deletionService } from '@/services/deletion';
+import { s3Service } from '@/services/storage/s3';
+
+export type VideoPlatform = keyof typeof PLATFORM_VIDEO_RENDITIONS;
+export type RenditionName = keyof typeof VIDEO_RENDITIONS;
+export type TranscodeStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface TranscodeJob {
+  id: string;
+  userId: string;
+  mediaId: string;
+  platforms: VideoPlatform[];
+  status: TranscodeStatus;
+  // 0-100 across the whole job, including download and upload
+  progress: number;
+  // Rendition URLs by name, and which rendition each platform should use
+  renditions: Partial<Record<RenditionName, string>>;
+  platformRenditions: Partial<Record<VideoPlatform, Partial<Record<RenditionName, string>>>>;
+  cachedRenditions: RenditionName[];
+  error?: string;
+  createdAt: number;
+  finishedAt?: number;
+}
+
+export type TranscodeListener = (job: TranscodeJob) => void;
+
+interface TranscodeData {
+  userId: string;
+  mediaId: string;
+  sourceUrl: string;
+  platforms: VideoPlatform[];
+}
+
+type TranscodeResult = Pick<TranscodeJob, 'renditions' | 'platformRenditions' | 'cachedRenditions'>;
+
+interface TranscodeOutputStore {
+  find(key: string): Promise<string | null>;
+  save(key: string, path: string): Promise<string>;
+  // The stored object, as queued for deletion with its media file
+  deletionItem(key: string): DeletionItem;
+}
+
+const FFMPEG_PATH = process.env.FFMPEG_PATH || 'ffmpeg';
+const FFPROBE_PATH = process.env.FFPROBE_PATH || 'ffprobe';
+// ffmpeg already spreads one encode over several cores, so only a few run
+// at once
+const CONCURRENCY = Number(process.env.FFMPEG_CONCURRENCY) || Math.max(1, Math.floor(availableParallelism() / 4));
+const PRESET = process.env.FFMPEG_PRESET || 'veryfast';
+// Part of every cache key; bump it when the encoder settings below change
+const ENCODER_PROFILE = { version: 1, codec: 'libx264', preset: PRESET, crf: 21, audio: 'aac-128k' };
+const QUEUE_NAME = 'video-transcode';
+// Finished jobs stay readable for this long
+const JOB_RETENTION_SECONDS = 15 * 60;
+const FETCH_TIMEOUT_MS = 5 * 60 * 1000;
+const STDERR_TAIL = 4000;
+
+// Progress weights: fetching the source, encoding, storing the outputs
+const FETCH_SHARE = 10;
+const ENCODE_SHARE = 80;
+
+const renditionKey = (sourceHash: string, name: RenditionName): string => {
+  return createHash('sha256')
+    .update(sourceHash)
+    .update(JSON.stringify({ rendition: VIDEO_RENDITIONS[name], encoder: ENCODER_PROFILE }))
+    .digest('hex');
+};
+
+class S3TranscodeOutputStore implements TranscodeOutputStore {
+  async find(key: string) {
+    const path = `transcodes/${key}.mp4`;
+    return (await s3Service.head(path)) ? s3Service.objectUrl(path) : null;
+  }
+
+  async save(key: string, path: string) {
+    return s3Service.upload(`transcodes/${key}.mp4`, createReadStream(path), { contentType: 'video/mp4' });
+  }
+
+  deletionItem(key: string): DeletionItem {
+    return { target: 's3', key: `transcodes/${key}.mp4` };
+  }
+}
+
+class CloudinaryTranscodeOutputStore implements TranscodeOutputStore {
+  async find(key: string) {
+    try {
+      const resource = await cloudinary.api.resource(`manty/transcodes/${key}`, { resource_type: 'video' });
+      return resource.secure_url as string;
+    } catch (error: any) {
+      if (error?.error?.http_code === 404) return null;
+      throw error;
+    }
+  }
+
+  async save(key: string, path: string) {
+    const result: any = await new Promise((resolve, reject) => {
+      cloudinary.uploader.upload_large(path, {
+        resource_type: 'video',
+        public_id: `manty/transcodes/${key}`,
+      }, (error, response) => (error ? reject(error) : resolve(response)));
+    });
+    return result.secure_url as string;
+  }
+
+  deletionItem(key: string): DeletionItem {
+    return { target: 'cloudinary:video', key: `manty/transcodes/${key}` };
+  }
+}
+
+// Scale to cover the frame, then centre-crop to it exactly
+const frameFilter = (name: RenditionName): string => {
+  const { width, height } = VIDEO_RENDITIONS[name];
+  return `scale=${width}:${height}:force_original_aspect_ratio=increase,crop=${width}:${height},setsar=1`;
+};
+
+// One ffmpeg process per source: the video is decoded once and split into
+// a branch per rendition, each encoded to its own output
+export const buildFfmpegArgs = (input: string, outputs: { name: RenditionName; path: string }[]): string[] => {
+  const split = outputs.length > 1
+    ? `[0:v]split=${outputs.length}${outputs.map((_, i) => `[s${i}]`).join('')};`
+    : '';
+  const branches = outputs
+    .map((output, i) => `[${outputs.length > 1 ? `s${i}` : '0:v'}]${frameFilter(output.name)}[v${i}]`)
+    .join(';');
+
+  return [
+    '-hide_banner', '-nostdin', '-y', '-nostats',
+    '-progress', 'pipe:1',
+    '-i', input,
+    '-filter_complex', split + branches,
+    ...outputs.flatMap((output, i) => [
+      '-map', `[v${i}]`, '-map', '0:a?',
+      '-c:v', ENCODER_PROFILE.codec, '-preset', PRESET, '-crf', String(ENCODER_PROFILE.crf),
+      '-profile:v', 'high', '-pix_fmt', 'yuv420p',
+      '-c:a', 'aac', '-b:a', '128k', '-ar', '48000',
+      '-movflags', '+faststart',
+      output.path,
+    ]),
+  ];
+};
+
+const STATUSES: Record<string, TranscodeStatus> = {
+  active: 'running',
+  completed: 'completed',
+  failed: 'failed',
+};
+
+const toTranscodeJob = async (job: Job<TranscodeData, TranscodeResult>): Promise<TranscodeJob> => {
+  const status = STATUSES[await job.getState()] || 'queued';
+  return {
+    id: job.id!,
+    userId: job.data.userId,
+    mediaId: job.data.mediaId,
+    platforms: job.data.platforms,
+    status,
+    progress: status === 'completed' ? 100 : Number(job.progress) || 0,
+    renditions: job.returnvalue?.renditions || {},
+    platformRenditions: job.returnvalue?.platformRenditions || {},
+    cachedRenditions: job.returnvalue?.cachedRenditions || [],
+    ...(status === 'failed' && { error: 'Failed to transcode video' }),
+    createdAt: job.timestamp,
+    finishedAt: job.finishedOn,
+  };
+};
+
+// Platform transcodes, queued in Redis and encoded by a bounded pool of
+// local ffmpeg processes in a long-lived worker (scripts/transcode-worker.ts).
+// API routes only enqueue and read jobs, so any instance can report on any
+// job, and serverless functions never host an encode. Each rendition is
+// cached by source hash plus encoding profile, so re-exporting a video, or
+// exporting it for another platform that shares a frame, only encodes what
+// has never been encoded.
+export class VideoTranscodeService {
+  private queue: Queue<TranscodeData, TranscodeResult> | null = null;
+  private events: QueueEvents | null = null;
+  private listeners = new Map<string, Set<TranscodeListener>>();
+
+  constructor(private store: TranscodeOutputStore, private redisUrl = process.env.REDIS_URL) {}
+
+  get enabled(): boolean {
+    return Boolean(this.redisUrl);
+  }
+
+  // The same media and platforms always map to the same job id, so a repeat
+  // request joins queued, running or recently finished work
+  async enqueue(userId: string, mediaId: string, sourceUrl: string, platforms: VideoPlatform[]): Promise<TranscodeJob> {
+    const wanted = [...new Set(platforms)].sort();
+    const jobId = createHash('sha256').update(JSON.stringify([userId, mediaId, wanted])).digest('hex');
+    const queue = this.getQueue();
+
+    let job = await queue.getJob(jobId);
+    if (job && await job.isFailed()) {
+      // Asking again retries a failed transcode
+      await job.remove();
+      job = undefined;
+    }
+    if (!job) {
+      job = await queue.add('transcode', { userId, mediaId, sourceUrl, platforms: wanted }, {
+        jobId,
+        removeOnComplete: { age: JOB_RETENTION_SECONDS },
+        removeOnFail: { age: JOB_RETENTION_SECONDS },
+      });
+    }
+
+    return toTranscodeJob(job);
+  }
+
+  async getJob(id: string): Promise<TranscodeJob | undefined> {
+    const job = await this.getQueue().getJob(id);
+    return job ? toTranscodeJob(job) : undefined;
+  }
+
+  // Called with the job on every progress or status change, whichever
+  // worker runs it
+  subscribe(id: string, listener: TranscodeListener): () => void {
+    this.getEvents();
+
+    let listeners = this.listeners.get(id);
+    if (!listeners) {
+      listeners = new Set();
+      this.listeners.set(id, listeners);
+    }
+    listeners.add(listener);
+
+    return () => {
+      listeners!.delete(listener);
+      if (!listeners!.size) this.listeners.delete(id);
+    };
+  }
+
+  // Resolves once job events are being received
+  async eventsReady() {
+    await this.getEvents().waitUntilReady();
+  }
+
+  // Runs queued transcodes until closed. For a long-lived process only: an
+  // encode outlives any serverless function.
+  startWorker(concurrency = CONCURRENCY): Worker<TranscodeData, TranscodeResult> {
+    return new Worker<TranscodeData, TranscodeResult>(QUEUE_NAME, job => this.run(job), {
+      connection: this.connect(),
+      concurrency,
+    });
+  }
+
+  private connect(): Redis {
+    if (!this.redisUrl) throw new Error('REDIS_URL is required for video transcoding');
+    // BullMQ's blocking commands must not give up on a slow reply
+    return new Redis(this.redisUrl, { maxRetriesPerRequest: null });
+  }
+
+  private getQueue(): Queue<TranscodeData, TranscodeResult> {
+    if (!this.queue) this.queue = new Queue(QUEUE_NAME, { connection: this.connect() });
+    return this.queue;
+  }
+
+  private getEvents(): QueueEvents {
+    if (!this.events) {
+      this.events = new QueueEvents(QUEUE_NAME, { connection: this.connect() });
+
+      const notify = async ({ jobId }: { jobId: string }) => {
+        if (!this.listeners.has(jobId)) return;
+        try {
+          const job = await this.getJob(jobId);
+          if (job) this.listeners.get(jobId)?.forEach(listener => listener(job));
+        } catch (error) {
+          console.error('Error reading transcode job:', error);
+        }
+      };
+      this.events.on('active', notify);
+      this.events.on('progress', notify);
+      this.events.on('completed', notify);
+      this.events.on('failed', notify);
+    }
+    return this.events;
+  }
+
+  private async run(job: Job<TranscodeData, TranscodeResult>): Promise<TranscodeResult> {
+    const { mediaId, sourceUrl, platforms } = job.data;
+    let workdir: string | undefined;
+
+    // Progress callbacks fire per chunk; only whole-percent steps are news
+    let progress = 0;
+    const report = (value: number) => {
+      const rounded = Math.round(value);
+      if (rounded === progress) return;
+      progress = rounded;
+      job.updateProgress(rounded).catch(error => console.error('Error reporting transcode progress:', error));
+    };
+
+    try {
+      workdir = await mkdtemp(join(tmpdir(), 'manty-transcode-'));
+      const input = join(workdir, 'source');
+      const sourceHash = await this.download(sourceUrl, input, report);
+
+      const names = [...new Set(platforms.flatMap(platform => PLATFORM_VIDEO_RENDITIONS[platform]))] as RenditionName[];
+      const keys = Object.fromEntries(names.map(name => [name, renditionKey(sourceHash, name)])) as Record<RenditionName, string>;
+
+      // Recorded on the media file before cached renditions are reused, which
+      // cancels any pending deletion of them, and again once stored, in case
+      // the file was deleted while encoding
+      const transcodes = names.map(name => this.store.deletionItem(keys[name]));
+      await deletionService.recordTranscodes(mediaId, transcodes);
+
+      const found = await Promise.all(names.map(name => this.store.find(keys[name])));
+      const renditions: Partial<Record<RenditionName, string>> = {};
+      names.forEach((name, i) => {
+        if (found[i]) renditions[name] = found[i]!;
+      });
+      const cachedRenditions = names.filter(name => renditions[name]);
+      const missing = names.filter(name => !renditions[name]);
+
+      if (missing.length) {
+        const outputs = missing.map(name => ({ name, path: join(workdir!, `${name}.mp4`) }));
+        await this.encode(input, outputs, report);
+
+        const urls = await Promise.all(outputs.map(output => this.store.save(keys[output.name], output.path)));
+        outputs.forEach((output, i) => {
+          renditions[output.name] = urls[i];
+        });
+      }
+
+      await deletionService.recordTranscodes(mediaId, transcodes);
+
+      const platformRenditions = Object.fromEntries(platforms.map(platform => [
+        platform,
+        Object.fromEntries(PLATFORM_VIDEO_RENDITIONS[platform].map(name => [name, renditions[name]])),
+      ]));
+
+      return { renditions, platformRenditions, cachedRenditions };
+    } catch (error) {
+      console.error('Error transcoding video:', error);
+      throw error;
+    } finally {
+      if (workdir) await rm(workdir, { recursive: true, force: true });
+    }
+  }
+
+  // Streams the source to disk and hashes it on the way, in one pass
+  private async download(sourceUrl: string, path: string, report: (progress: number) => void): Promise<string> {
+    const response = await fetch(sourceUrl, { signal: AbortSignal.timeout(FETCH_TIMEOUT_MS) });
+    if (!response.ok || !response.body) throw new Error(`Video fetch failed: ${response.status}`);
+
+    const total = Number(response.headers.get('content-length')) || 0;
+    const hash = createHash('sha256');
+    let received = 0;
+
+    await pipeline(
+      Readable.fromWeb(response.body as any),
+      new Transform({
+        transform: (chunk: Buffer, _encoding, callback) => {
+          hash.update(chunk);
+          received += chunk.length;
+          if (total) report((received / total) * FETCH_SHARE);
+          callback(null, chunk);
+        },
+      }),
+      createWriteStream(path)
+    );
+
+    return hash.digest('hex');
+  }
+
+  private async encode(input: string, outputs: { name: RenditionName; path: string }[], report: (progress: number) => void) {
+    const duration = await this.probeDuration(input);
+
+    await new Promise<void>((resolve, reject) => {
+      const ffmpeg = spawn(FFMPEG_PATH, buildFfmpegArgs(input, outputs), { stdio: ['ignore', 'pipe', 'pipe'] });
+      let stderr = '';
+      let buffered = '';
+
+      // -progress writes key=value lines; out_time_us is the encoded position
+      ffmpeg.stdout.on('data', (chunk: Buffer) => {
+        buffered += chunk.toString();
+        const lines = buffered.split('\n');
+        buffered = lines.pop()!;
+        lines.forEach(line => {
+          const [key, value] = line.split('=');
+          if (key === 'out_time_us' && duration) {
+            const encoded = Math.min(1, Number(value) / 1e6 / duration);
+            report(FETCH_SHARE + encoded * ENCODE_SHARE);
+          }
+        });
+      });
+      ffmpeg.stderr.on('data', (chunk: Buffer) => {
+        stderr = (stderr + chunk.toString()).slice(-STDERR_TAIL);
+      });
+
+      ffmpeg.on('error', reject);
+      ffmpeg.on('close', code => {
+        if (code === 0) resolve();
+        else reject(new Error(`ffmpeg exited with code ${code}: ${stderr}`));
+      });
+    });
+
+    report(FETCH_SHARE + ENCODE_SHARE);
+  }
+
+  private probeDuration(input: string): Promise<number> {
+    return new Promise(resolve => {
+      const ffprobe = spawn(FFPROBE_PATH, [
+        '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', input,
+      ]);
+      let output = '';
+      ffprobe.stdout.on('data', (chunk: Buffer) => {
+        output += chunk.toString();
+      });
+      // Progress is a nicety; an unreadable duration just disables it
+      ffprobe.on('error', () => resolve(0));
+      ffprobe.on('close', () => resolve(Number(output.trim()) || 0));
+    });
+  }
+}
+
+export const videoTranscodeService = new VideoTranscodeService(
+  process.env.UPLOAD_BACKEND === 's3' ? new S3TranscodeOutputStore() : new CloudinaryTranscodeOutputStore()
+);
@@ -0,0 +1,135 @@
+import { createHash } from 'crypto';
+import { VectorMatch, VectorRecord, VectorStore } from '@/services/vector-store';
+
+const BATCH_SIZE = 100;
+const DELETE_BATCH_SIZE = 1000;
+
+// Weaviate object ids must be UUIDs; derive a stable one from the trend id
+// (name-based, version 5 layout) so re-upserts overwrite the same object
+const objectId = (id: string): string => {
+  const bytes = createHash('sha1').update(id).digest().subarray(0, 16);
+  bytes[6] = (bytes[6] & 0x0f) | 0x50;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = bytes.toString('hex');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+// Talks to Weaviate's REST and GraphQL endpoints directly, so no client
+// library is needed. Vectors are supplied by us (vectorizer "none").
+export class WeaviateVectorStore implements VectorStore {
+  readonly name = 'weaviate';
+  private baseUrl: string;
+  private className: string;
+  private schemaReady: Promise<void> | null = null;
+
+  constructor(className = process.env.WEAVIATE_CLASS_NAME || 'Trend') {
+    this.baseUrl = (process.env.WEAVIATE_URL || 'http://localhost:8080').replace(/\/+$/, '');
+    this.className = className;
+  }
+
+  async upsert(records: VectorRecord[]) {
+    try {
+      await this.ensureSchema();
+
+      for (let i = 0; i < records.length; i += BATCH_SIZE) {
+        const results = await this.request('POST', '/v1/batch/objects', {
+          objects: records.slice(i, i + BATCH_SIZE).map(record => ({
+            class: this.className,
+            id: objectId(record.id),
+            vector: record.values,
+            properties: { trendId: record.id },
+          })),
+        });
+
+        const failed = (results as any[]).find(result => result.result?.errors);
+        if (failed) throw new Error(JSON.stringify(failed.result.errors));
+      }
+    } catch (error) {
+      console.error('Error upserting vectors:', error);
+      throw new Error('Failed to upsert vectors');
+    }
+  }
+
+  async query(vector: number[], topK: number): Promise<VectorMatch[]> {
+    try {
+      await this.ensureSchema();
+
+      const response = await this.request('POST', '/v1/graphql', {
+        query: `{ Get { ${this.className}(nearVector: { vector: ${JSON.stringify(vector)} }, limit: ${topK}) { trendId _additional { distance } } } }`,
+      });
+      if (response.errors?.length) throw new Error(response.errors[0].message);
+
+      // Cosine distance is 1 - similarity
+      return (response.data?.Get?.[this.className] || []).map((item: any) => ({
+        id: item.trendId,
+        score: 1 - item._additional.distance,
+      }));
+    } catch (error) {
+      console.error('Error querying vectors:', error);
+      throw new Error('Failed to query vectors');
+    }
+  }
+
+  async delete(ids: string[]) {
+    try {
+      await this.ensureSchema();
+
+      for (let i = 0; i < ids.length; i += DELETE_BATCH_SIZE) {
+        await this.request('DELETE', '/v1/batch/objects', {
+          match: {
+            class: this.className,
+            where: {
+              path: ['trendId'],
+              operator: 'ContainsAny',
+              valueTextArray: ids.slice(i, i + DELETE_BATCH_SIZE),
+            },
+          },
+        });
+      }
+    } catch (error) {
+      console.error('Error deleting vectors:', error);
+      throw new Error('Failed to delete vectors');
+    }
+  }
+
+  private ensureSchema(): Promise<void> {
+    if (!this.schemaReady) {
+      this.schemaReady = this.createClassIfMissing().catch(error => {
+        this.schemaReady = null;
+        throw error;
+      });
+    }
+    return this.schemaReady;
+  }
+
+  private async createClassIfMissing() {
+    const existing = await fetch(`${this.baseUrl}/v1/schema/${this.className}`, { headers: this.headers() });
+    if (existing.ok) return;
+    if (existing.status !== 404) throw new Error(`Weaviate schema lookup failed: ${existing.status}`);
+
+    await this.request('POST', '/v1/schema', {
+      class: this.className,
+      vectorizer: 'none',
+      vectorIndexConfig: { distance: 'cosine' },
+      properties: [{ name: 'trendId', dataType: ['text'], tokenization: 'field' }],
+    });
+  }
+
+  private async request(method: string, path: string, body: unknown): Promise<any> {
+    const response = await fetch(`${this.baseUrl}${path}`, {
+      method,
+      headers: { ...this.headers(), 'Content-Type': 'application/json' },
+      body: JSON.stringify(body),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Weaviate ${method} ${path} failed: ${response.status} ${await response.text()}`);
+    }
+    return response.status === 204 ? null : response.json();
+  }
+
+  private headers(): Record<string, string> {
+    const apiKey = process.env.WEAVIATE_API_KEY;
+    return apiKey ? { Authorization: `Bearer ${apiKey}` } : {};
+  }
+}
@@ -0,0 +1,150 @@
+import { describe, it, expect } from 'vitest';
+import { enforceCaptionConstraints, getCaptionLimits, truncateCaption } from '@/lib/captions';
+
+const tags = (count: number, prefix = 'tag') => Array.from({ length: count }, (_, i) => `#${prefix}${i}`);
+
+// A lone surrogate means a character was cut in half
+const LONE_SURROGATE = /[\uD800-\uDBFF](?![\uDC00-\uDFFF])|(?<![\uD800-\uDBFF])[\uDC00-\uDFFF]/;
+
+describe('getCaptionLimits', () => {
+  it('uses the caption limits of each platform', () => {
+    expect(getCaptionLimits('instagram')).toEqual({ maxLength: 2200, maxHashtags: 30, recommendedHashtags: 11 });
+    expect(getCaptionLimits('tiktok')).toEqual({ maxLength: 300, maxHashtags: 100, recommendedHashtags: 5 });
+  });
+
+  it('stands in the description and tag limits for YouTube', () => {
+    expect(getCaptionLimits('youtube')).toEqual({ maxLength: 5000, maxHashtags: 15, recommendedHashtags: 15 });
+  });
+});
+
+describe('truncateCaption', () => {
+  it('leaves text that fits alone', () => {
+    expect(truncateCaption('Short and sweet', 20)).toBe('Short and sweet');
+  });
+
+  it('cuts at a word boundary and marks the cut', () => {
+    const result = truncateCaption('Golden hour on the pier with friends', 24);
+    expect(result).toBe('Golden hour on the…');
+    expect(result.length).toBeLessThanOrEqual(24);
+  });
+
+  it('cuts mid-word when the last space is too far back', () => {
+    expect(truncateCaption('Supercalifragilisticexpialidocious', 10)).toBe('Supercali…');
+  });
+
+  it('never splits an emoji', () => {
+    const result = truncateCaption('😀'.repeat(20), 10);
+    expect(result).toBe('😀😀😀😀…');
+    expect(result).not.toMatch(LONE_SURROGATE);
+  });
+
+  it('keeps joined emoji and flags whole', () => {
+    const family = '👨‍👩‍👧‍👦';
+    const result = truncateCaption(`${family}${family}🇫🇷🇫🇷`, 14);
+    expect(result).toBe(`${family}…`);
+
+    expect(truncateCaption('🇫🇷🇫🇷🇫🇷🇫🇷', 8)).toBe('🇫🇷…');
+  });
+});
+
+describe('enforceCaptionConstraints', () => {
+  it('passes a caption that already fits', () => {
+    const caption = 'Sunset swim 🌅\n\n#beach #summer';
+    const result = enforceCaptionConstraints(caption, 'instagram');
+    expect(result.text).toBe('Sunset swim 🌅\n\n#beach #summer');
+    expect(result.hashtags).toEqual(['#beach', '#summer']);
+    expect(result.characterCount).toBe(result.text.length);
+    expect(result.validation).toEqual({
+      platform: 'instagram',
+      valid: true,
+      issues: [],
+      warnings: [],
+      originalLength: caption.length,
+      removedHashtags: [],
+      truncated: false,
+    });
+  });
+
+  it('tidies whitespace', () => {
+    const result = enforceCaptionConstraints('  Line one\r\n\r\n\r\n\r\nLine two  ', 'instagram');
+    expect(result.text).toBe('Line one\n\nLine two');
+    expect(result.validation.valid).toBe(true);
+  });
+
+  it('drops repeated hashtags whatever their case', () => {
+    const result = enforceCaptionConstraints('Beach day #Beach #sun #beach #SUN #waves', 'instagram');
+    expect(result.hashtags).toEqual(['#Beach', '#sun', '#waves']);
+    expect(result.text).toBe('Beach day #Beach #sun #waves');
+    expect(result.validation.removedHashtags).toEqual(['#beach', '#SUN']);
+    expect(result.validation.issues).toEqual(['Removed 2 duplicate hashtag(s)']);
+    expect(result.validation.valid).toBe(false);
+  });
+
+  it('treats hashtags in other scripts as hashtags', () => {
+    const result = enforceCaptionConstraints('Tokyo nights #東京 #夜景 #東京', 'instagram');
+    expect(result.hashtags).toEqual(['#東京', '#夜景']);
+  });
+
+  it('removes every hashtag when hashtags are not wanted', () => {
+    const result = enforceCaptionConstraints('Coffee first #coffee #morning', 'instagram', { includeHashtags: false });
+    expect(result.text).toBe('Coffee first');
+    expect(result.hashtags).toEqual([]);
+    expect(result.validation.removedHashtags).toEqual(['#coffee', '#morning']);
+  });
+
+  it('caps hashtags at the platform maximum, keeping the first ones', () => {
+    const result = enforceCaptionConstraints(`Caption\n\n${tags(35).join(' ')}`, 'instagram');
+    expect(result.hashtags).toEqual(tags(30));
+    expect(result.validation.removedHashtags).toEqual(tags(35).slice(30));
+    expect(result.validation.issues).toEqual(['Hashtags capped at 30 (had 35)']);
+  });
+
+  it('warns without changing anything above the recommended count', () => {
+    const result = enforceCaptionConstraints(`Caption ${tags(8).join(' ')}`, 'tiktok');
+    expect(result.hashtags).toHaveLength(8);
+    expect(result.validation.valid).toBe(true);
+    expect(result.validation.warnings).toEqual(['Uses 8 hashtags; 5 recommended for tiktok']);
+  });
+
+  it('trims the body and keeps the trailing hashtag block within the limit', () => {
+    const body = 'Chasing waves and sunsets along the coast '.repeat(10).trim();
+    const result = enforceCaptionConstraints(`${body}\n\n#beach #sunset #travel`, 'tiktok');
+
+    expect(result.text.length).toBeLessThanOrEqual(300);
+    expect(result.text.endsWith('…\n\n#beach #sunset #travel')).toBe(true);
+    expect(result.hashtags).toEqual(['#beach', '#sunset', '#travel']);
+    expect(result.validation.truncated).toBe(true);
+    expect(result.validation.issues[0]).toMatch(/^Caption exceeded 300 characters/);
+  });
+
+  it('gives up surplus hashtags before cutting into the body', () => {
+    const body = 'A'.repeat(250);
+    const result = enforceCaptionConstraints(`${body} ${tags(12).join(' ')}`, 'tiktok');
+
+    // Hashtags go from the end until the whole caption fits again
+    expect(result.text).toBe(`${body}\n\n${tags(8).join(' ')}`);
+    expect(result.text.length).toBeLessThanOrEqual(300);
+    expect(result.validation.truncated).toBe(false);
+    expect(result.validation.removedHashtags).toEqual(tags(12).slice(8).reverse());
+  });
+
+  it('drops the hashtag block when the body would have no room left', () => {
+    const result = enforceCaptionConstraints(`${'word '.repeat(20)}#one #two`, 'tiktok', { maxLength: 30 });
+    expect(result.text.length).toBeLessThanOrEqual(30);
+    expect(result.hashtags).toEqual([]);
+    expect(result.validation.removedHashtags).toEqual(['#one', '#two']);
+  });
+
+  it('honours a tighter maxLength than the platform allows', () => {
+    const result = enforceCaptionConstraints('Morning light over the quiet harbour today', 'instagram', { maxLength: 20 });
+    expect(result.text.length).toBeLessThanOrEqual(20);
+    expect(result.validation.truncated).toBe(true);
+  });
+
+  it('never leaves half an emoji when truncating', () => {
+    const result = enforceCaptionConstraints(`${'Sunny 😎 '.repeat(60)}#sun`, 'tiktok');
+    expect(result.text.length).toBeLessThanOrEqual(300);
+    expect(result.text).not.toMatch(LONE_SURROGATE);
+    expect(result.hashtags).toEqual(['#sun']);
+  });
+});
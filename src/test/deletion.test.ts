@@ -0,0 +1,118 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { Prisma } from '@prisma/client';
+import { prisma } from '@/lib/db';
+import { s3Service } from '@/services/storage/s3';
+import { cloudinaryService } from '@/services/storage/cloudinary';
+import { DeletionService } from '@/services/deletion';
+
+vi.mock('@/lib/db', () => ({
+  prisma: {
+    mediaTranscode: { createMany: vi.fn(), findMany: vi.fn() },
+    pendingDeletion: { createMany: vi.fn(), deleteMany: vi.fn(), updateMany: vi.fn() },
+    $transaction: vi.fn(),
+    $queryRaw: vi.fn(),
+  },
+}));
+vi.mock('@/services/caption-prefetch', () => ({ captionPrefetchService: { cancel: vi.fn() } }));
+vi.mock('@/services/media-variants', () => ({ s3VariantKeys: vi.fn(() => []) }));
+vi.mock('@/services/storage/s3', () => ({ s3Service: { deleteFiles: vi.fn(), thumbnailKey: vi.fn() } }));
+vi.mock('@/services/storage/cloudinary', () => ({ cloudinaryService: { deleteFiles: vi.fn() } }));
+vi.mock('@/services/vector-search', () => ({ vectorSearchService: { deleteTrends: vi.fn() } }));
+
+const transcodes = [
+  { target: 's3' as const, key: 'transcodes/abc-vertical.mp4' },
+  { target: 's3' as const, key: 'transcodes/abc-square.mp4' },
+];
+
+describe('DeletionService.recordTranscodes', () => {
+  beforeEach(() => {
+    vi.resetAllMocks();
+    vi.mocked(prisma.$transaction).mockImplementation((async (ops: unknown[]) => Promise.all(ops)) as any);
+  });
+
+  it('inserts ownership rows and cancels pending deletions of reused transcodes', async () => {
+    const service = new DeletionService();
+    await service.recordTranscodes('media-1', transcodes);
+
+    expect(prisma.mediaTranscode.createMany).toHaveBeenCalledWith({
+      data: transcodes.map(item => ({ mediaId: 'media-1', ...item })),
+      skipDuplicates: true,
+    });
+    expect(prisma.pendingDeletion.deleteMany).toHaveBeenCalledWith({
+      where: { target: 's3', key: { in: transcodes.map(item => item.key) } },
+    });
+    expect(prisma.pendingDeletion.createMany).not.toHaveBeenCalled();
+  });
+
+  it('queues the transcodes of a file deleted while encoding unless another file uses them', async () => {
+    const service = new DeletionService();
+    vi.spyOn(service, 'processInBackground').mockImplementation(() => {});
+    vi.mocked(prisma.$transaction).mockRejectedValueOnce(
+      new Prisma.PrismaClientKnownRequestError('Foreign key constraint failed', { code: 'P2003', clientVersion: '5.14.0' })
+    );
+    vi.mocked(prisma.mediaTranscode.findMany).mockResolvedValue([transcodes[0]] as any);
+
+    await service.recordTranscodes('media-1', transcodes);
+
+    expect(prisma.mediaTranscode.findMany).toHaveBeenCalledWith({
+      where: { mediaId: { notIn: ['media-1'] }, OR: [{ target: 's3', key: { in: transcodes.map(item => item.key) } }] },
+      select: { target: true, key: true },
+    });
+    expect(prisma.pendingDeletion.createMany).toHaveBeenCalledWith({
+      data: [{ ...transcodes[1], nextAttemptAt: undefined }],
+      skipDuplicates: true,
+    });
+  });
+
+  it('rethrows other database errors', async () => {
+    vi.mocked(prisma.$transaction).mockRejectedValueOnce(new Error('connection lost'));
+    await expect(new DeletionService().recordTranscodes('media-1', transcodes)).rejects.toThrow('connection lost');
+  });
+});
+
+describe('DeletionService.processPending', () => {
+  beforeEach(() => {
+    vi.resetAllMocks();
+    vi.mocked(prisma.$transaction).mockImplementation((async (ops: unknown[]) => Promise.all(ops)) as any);
+    vi.mocked(s3Service.deleteFiles).mockResolvedValue(new Map());
+    vi.mocked(cloudinaryService.deleteFiles).mockResolvedValue(new Map());
+  });
+
+  it('claims due rows in one locking statement and settles only those', async () => {
+    const claimed = [
+      { id: 'row-1', target: 's3', key: 'uploads/a.jpg', attempts: 0 },
+      { id: 'row-2', target: 'cloudinary:image', key: 'manty/b', attempts: 2 },
+    ];
+    vi.mocked(prisma.$queryRaw).mockResolvedValueOnce(claimed as any).mockResolvedValue([]);
+    vi.mocked(prisma.mediaTranscode.findMany).mockResolvedValue([]);
+    vi.mocked(cloudinaryService.deleteFiles).mockResolvedValue(new Map([['manty/b', 'rate limited']]));
+
+    expect(await new DeletionService().processPending()).toBe(1);
+
+    const [sql] = vi.mocked(prisma.$queryRaw).mock.calls[0] as unknown as [TemplateStringsArray];
+    expect(sql.join('?')).toMatch(/FOR UPDATE SKIP LOCKED[\s\S]*RETURNING/);
+    expect(s3Service.deleteFiles).toHaveBeenCalledWith(['uploads/a.jpg']);
+    expect(cloudinaryService.deleteFiles).toHaveBeenCalledWith(['manty/b'], 'image');
+    expect(prisma.pendingDeletion.deleteMany).toHaveBeenCalledWith({ where: { id: { in: ['row-1'] } } });
+    expect(prisma.pendingDeletion.updateMany).toHaveBeenCalledTimes(1);
+    expect(prisma.pendingDeletion.updateMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { id: 'row-2' },
+      data: expect.objectContaining({ attempts: { increment: 1 }, lastError: 'rate limited' }),
+    }));
+  });
+
+  it('keeps transcodes another file recorded after they were queued', async () => {
+    const due = [
+      { id: 'row-1', target: 's3', key: transcodes[0].key, attempts: 0 },
+      { id: 'row-2', target: 's3', key: transcodes[1].key, attempts: 0 },
+      { id: 'row-3', target: 's3', key: 'uploads/photo.jpg', attempts: 0 },
+    ];
+    vi.mocked(prisma.$queryRaw).mockResolvedValueOnce(due as any).mockResolvedValue([]);
+    vi.mocked(prisma.mediaTranscode.findMany).mockResolvedValue([{ key: transcodes[0].key }] as any);
+
+    await new DeletionService().processPending();
+
+    expect(s3Service.deleteFiles).toHaveBeenCalledWith([transcodes[1].key, 'uploads/photo.jpg']);
+    expect(prisma.pendingDeletion.deleteMany).toHaveBeenCalledWith({ where: { id: { in: ['row-1', 'row-2', 'row-3'] } } });
+  });
+});
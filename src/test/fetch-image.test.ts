@@ -0,0 +1,52 @@
+import { describe, it, expect, vi, afterEach } from 'vitest';
+import { fetchImage } from '@/lib/fetch-image';
+import { FILE_UPLOAD_LIMITS } from '@/lib/constants';
+
+const MB = 1024 * 1024;
+
+// A body of `chunks` 1MB chunks, with no content-length unless given
+const respond = (chunks: number, headers: Record<string, string> = {}) => {
+  let sent = 0;
+  const cancel = vi.fn();
+  const body = new ReadableStream<Uint8Array>({
+    pull(controller) {
+      if (sent++ < chunks) controller.enqueue(new Uint8Array(MB));
+      else controller.close();
+    },
+    cancel,
+  });
+  vi.spyOn(globalThis, 'fetch').mockResolvedValue(new Response(body, { headers }));
+  return { cancel, pulled: () => sent };
+};
+
+describe('fetchImage', () => {
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it('returns the whole body', async () => {
+    respond(3);
+    const image = await fetchImage('https://media.example.com/a.jpg', { timeoutMs: 1000 });
+    expect(image.length).toBe(3 * MB);
+  });
+
+  it('stops reading once the body passes the upload limit', async () => {
+    const limitChunks = FILE_UPLOAD_LIMITS.maxFileSize / MB;
+    const body = respond(limitChunks * 10);
+
+    await expect(fetchImage('https://media.example.com/a.jpg', { timeoutMs: 1000 })).rejects.toThrow('Image is too large');
+    expect(body.cancel).toHaveBeenCalled();
+    expect(body.pulled()).toBeLessThan(limitChunks + 3);
+  });
+
+  it('rejects a declared length over the limit without reading', async () => {
+    const body = respond(1, { 'content-length': String(FILE_UPLOAD_LIMITS.maxFileSize + 1) });
+    await expect(fetchImage('https://media.example.com/a.jpg', { timeoutMs: 1000 })).rejects.toThrow('Image is too large');
+    expect(body.pulled()).toBeLessThanOrEqual(1);
+  });
+
+  it('reports a failed response', async () => {
+    vi.spyOn(globalThis, 'fetch').mockResolvedValue(new Response('missing', { status: 404 }));
+    await expect(fetchImage('https://media.example.com/a.jpg', { timeoutMs: 1000 })).rejects.toThrow('Image fetch failed: 404');
+  });
+});
@@ -0,0 +1,178 @@
+import { describe, it, expect } from 'vitest';
+import { fuseOperations, FILTER_PRESETS, RenderPlan } from '@/lib/image-ops';
+import { ImageOperation } from '@/lib/validation';
+
+type Grid = number[][];
+type Pixel = [number, number, number];
+
+// Deterministic random op lists, so a failure can be reproduced
+const random = (seed: number) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+// Step-by-step geometry on a grid of pixel ids
+const rotate90 = (grid: Grid): Grid => grid[0].map((_, x) => grid.map((_, y) => grid[grid.length - 1 - y][x]));
+const mirror = (grid: Grid): Grid => grid.map(row => [...row].reverse());
+const flipVertical = (grid: Grid): Grid => [...grid].reverse();
+const crop = (grid: Grid, rect: { left: number; top: number; width: number; height: number }): Grid => {
+  const width = grid[0].length;
+  const height = grid.length;
+  const left = Math.round(rect.left * width);
+  const top = Math.round(rect.top * height);
+  return grid
+    .slice(top, top + Math.round(rect.height * height))
+    .map(row => row.slice(left, left + Math.round(rect.width * width)));
+};
+
+const applyStepByStep = (grid: Grid, operations: ImageOperation[]): Grid => {
+  operations.forEach(operation => {
+    if (operation.type === 'rotate') {
+      const turns = (((operation.angle / 90) % 4) + 4) % 4;
+      for (let i = 0; i < turns; i++) grid = rotate90(grid);
+    } else if (operation.type === 'flip') {
+      grid = operation.axis === 'horizontal' ? mirror(grid) : flipVertical(grid);
+    } else if (operation.type === 'crop') {
+      grid = crop(grid, operation);
+    }
+  });
+  return grid;
+};
+
+// The plan executed the way image-renderer does: mirror, rotate, crop
+const applyPlan = (grid: Grid, plan: RenderPlan): Grid => {
+  if (plan.mirror) grid = mirror(grid);
+  for (let i = 0; i < plan.rotation / 90; i++) grid = rotate90(grid);
+  return plan.crop ? crop(grid, plan.crop) : grid;
+};
+
+// Step-by-step colour, without clipping, written independently of image-ops
+const LUMA = [0.2126, 0.7152, 0.0722];
+
+const times = (matrix: number[], [r, g, b]: Pixel): Pixel => [
+  matrix[0] * r + matrix[1] * g + matrix[2] * b,
+  matrix[3] * r + matrix[4] * g + matrix[5] * b,
+  matrix[6] * r + matrix[7] * g + matrix[8] * b,
+];
+
+const hueRotate = (pixel: Pixel, degrees: number): Pixel => {
+  const c = Math.cos((degrees * Math.PI) / 180);
+  const s = Math.sin((degrees * Math.PI) / 180);
+  return times([
+    0.213 + c * 0.787 - s * 0.213, 0.715 - c * 0.715 - s * 0.715, 0.072 - c * 0.072 + s * 0.928,
+    0.213 - c * 0.213 + s * 0.143, 0.715 + c * 0.285 + s * 0.140, 0.072 - c * 0.072 - s * 0.283,
+    0.213 - c * 0.213 - s * 0.787, 0.715 - c * 0.715 + s * 0.715, 0.072 + c * 0.928 + s * 0.072,
+  ], pixel);
+};
+
+const applyLook = (pixel: Pixel, look: typeof FILTER_PRESETS[string], intensity = 1): Pixel => {
+  const mix = (from: number, to: number) => from + (to - from) * intensity;
+  if (look.matrix) {
+    const identity = [1, 0, 0, 0, 1, 0, 0, 0, 1];
+    pixel = times(look.matrix.map((v, i) => mix(identity[i], v)), pixel);
+  }
+  const saturation = mix(1, look.saturation ?? 1);
+  const luma = LUMA[0] * pixel[0] + LUMA[1] * pixel[1] + LUMA[2] * pixel[2];
+  pixel = pixel.map(v => luma + saturation * (v - luma)) as Pixel;
+  if (look.hue) pixel = hueRotate(pixel, look.hue * intensity);
+  const brightness = mix(1, look.brightness ?? 1);
+  const contrast = mix(1, look.contrast ?? 1);
+  return pixel.map(v => contrast * (v * brightness) + 128 * (1 - contrast)) as Pixel;
+};
+
+const colourStepByStep = (pixel: Pixel, operations: ImageOperation[]): Pixel => {
+  operations.forEach(operation => {
+    if (operation.type === 'filter') {
+      pixel = applyLook(pixel, FILTER_PRESETS[operation.name], operation.intensity);
+    } else if (operation.type === 'adjust') {
+      const warmth = operation.warmth ?? 0;
+      pixel = applyLook(pixel, {
+        matrix: [1 + 0.1 * warmth, 0, 0, 0, 1, 0, 0, 0, 1 - 0.1 * warmth],
+        brightness: 1 + (operation.brightness ?? 0),
+        saturation: 1 + (operation.saturation ?? 0),
+        contrast: 1 + (operation.contrast ?? 0),
+        hue: operation.hue ?? 0,
+      });
+    }
+  });
+  return pixel;
+};
+
+const colourFused = (pixel: Pixel, plan: RenderPlan): Pixel => {
+  const transformed = plan.matrix ? times(plan.matrix, pixel) : pixel;
+  return transformed.map((v, i) => v + (plan.offset?.[i] ?? 0)) as Pixel;
+};
+
+const SAMPLE_PIXELS: Pixel[] = [[0, 0, 0], [255, 255, 255], [200, 40, 90], [12, 180, 240], [128, 128, 128]];
+
+describe('fuseOperations', () => {
+  const grid: Grid = Array.from({ length: 96 }, (_, y) => Array.from({ length: 128 }, (_, x) => y * 128 + x));
+
+  const geometry: ImageOperation[] = [
+    { type: 'rotate', angle: 90 },
+    { type: 'rotate', angle: -90 },
+    { type: 'rotate', angle: 180 },
+    { type: 'flip', axis: 'horizontal' },
+    { type: 'flip', axis: 'vertical' },
+    { type: 'crop', left: 0.5, top: 0, width: 0.5, height: 1 },
+    { type: 'crop', left: 0, top: 0.5, width: 1, height: 0.5 },
+    { type: 'crop', left: 0.25, top: 0.25, width: 0.5, height: 0.5 },
+  ];
+
+  it('matches step-by-step geometry for random flip, rotate and crop sequences', () => {
+    const next = random(42);
+    for (let trial = 0; trial < 500; trial++) {
+      const operations = Array.from(
+        { length: 1 + Math.floor(next() * 6) },
+        () => geometry[Math.floor(next() * geometry.length)]
+      );
+      expect(applyPlan(grid, fuseOperations(operations)), JSON.stringify(operations))
+        .toEqual(applyStepByStep(grid, operations));
+    }
+  });
+
+  it('carries a resize through later rotations and crops', () => {
+    expect(fuseOperations([
+      { type: 'resize', width: 400, height: 300 },
+      { type: 'rotate', angle: 90 },
+    ]).resize).toEqual({ width: 300, height: 400 });
+
+    expect(fuseOperations([
+      { type: 'resize', width: 400, height: 300 },
+      { type: 'crop', left: 0, top: 0, width: 0.5, height: 0.5 },
+    ]).resize).toEqual({ width: 200, height: 150 });
+  });
+
+  it('leaves the colour transform empty without colour operations', () => {
+    const plan = fuseOperations([{ type: 'rotate', angle: 90 }]);
+    expect(plan.matrix).toBeNull();
+    expect(plan.offset).toBeNull();
+  });
+
+  it('matches step-by-step colour in the order the operations were given', () => {
+    const sequences: ImageOperation[][] = [
+      [{ type: 'adjust', contrast: 0.4 }, { type: 'filter', name: 'sepia', intensity: 1 }],
+      [{ type: 'filter', name: 'sepia', intensity: 1 }, { type: 'adjust', contrast: 0.4 }],
+      [{ type: 'adjust', contrast: -0.3, warmth: 0.5 }, { type: 'filter', name: 'warm', intensity: 0.7 }],
+      [{ type: 'filter', name: 'vivid', intensity: 1 }, { type: 'adjust', hue: 40, brightness: 0.2 }],
+      [{ type: 'filter', name: 'noir', intensity: 0.5 }, { type: 'filter', name: 'fade', intensity: 1 }],
+      [{ type: 'adjust', saturation: -0.5, hue: -90 }, { type: 'filter', name: 'vintage', intensity: 0.3 }],
+    ];
+
+    sequences.forEach(operations => {
+      const plan = fuseOperations(operations);
+      SAMPLE_PIXELS.forEach(pixel => {
+        const expected = colourStepByStep(pixel, operations);
+        colourFused(pixel, plan).forEach((value, i) => expect(value).toBeCloseTo(expected[i], 6));
+      });
+    });
+  });
+
+  it('renders reordered colour operations differently when they do not commute', () => {
+    const contrastFirst = fuseOperations([{ type: 'adjust', contrast: 0.4 }, { type: 'filter', name: 'sepia', intensity: 1 }]);
+    const sepiaFirst = fuseOperations([{ type: 'filter', name: 'sepia', intensity: 1 }, { type: 'adjust', contrast: 0.4 }]);
+    expect(contrastFirst.offset).not.toEqual(sepiaFirst.offset);
+  });
+});
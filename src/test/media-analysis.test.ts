@@ -0,0 +1,26 @@
+import { describe, it, expect, vi } from 'vitest';
+import { isTierAllowed, resolveAnalysisTier } from '@/services/media-analysis';
+
+vi.mock('@/services/openai', () => ({ openaiService: { analyzeMedia: vi.fn() } }));
+vi.mock('@/services/image-stats', () => ({ imageStatsService: { extract: vi.fn() } }));
+
+describe('analysis tiers', () => {
+  it('defaults paid plans to deep and the free plan to fast', () => {
+    expect(resolveAnalysisTier({ plan: 'pro' })).toBe('deep');
+    expect(resolveAnalysisTier({ plan: 'business' })).toBe('deep');
+    expect(resolveAnalysisTier({ plan: 'free' })).toBe('fast');
+  });
+
+  it('treats an unknown or missing plan as free', () => {
+    expect(resolveAnalysisTier({ plan: 'enterprise' })).toBe('fast');
+    expect(resolveAnalysisTier({})).toBe('fast');
+    expect(isTierAllowed('deep', undefined)).toBe(false);
+  });
+
+  it('honours a requested tier only when the plan includes it', () => {
+    expect(resolveAnalysisTier({ plan: 'pro', tier: 'fast' })).toBe('fast');
+    expect(isTierAllowed('fast', 'pro')).toBe(true);
+    expect(isTierAllowed('deep', 'free')).toBe(false);
+    expect(resolveAnalysisTier({ plan: 'free', tier: 'deep' })).toBe('fast');
+  });
+});
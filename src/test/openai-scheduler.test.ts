@@ -0,0 +1,105 @@
+import { describe, it, expect, vi, afterEach } from 'vitest';
+import { OpenAIScheduler } from '@/services/openai-scheduler';
+
+// A bucket whose admissions are resolved by the test, one call at a time
+const controlledBucket = () => {
+  const pending: ((wait: number) => void)[] = [];
+  return {
+    pending,
+    acquire: vi.fn((_tokens: number) => new Promise<number>(resolve => pending.push(resolve))),
+    release: vi.fn(async (_tokens: number) => {}),
+    // Admits the oldest waiting acquire and lets the scheduler react
+    admit: async () => {
+      pending.shift()!(0);
+      await new Promise(resolve => setTimeout(resolve, 0));
+    },
+  };
+};
+
+const openBucket = () => ({
+  acquire: vi.fn(async (_tokens: number) => 0),
+  release: vi.fn(async (_tokens: number) => {}),
+});
+
+describe('OpenAIScheduler', () => {
+  afterEach(() => {
+    vi.useRealTimers();
+    vi.restoreAllMocks();
+  });
+
+  it('runs interactive work ahead of batch work and charges each job its own estimate', async () => {
+    const bucket = controlledBucket();
+    const scheduler = new OpenAIScheduler(bucket);
+    const order: string[] = [];
+    const job = (name: string) => async () => {
+      order.push(name);
+      return name;
+    };
+
+    const first = scheduler.schedule(job('batch-1'), { priority: 'batch', estimatedTokens: 1000 });
+    const second = scheduler.schedule(job('batch-2'), { priority: 'batch', estimatedTokens: 1000 });
+    const urgent = scheduler.schedule(job('interactive'), { priority: 'interactive', estimatedTokens: 50 });
+
+    // batch-1 was admitted while the interactive job arrived: its budget is
+    // given back and the interactive job is admitted on its own estimate
+    await bucket.admit();
+    expect(bucket.release).toHaveBeenCalledWith(1000);
+    expect(bucket.acquire).toHaveBeenLastCalledWith(50);
+
+    await bucket.admit();
+    await bucket.admit();
+    await bucket.admit();
+
+    await Promise.all([first, second, urgent]);
+    expect(order).toEqual(['interactive', 'batch-1', 'batch-2']);
+    expect(bucket.acquire.mock.calls.map(([tokens]) => tokens)).toEqual([1000, 50, 1000, 1000]);
+  });
+
+  it('drops a job aborted while queued and returns its admission', async () => {
+    const bucket = controlledBucket();
+    const scheduler = new OpenAIScheduler(bucket);
+    const error = vi.spyOn(console, 'error').mockImplementation(() => {});
+    const run = vi.fn(async () => 'result');
+    const controller = new AbortController();
+
+    const aborted = scheduler.schedule(run, { estimatedTokens: 200, signal: controller.signal });
+    controller.abort(new Error('cancelled'));
+    await expect(aborted).rejects.toThrow('cancelled');
+
+    await bucket.admit();
+    expect(run).not.toHaveBeenCalled();
+    expect(bucket.release).toHaveBeenCalledWith(200);
+    expect(scheduler.pending).toBe(0);
+    expect(error).not.toHaveBeenCalled();
+
+    const next = scheduler.schedule(async () => 'next', { estimatedTokens: 10 });
+    await bucket.admit();
+    await expect(next).resolves.toBe('next');
+  });
+
+  it('retries a rate-limited request after a jittered backoff', async () => {
+    vi.useFakeTimers();
+    vi.spyOn(Math, 'random').mockReturnValue(0.5);
+    const scheduler = new OpenAIScheduler(openBucket());
+    const run = vi.fn()
+      .mockRejectedValueOnce(Object.assign(new Error('Too many requests'), { status: 429 }))
+      .mockResolvedValueOnce('done');
+
+    const result = scheduler.schedule(run, { estimatedTokens: 10 });
+
+    // The first retry waits a random share of the 500ms base backoff
+    await vi.advanceTimersByTimeAsync(249);
+    expect(run).toHaveBeenCalledTimes(1);
+    await vi.advanceTimersByTimeAsync(1);
+    await expect(result).resolves.toBe('done');
+    expect(run).toHaveBeenCalledTimes(2);
+  });
+
+  it('does not retry errors that are not transient', async () => {
+    const scheduler = new OpenAIScheduler(openBucket());
+    const run = vi.fn().mockRejectedValue(Object.assign(new Error('Bad request'), { status: 400 }));
+
+    await expect(scheduler.schedule(run, { estimatedTokens: 10 })).rejects.toThrow('Bad request');
+    expect(run).toHaveBeenCalledTimes(1);
+  });
+});
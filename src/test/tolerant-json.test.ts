@@ -0,0 +1,119 @@
+import { describe, it, expect, vi } from 'vitest';
+import { parseModelJson, StreamingJsonParser, stripTrailingCommas } from '@/lib/tolerant-json';
+import { captionListSchema, multiPlatformCaptionSchema, semanticAnalysisSchema } from '@/lib/validation';
+
+describe('parseModelJson', () => {
+  it('parses plain JSON', () => {
+    expect(parseModelJson('{"mood":"calm","objects":["sea","boat"]}')).toEqual({ mood: 'calm', objects: ['sea', 'boat'] });
+  });
+
+  it('ignores a markdown fence and surrounding prose', () => {
+    const text = 'Here is the analysis:\n```json\n{"mood": "happy", "score": 0.9}\n```\nLet me know if you need more.';
+    expect(parseModelJson(text)).toEqual({ mood: 'happy', score: 0.9 });
+  });
+
+  it('stops at the end of the root value', () => {
+    expect(parseModelJson('[1, 2] and then [3]')).toEqual([1, 2]);
+  });
+
+  it('tolerates trailing commas', () => {
+    expect(parseModelJson('{"tags": ["a", "b",], "n": 1,}')).toEqual({ tags: ['a', 'b'], n: 1 });
+  });
+
+  it('keeps braces and escaped quotes inside strings', () => {
+    expect(parseModelJson('{"text": "say \\"hi\\" {not a brace]", "n": 2}')).toEqual({ text: 'say "hi" {not a brace]', n: 2 });
+  });
+
+  it('closes a document truncated inside a string', () => {
+    expect(parseModelJson('{"captions": [{"text": "Sunset over the ba')).toEqual({ captions: [{ text: 'Sunset over the ba' }] });
+  });
+
+  it('drops a trailing escape cut in half', () => {
+    expect(parseModelJson('{"text": "line\\')).toEqual({ text: 'line' });
+  });
+
+  it('drops a key that has no value yet', () => {
+    expect(parseModelJson('{"mood": "calm", "sceneTy')).toEqual({ mood: 'calm' });
+    expect(parseModelJson('{"mood": "calm", "sceneType":')).toEqual({ mood: 'calm' });
+  });
+
+  it('drops half-written literals', () => {
+    expect(parseModelJson('{"a": 1, "ok": tr')).toEqual({ a: 1 });
+    expect(parseModelJson('[1, 2, nul')).toEqual([1, 2]);
+    expect(parseModelJson('[1, 2.')).toEqual([1]);
+    expect(parseModelJson('{"a": [1, -')).toEqual({ a: [1] });
+  });
+
+  it('returns undefined when there is no JSON', () => {
+    expect(parseModelJson('I cannot help with that.')).toBeUndefined();
+    expect(parseModelJson('')).toBeUndefined();
+    expect(parseModelJson(null)).toBeUndefined();
+    expect(parseModelJson(undefined)).toBeUndefined();
+  });
+
+  it('returns undefined for text that cannot be repaired', () => {
+    expect(parseModelJson('{"a": oops}')).toBeUndefined();
+  });
+});
+
+describe('StreamingJsonParser', () => {
+  it('reports complete array items as they arrive', () => {
+    const onItem = vi.fn();
+    const parser = new StreamingJsonParser(onItem);
+
+    parser.push('{"captions": [{"text": "one"}, {"te');
+    expect(onItem.mock.calls).toEqual([[{ text: 'one' }, 2]]);
+    expect(parser.isComplete).toBe(false);
+
+    parser.push('xt": "two"}]}');
+    expect(onItem.mock.calls).toEqual([[{ text: 'one' }, 2], [{ text: 'two' }, 2]]);
+    expect(parser.isComplete).toBe(true);
+    expect(parser.value()).toEqual({ captions: [{ text: 'one' }, { text: 'two' }] });
+  });
+
+  it('gives the same value however the text is chunked', () => {
+    const text = '```json\n{"objects": ["cat", "sofa"], "mood": "cosy", "score": 0.75}\n```';
+    const parser = new StreamingJsonParser();
+    text.split('').forEach(char => parser.push(char));
+    expect(parser.value()).toEqual(parseModelJson(text));
+  });
+
+  it('offers a usable value mid-stream', () => {
+    const parser = new StreamingJsonParser().push('{"captions": [{"text": "a"}, {"text": "b');
+    expect(parser.value()).toEqual({ captions: [{ text: 'a' }, { text: 'b' }] });
+  });
+});
+
+describe('stripTrailingCommas', () => {
+  it('leaves commas inside strings alone', () => {
+    expect(stripTrailingCommas('{"a": "x,}", "b": [1,],}')).toBe('{"a": "x,}", "b": [1]}');
+  });
+});
+
+// What the OpenAI service does with each response: repair, then apply the
+// schema's per-field fallbacks
+describe('model output fallbacks', () => {
+  it('fills a truncated analysis with neutral values', () => {
+    const text = '```json\n{"mood": "calm", "moodConfidence": 87, "objects": "sea, boat", "sceneTy';
+    expect(semanticAnalysisSchema.parse(parseModelJson(text))).toEqual({
+      mood: 'calm',
+      moodConfidence: 0.87,
+      sceneType: 'unknown',
+      sceneConfidence: 0.5,
+      objects: ['sea', 'boat'],
+      composition: 'unknown',
+      style: 'unknown',
+      emotions: [],
+    });
+  });
+
+  it('keeps every caption that arrived, in either envelope', () => {
+    expect(captionListSchema.parse(parseModelJson('{"captions": [{"text": "First"}, "Second", 3, {"text": "Thi'))).toEqual(['First', 'Second', 'Thi']);
+    expect(captionListSchema.parse(parseModelJson('["One", {"caption": " Two "}]'))).toEqual(['One', 'Two']);
+  });
+
+  it('keeps the platforms whose captions parsed', () => {
+    const text = '{"captions": {"Instagram": ["Hello"], "tiktok": "not a list"}}';
+    expect(multiPlatformCaptionSchema.parse(parseModelJson(text))).toEqual({ instagram: ['Hello'], tiktok: [] });
+  });
+});
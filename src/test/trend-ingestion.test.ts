@@ -0,0 +1,96 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { Readable } from 'stream';
+import { prisma } from '@/lib/db';
+import { openaiService } from '@/services/openai';
+import { vectorSearchService } from '@/services/vector-search';
+import { trendContentHash, trendIngestionService } from '@/services/trend-ingestion';
+import { trendFeedItemSchema } from '@/lib/validation';
+
+vi.mock('@/lib/db', () => ({
+  prisma: {
+    trend: { findMany: vi.fn(), createManyAndReturn: vi.fn(), update: vi.fn(), updateMany: vi.fn() },
+    $transaction: vi.fn(),
+  },
+}));
+vi.mock('@/services/openai', () => ({ openaiService: { generateEmbeddings: vi.fn() } }));
+vi.mock('@/services/vector-search', () => ({ vectorSearchService: { upsertTrends: vi.fn() } }));
+vi.mock('@/services/hashtag-index', () => ({ hashtagIndex: { upsertTrend: vi.fn(), removeTrend: vi.fn() } }));
+vi.mock('@/services/trend-leaderboards', () => ({ trendLeaderboards: { upsertTrend: vi.fn(), removeTrend: vi.fn() } }));
+vi.mock('@/services/deletion', () => ({
+  deletionService: { cancelVectorDeletions: vi.fn(), queueVectorDeletions: vi.fn(), processInBackground: vi.fn() },
+}));
+
+const item = (externalId: string, overrides: Record<string, unknown> = {}) => ({
+  externalId,
+  name: `Trend ${externalId}`,
+  category: 'travel',
+  platforms: ['instagram'],
+  popularity: 50,
+  mood: 'calm',
+  ...overrides,
+});
+
+const feed = (...items: object[]) => Readable.from(items.map(value => `${JSON.stringify(value)}\n`));
+
+// Every contentHash the service wrote, by trend id
+const writtenHashes = () => vi.mocked(prisma.trend.update).mock.calls
+  .filter(([args]: any[]) => 'contentHash' in args.data)
+  .map(([args]: any[]) => [args.where.id, args.data.contentHash]);
+
+describe('TrendIngestionService', () => {
+  beforeEach(() => {
+    vi.resetAllMocks();
+    vi.mocked(prisma.$transaction).mockImplementation((async (ops: unknown[]) => ops) as any);
+    vi.mocked(openaiService.generateEmbeddings).mockImplementation(async (texts: string[]) => texts.map(() => [0.1, 0.2]));
+  });
+
+  it('sets the content hash only once the vectors are indexed', async () => {
+    vi.mocked(prisma.trend.findMany).mockResolvedValue([
+      { id: 'old', externalId: 'b', contentHash: 'stale', popularity: 50, isActive: true },
+    ] as any);
+    vi.mocked(prisma.trend.createManyAndReturn).mockResolvedValue([{ id: 'new', externalId: 'a' }] as any);
+
+    const stats = await trendIngestionService.ingest(feed(item('a'), item('b')));
+
+    expect(stats.created).toBe(1);
+    expect(stats.reembedded).toBe(1);
+    const [{ data: insertedRows }] = vi.mocked(prisma.trend.createManyAndReturn).mock.calls[0] as any[];
+    expect(insertedRows[0].contentHash).toBeNull();
+    expect(vectorSearchService.upsertTrends).toHaveBeenCalledWith([
+      expect.objectContaining({ id: 'new' }),
+      expect.objectContaining({ id: 'old' }),
+    ]);
+    expect(writtenHashes()).toEqual([
+      ['old', null],
+      ['new', trendContentHash(trendFeedItemSchema.parse(item('a')))],
+      ['old', trendContentHash(trendFeedItemSchema.parse(item('b')))],
+    ]);
+  });
+
+  it('leaves new rows unhashed when the catalog transaction fails', async () => {
+    vi.mocked(prisma.trend.findMany).mockResolvedValue([]);
+    vi.mocked(prisma.trend.createManyAndReturn).mockResolvedValue([{ id: 'new', externalId: 'a' }] as any);
+    vi.mocked(prisma.$transaction).mockRejectedValueOnce(new Error('deadlock'));
+
+    await expect(trendIngestionService.ingest(feed(item('a')))).rejects.toThrow('deadlock');
+
+    // Already committed by the insert, but without a hash the next run retries it
+    const [{ data: insertedRows }] = vi.mocked(prisma.trend.createManyAndReturn).mock.calls[0] as any[];
+    expect(insertedRows[0].contentHash).toBeNull();
+    expect(vectorSearchService.upsertTrends).not.toHaveBeenCalled();
+    expect(writtenHashes()).toEqual([]);
+  });
+
+  it('leaves written rows unhashed when the vector upsert fails', async () => {
+    vi.mocked(prisma.trend.findMany).mockResolvedValue([
+      { id: 'old', externalId: 'b', contentHash: 'stale', popularity: 50, isActive: true },
+    ] as any);
+    vi.mocked(prisma.trend.createManyAndReturn).mockResolvedValue([{ id: 'new', externalId: 'a' }] as any);
+    vi.mocked(vectorSearchService.upsertTrends).mockRejectedValueOnce(new Error('index unavailable'));
+
+    await expect(trendIngestionService.ingest(feed(item('a'), item('b')))).rejects.toThrow('index unavailable');
+
+    // The changed row had its hash cleared alongside its new content
+    expect(writtenHashes()).toEqual([['old', null]]);
+  });
+});
@@ -0,0 +1,132 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import { prisma } from '@/lib/db';
+import { LEADERBOARD_SIZE, MemoryLeaderboardStore, TrendLeaderboards, TrendSummary } from '@/services/trend-leaderboards';
+
+vi.mock('@/lib/db', () => ({
+  prisma: { trend: { findMany: vi.fn() } },
+}));
+
+const trend = (index: number, overrides: Partial<TrendSummary> = {}): TrendSummary => ({
+  id: `trend-${String(index).padStart(4, '0')}`,
+  name: `Trend ${index}`,
+  category: index % 2 ? 'travel' : 'food',
+  platforms: ['instagram'],
+  popularity: index % 100,
+  hashtags: [],
+  colors: [],
+  mood: 'calm',
+  description: '',
+  ...overrides,
+});
+
+const byRank = (a: TrendSummary, b: TrendSummary) => b.popularity - a.popularity || (a.id < b.id ? -1 : 1);
+
+// The catalog as Postgres would serve a board's refill
+const serveFrom = (catalog: TrendSummary[]) => {
+  vi.mocked(prisma.trend.findMany).mockImplementation((async ({ where, take }: any) => catalog
+    .filter(item => !where.category || item.category === where.category)
+    .filter(item => !where.platforms || item.platforms.includes(where.platforms.has))
+    .sort(byRank)
+    .slice(0, take)) as any);
+};
+
+describe('MemoryLeaderboardStore', () => {
+  it('keeps only the top of each board, with headroom', async () => {
+    const store = new MemoryLeaderboardStore();
+    const catalog = Array.from({ length: 1000 }, (_, i) => trend(i));
+    await store.replaceAll(catalog);
+
+    const all = await store.top('all', 1000);
+    expect(all.length).toBeGreaterThan(LEADERBOARD_SIZE);
+    expect(all.length).toBeLessThan(LEADERBOARD_SIZE * 2);
+    expect(all).toEqual([...catalog].sort(byRank).slice(0, all.length));
+  });
+
+  it('stays bounded as trends are added', async () => {
+    const store = new MemoryLeaderboardStore();
+    await store.replaceAll([]);
+    for (let i = 0; i < 1000; i++) await store.upsert(trend(i));
+
+    const all = await store.top('all', 1000);
+    expect(all.length).toBeLessThan(LEADERBOARD_SIZE * 2);
+    expect(all.slice(0, LEADERBOARD_SIZE)).toEqual(
+      Array.from({ length: 1000 }, (_, i) => trend(i)).sort(byRank).slice(0, LEADERBOARD_SIZE)
+    );
+  });
+
+  it('does not list a trend below the tail of a trimmed board', async () => {
+    const store = new MemoryLeaderboardStore();
+    await store.replaceAll(Array.from({ length: 1000 }, (_, i) => trend(i, { popularity: 50 + (i % 50) })));
+
+    await store.upsert(trend(5000, { popularity: 1 }));
+    expect((await store.top('all', 1000)).some(item => item.id === 'trend-5000')).toBe(false);
+
+    await store.upsert(trend(5000, { popularity: 1000 }));
+    expect((await store.top('all', 1))[0].id).toBe('trend-5000');
+  });
+
+  it('reports trimmed boards that fall below the served size', async () => {
+    const store = new MemoryLeaderboardStore();
+    const catalog = Array.from({ length: 1000 }, (_, i) => trend(i));
+    await store.replaceAll(catalog);
+
+    const held = await store.top('all', 1000);
+    const short = new Set<string>();
+    for (const item of held.slice(0, held.length - LEADERBOARD_SIZE + 1)) {
+      (await store.remove(item.id)).forEach(board => short.add(board));
+    }
+    expect(short.has('all')).toBe(true);
+  });
+});
+
+describe('TrendLeaderboards', () => {
+  beforeEach(() => {
+    vi.mocked(prisma.trend.findMany).mockReset();
+  });
+
+  it('refills a board from Postgres once removals leave it short', async () => {
+    const store = new MemoryLeaderboardStore();
+    const leaderboards = new TrendLeaderboards(store);
+    const catalog = Array.from({ length: 1000 }, (_, i) => trend(i));
+    await store.replaceAll(catalog);
+    // Synced just now, so reads do not rebuild
+    await store.setSyncState({ syncedAt: Date.now(), rebuiltAt: Date.now() });
+
+    const held = await store.top('all', 1000);
+    const removed = held.slice(0, held.length - LEADERBOARD_SIZE + 1);
+    const remaining = catalog.filter(item => !removed.includes(item));
+    serveFrom(remaining);
+
+    for (const item of removed) await leaderboards.removeTrend(item.id);
+
+    const { trends } = await leaderboards.top({}, LEADERBOARD_SIZE);
+    expect(trends).toEqual([...remaining].sort(byRank).slice(0, LEADERBOARD_SIZE));
+    expect(prisma.trend.findMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { isActive: true },
+      orderBy: [{ popularity: 'desc' }, { id: 'asc' }],
+    }));
+  });
+
+  it('refills platform and category boards with their own filter', async () => {
+    const store = new MemoryLeaderboardStore();
+    const leaderboards = new TrendLeaderboards(store);
+    const catalog = Array.from({ length: 1000 }, (_, i) => trend(i));
+    await store.replaceAll(catalog);
+    await store.setSyncState({ syncedAt: Date.now(), rebuiltAt: Date.now() });
+    serveFrom(catalog.slice(500));
+
+    const travel = await store.top('category:travel', 1000);
+    for (const item of travel.slice(0, travel.length - LEADERBOARD_SIZE + 1)) {
+      await leaderboards.removeTrend(item.id);
+    }
+
+    expect(prisma.trend.findMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { isActive: true, category: 'travel' },
+    }));
+    expect(prisma.trend.findMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { isActive: true, platforms: { has: 'instagram' } },
+    }));
+    const { trends } = await leaderboards.top({ category: 'travel' }, LEADERBOARD_SIZE);
+    expect(trends).toHaveLength(LEADERBOARD_SIZE);
+  });
+});
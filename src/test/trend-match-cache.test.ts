@@ -0,0 +1,99 @@
+import { describe, it, expect, vi, afterEach } from 'vitest';
+import { embeddingSignature, MemoryMatchCacheStore, TrendMatchCache } from '@/services/trend-match-cache';
+
+const DIMENSION = 1536;
+
+// Deterministic random vectors, so a failure can be reproduced
+const random = (seed: number) => () => {
+  seed = (seed + 0x6d2b79f5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296 - 0.5;
+};
+
+const normalize = (vector: number[]) => {
+  const length = Math.hypot(...vector);
+  return vector.map(v => v / length);
+};
+
+const randomUnit = (next: () => number) => normalize(Array.from({ length: DIMENSION }, next));
+
+// A unit vector at the given angle from `base`, in a random direction
+const rotated = (base: number[], degrees: number, next: () => number) => {
+  const noise = randomUnit(next);
+  const along = noise.reduce((sum, v, i) => sum + v * base[i], 0);
+  const orthogonal = normalize(noise.map((v, i) => v - along * base[i]));
+  const angle = (degrees * Math.PI) / 180;
+  return base.map((v, i) => Math.cos(angle) * v + Math.sin(angle) * orthogonal[i]);
+};
+
+const matches = [{ id: 'trend-1', score: 0.92 }, { id: 'trend-2', score: 0.87 }];
+
+describe('embeddingSignature', () => {
+  it('is a 64-bit hex signature that depends only on direction', () => {
+    const vector = randomUnit(random(1));
+    expect(embeddingSignature(vector)).toMatch(/^[0-9a-f]{16}$/);
+    expect(embeddingSignature(vector.map(v => v * 3))).toBe(embeddingSignature(vector));
+  });
+});
+
+describe('TrendMatchCache', () => {
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it('serves near-duplicate embeddings from the cache', async () => {
+    const next = random(7);
+    let hits = 0;
+    for (let trial = 0; trial < 50; trial++) {
+      const cache = new TrendMatchCache(new MemoryMatchCacheStore());
+      const query = randomUnit(next);
+      await cache.set(query, 50, matches);
+      if (await cache.get(rotated(query, 2, next), 50)) hits++;
+    }
+    expect(hits).toBeGreaterThanOrEqual(48);
+  });
+
+  it('does not serve unrelated embeddings', async () => {
+    const next = random(11);
+    const cache = new TrendMatchCache(new MemoryMatchCacheStore());
+    const query = randomUnit(next);
+    await cache.set(query, 50, matches);
+
+    expect(await cache.get(query, 50)).toEqual(matches);
+    expect(await cache.get(rotated(query, 30, next), 50)).toBeNull();
+    expect(await cache.get(randomUnit(next), 50)).toBeNull();
+  });
+
+  it('keys entries by topK and filters', async () => {
+    const cache = new TrendMatchCache(new MemoryMatchCacheStore());
+    const query = randomUnit(random(3));
+    await cache.set(query, 50, matches, { platform: 'instagram' });
+
+    expect(await cache.get(query, 50, { platform: 'instagram' })).toEqual(matches);
+    expect(await cache.get(query, 50, { platform: 'tiktok' })).toBeNull();
+    expect(await cache.get(query, 20, { platform: 'instagram' })).toBeNull();
+  });
+
+  it('drops every entry on invalidate', async () => {
+    const cache = new TrendMatchCache(new MemoryMatchCacheStore());
+    const query = randomUnit(random(5));
+    await cache.set(query, 50, matches);
+    await cache.invalidate();
+    expect(await cache.get(query, 50)).toBeNull();
+  });
+
+  it('treats store failures as misses', async () => {
+    const error = vi.spyOn(console, 'error').mockImplementation(() => {});
+    const store = new MemoryMatchCacheStore();
+    vi.spyOn(store, 'version').mockRejectedValue(new Error('connection lost'));
+    vi.spyOn(store, 'bumpVersion').mockRejectedValue(new Error('connection lost'));
+    const cache = new TrendMatchCache(store);
+    const query = randomUnit(random(9));
+
+    await cache.set(query, 50, matches);
+    expect(await cache.get(query, 50)).toBeNull();
+    await expect(cache.invalidate()).resolves.toBeUndefined();
+    expect(error).toHaveBeenCalledTimes(3);
+  });
+});
@@ -1,3 +1,5 @@
+import { PLATFORM_SPECS } from '@/lib/constants';
+
 export type User = {
   id: string;
   name: string;
@@ -5,4 +7,6 @@ export type User = {
   image?: string;
   createdAt: Date;
   updatedAt: Date;
-};
\ No newline at end of file
+};
+
+export type Platform = keyof typeof PLATFORM_SPECS;